@@ -5,12 +5,14 @@ SQLiteストレージ使用例
 """
 
 import sys
+import time
 from pathlib import Path
 
 # パス設定（テンプレートディレクトリをインポートパスに追加）
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from sqlite_storage_base import SQLiteStorage
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 
@@ -131,6 +133,18 @@ def example3_aggregation():
         }
         storage.create_table("sales", schema)
 
+        # カテゴリ別の集計テーブル（salesへの挿入・更新・削除時にトリガーで該当カテゴリのみ更新）
+        storage.create_summary_table(
+            "sales_by_category",
+            "sales",
+            group_by=["category"],
+            aggregates={
+                "product_count": "COUNT(*)",
+                "total_sales": "SUM(sales_count)",
+                "avg_price": "AVG(price)"
+            }
+        )
+
         # サンプルデータ挿入
         sales_data = [
             {"category": "Fruit", "product_name": "Apple", "price": 100, "sales_count": 50},
@@ -139,7 +153,7 @@ def example3_aggregation():
             {"category": "Vegetable", "product_name": "Tomato", "price": 90, "sales_count": 35},
             {"category": "Fruit", "product_name": "Orange", "price": 120, "sales_count": 25}
         ]
-        storage.insert("sales", sales_data)
+        storage.insert("sales", sales_data, auto_timestamp=False)
 
         # カテゴリ別集計
         result = storage.query("""
@@ -153,6 +167,13 @@ def example3_aggregation():
         """)
         print(f"\nカテゴリ別集計:\n{pd.DataFrame(result)}")
 
+        # 同じ集計を集計テーブルから取得（salesを再集計しない）
+        summary = storage.select(
+            "sales_by_category",
+            columns=["category", "product_count", "total_sales", "avg_price"]
+        )
+        print(f"\nカテゴリ別集計（集計テーブル）:\n{pd.DataFrame(summary)}")
+
         # 売上TOP3
         top3 = storage.query("""
             SELECT
@@ -185,26 +206,56 @@ def example4_api_data_storage():
             "status_code": "INTEGER",
             "fetched_at": "TIMESTAMP"
         }
-        storage.create_table("api_history", schema, indexes=["api_name", "fetched_at"])
+        # 月ごとの子テーブルに分割（api_name = ? AND fetched_at >= ? は各子テーブルの複合インデックスで処理）
+        if not storage.query(
+            "SELECT 1 FROM sqlite_master WHERE type='view' AND name='api_history'"
+        ):
+            storage.create_partitioned_table(
+                "api_history",
+                schema,
+                partition_column="fetched_at",
+                interval="month",
+                indexes=[["api_name", "fetched_at"], "data_json.result"],
+                # data_json内のresultを仮想生成カラム data_json_result として抽出（インデックス検索可能）
+                json_columns={"data_json": ["result"]}
+            )
 
         # 擬似的なAPI取得データ
         api_data = {
             "api_name": "users_api",
-            "data_json": '{"users": [{"id": 1, "name": "Alice"}]}',
+            "data_json": '{"result": "ok", "users": [{"id": 1, "name": "Alice"}]}',
             "status_code": 200,
             "fetched_at": datetime.now().isoformat()
         }
         storage.insert("api_history", api_data, auto_timestamp=False)
         print("APIデータを保存")
 
-        # 過去7日間のAPI取得履歴
-        seven_days_ago = (datetime.now() - timedelta(days=7)).isoformat()
-        history = storage.query(
-            "SELECT * FROM api_history WHERE fetched_at >= ? ORDER BY fetched_at DESC",
-            params=(seven_days_ago,)
-        )
+        # 過去7日間のAPI取得履歴（対象期間の子テーブルのみを走査）
+        seven_days_ago = datetime.now() - timedelta(days=7)
+        history = storage.select_range("api_history", seven_days_ago, order_by="fetched_at DESC")
         print(f"\n過去7日間の履歴: {len(history)}件")
 
+        # API別の過去7日間の履歴
+        users_history = storage.select_range(
+            "api_history",
+            seven_days_ago,
+            condition={"api_name": "users_api"},
+            order_by="fetched_at DESC"
+        )
+        print(f"users_apiの過去7日間の履歴: {len(users_history)}件")
+
+        # JSON内のフィールドで絞り込み（Python側でパースせず、生成カラムのインデックスで検索）
+        ok_history = storage.select(
+            "api_history",
+            columns=["id", "api_name", "data_json.result"],
+            condition={"data_json.result": "ok"}
+        )
+        print(f"result=okの履歴: {len(ok_history)}件")
+
+        # 保持期間（90日）を過ぎた月の子テーブルを削除
+        dropped = storage.drop_partitions("api_history", older_than_days=90)
+        print(f"削除したパーティション: {dropped}")
+
     finally:
         storage.close()
 
@@ -277,9 +328,9 @@ def example6_data_migration():
             {"id": 3, "name": "Charlie", "department": "Marketing"}
         ])
 
-        # CSVデータをSQLiteに保存
-        storage.bulk_insert_from_df("employees", csv_data, if_exists="replace")
-        print(f"{len(csv_data)}件のCSVデータを移行")
+        # CSVデータをSQLiteに保存（1トランザクションでチャンク投入）
+        result = storage.load_dataframe("employees", csv_data, if_exists="replace")
+        print(f"{result['count']}件のCSVデータを移行（{result['rows_per_sec']}行/秒）")
 
         # 確認
         df = storage.to_dataframe("employees")
@@ -289,13 +340,50 @@ def example6_data_migration():
         storage.close()
 
 
+def example7_dataframe_load_benchmark(rows: int = 200000):
+    """
+    例7: DataFrameロードのベンチマーク（to_sql vs load_dataframe）
+    """
+    print("\n=== 例7: DataFrameロードのベンチマーク ===")
+
+    storage = SQLiteStorage("data/example7.db")
+
+    try:
+        # 日時・欠損値・文字列を含むテストデータ
+        df = pd.DataFrame({
+            "sale_id": np.arange(rows),
+            "product_name": np.random.choice(["Apple", "Banana", "Orange"], rows),
+            "amount": np.where(np.arange(rows) % 10 == 0, np.nan, np.random.rand(rows) * 1000),
+            "sold_at": pd.date_range("2026-01-01", periods=rows, freq="min")
+        })
+
+        # pandas.to_sql（bulk_insert_from_df）
+        start = time.perf_counter()
+        storage.bulk_insert_from_df("sales_to_sql", df, if_exists="replace")
+        to_sql_sec = time.perf_counter() - start
+
+        # load_dataframe（インデックスを削除→ロード→再作成）
+        storage.load_dataframe("sales_loader", df.head(0), if_exists="replace")
+        storage.query("CREATE INDEX IF NOT EXISTS idx_sales_loader_sold_at ON sales_loader (sold_at)")
+        result = storage.load_dataframe("sales_loader", df, rebuild_indexes=True)
+
+        print(f"to_sql:         {to_sql_sec:.2f}秒 ({rows / to_sql_sec:,.0f}行/秒)")
+        print(f"load_dataframe: {result['elapsed_sec']:.2f}秒 ({result['rows_per_sec']:,.0f}行/秒)")
+        print(f"速度比: {to_sql_sec / result['elapsed_sec']:.1f}倍")
+
+    finally:
+        storage.close()
+
+
 if __name__ == "__main__":
-    # 全例を実行
+    # 全例を実行（例7のベンチマークは20万行を書き込むため --benchmark 指定時のみ）
     example1_basic_crud()
     example2_bulk_insert()
     example3_aggregation()
     example4_api_data_storage()
     example5_transaction()
     example6_data_migration()
+    if "--benchmark" in sys.argv[1:]:
+        example7_dataframe_load_benchmark()
 
     print("\n=== 全ての例の実行が完了しました ===")
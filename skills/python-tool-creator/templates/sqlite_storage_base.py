@@ -6,21 +6,428 @@ SQLiteストレージベーステンプレート
 """
 
 import sqlite3
+import asyncio
+import gzip
 import json
-from datetime import datetime
-from typing import Optional, Dict, Any, List, Union
+import os
+import queue
+import random
+import re
+import shutil
+import threading
+import time
+import zlib
+from collections import OrderedDict, deque, namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from functools import partial
+from itertools import islice
+from typing import (
+    Optional, Dict, Any, List, Union, Tuple, Iterable, Iterator, AsyncIterator,
+    Callable, Hashable
+)
 from pathlib import Path
+import numpy as np
 import pandas as pd
 from common.logger import setup_logger
 from common.config_manager import ConfigManager
 
 
+# select()/query()の戻り値（row_formatにより 辞書/タプル/レコードのリスト、または列ごとのリストの辞書）
+QueryResult = Union[List[Dict[str, Any]], List[tuple], Dict[str, List[Any]]]
+
+
+class QueryProfiler:
+    """クエリプロファイラー
+
+    ステートメント形状（リテラルを?に正規化したSQL）ごとに実行時間ヒストグラム、
+    返却行数、EXPLAIN QUERY PLANを記録し、閾値を超えたクエリをスロークエリログに出力する
+    """
+
+    # ヒストグラムの上限値（ミリ秒）。最後のバケットは上限なし
+    HISTOGRAM_BOUNDS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
+    # EXPLAIN QUERY PLANを取得するステートメント
+    EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "REPLACE")
+
+    def __init__(
+        self,
+        logger: Any,
+        slow_query_ms: float = 100,
+        explain: bool = True,
+        slow_query_log: Optional[str] = None,
+        max_shapes: int = 1000
+    ):
+        """
+        初期化
+
+        Args:
+            logger: ロガー
+            slow_query_ms: スロークエリと判定する実行時間（ミリ秒）
+            explain: 初出の形状でEXPLAIN QUERY PLANを取得する
+            slow_query_log: スロークエリを追記するファイル（JSON Lines。Noneの場合はログのみ）
+            max_shapes: 記録する形状数の上限
+        """
+        self.logger = logger
+        self.slow_query_ms = slow_query_ms
+        self.explain = explain
+        self.slow_query_log = Path(slow_query_log) if slow_query_log else None
+        self.max_shapes = max_shapes
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+        if self.slow_query_log:
+            self.slow_query_log.parent.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def normalize(sql: str) -> str:
+        """
+        SQLをステートメント形状に正規化（文字列・数値リテラルを?に置換し空白を詰める）
+
+        Args:
+            sql: SQL
+
+        Returns:
+            正規化したSQL
+        """
+        shape = re.sub(r"'(?:[^']|'')*'", "?", sql)
+        shape = re.sub(r"\b\d+(?:\.\d+)?\b", "?", shape)
+        return " ".join(shape.split())
+
+    def record(
+        self,
+        conn: sqlite3.Connection,
+        sql: str,
+        params: Any,
+        elapsed_sec: float,
+        rows: int
+    ) -> None:
+        """
+        1ステートメントの実行結果を記録
+
+        Args:
+            conn: 実行した接続（EXPLAIN QUERY PLANの取得に使用）
+            sql: 実行したSQL
+            params: パラメータ
+            elapsed_sec: 実行時間（execute〜fetch完了、秒）
+            rows: 返却行数（更新系は影響行数）
+        """
+        shape = self.normalize(sql)
+        elapsed_ms = elapsed_sec * 1000
+
+        with self._lock:
+            stats = self._stats.get(shape)
+            is_new = stats is None
+            if is_new:
+                if len(self._stats) >= self.max_shapes:
+                    return
+                stats = {
+                    "shape": shape,
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "rows": 0,
+                    "histogram": [0] * (len(self.HISTOGRAM_BOUNDS_MS) + 1),
+                    "plan": [],
+                    "full_scan": False
+                }
+                self._stats[shape] = stats
+
+            stats["count"] += 1
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+            stats["rows"] += rows
+            bucket = next(
+                (
+                    i
+                    for i, bound in enumerate(self.HISTOGRAM_BOUNDS_MS)
+                    if elapsed_ms <= bound
+                ),
+                len(self.HISTOGRAM_BOUNDS_MS)
+            )
+            stats["histogram"][bucket] += 1
+
+        if is_new and self.explain:
+            plan = self._explain(conn, sql, params)
+            with self._lock:
+                stats["plan"] = plan
+                # インデックスの走査（SCAN ... USING COVERING INDEX）は全件走査に含めない
+                stats["full_scan"] = any(
+                    IndexAdvisor.SCAN_PATTERN.match(detail) for detail in plan
+                )
+
+        if elapsed_ms >= self.slow_query_ms:
+            self._log_slow_query(sql, elapsed_ms, rows, stats["plan"])
+
+    def _explain(self, conn: sqlite3.Connection, sql: str, params: Any) -> List[str]:
+        """
+        EXPLAIN QUERY PLANを取得（プロファイル対象外のカーソルで実行）
+
+        Args:
+            conn: 接続
+            sql: SQL
+            params: パラメータ
+
+        Returns:
+            クエリプランのdetail列リスト
+        """
+        if not sql.lstrip().upper().startswith(self.EXPLAINABLE):
+            return []
+
+        try:
+            cursor = sqlite3.Cursor(conn)
+            try:
+                rows = cursor.execute(
+                    f"EXPLAIN QUERY PLAN {sql}", params or ()
+                ).fetchall()
+            finally:
+                cursor.close()
+            return [row[-1] for row in rows]
+        except sqlite3.Error as e:
+            self.logger.debug("クエリプラン取得失敗", context={"sql": sql[:100], "error": str(e)})
+            return []
+
+    def _log_slow_query(
+        self,
+        sql: str,
+        elapsed_ms: float,
+        rows: int,
+        plan: List[str]
+    ) -> None:
+        """
+        スロークエリを出力
+
+        Args:
+            sql: SQL
+            elapsed_ms: 実行時間（ミリ秒）
+            rows: 返却行数
+            plan: クエリプラン
+        """
+        entry = {
+            "timestamp": datetime.now().isoformat(),
+            "elapsed_ms": round(elapsed_ms, 3),
+            "rows": rows,
+            "sql": sql,
+            "plan": plan
+        }
+
+        self.logger.warning("スロークエリ検出", context=entry)
+
+        if self.slow_query_log:
+            with self._lock:
+                with open(self.slow_query_log, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def report(
+        self,
+        top: Optional[int] = None,
+        sort_by: str = "total_ms"
+    ) -> List[Dict[str, Any]]:
+        """
+        形状ごとの統計を取得
+
+        Args:
+            top: 上位件数（Noneの場合は全件）
+            sort_by: ソートキー（total_ms, max_ms, count, rows）
+
+        Returns:
+            統計リスト（histogramは{"<=1ms": 件数, ..., ">5000ms": 件数}）
+        """
+        labels = [f"<={bound}ms" for bound in self.HISTOGRAM_BOUNDS_MS]
+        labels.append(f">{self.HISTOGRAM_BOUNDS_MS[-1]}ms")
+
+        with self._lock:
+            result = []
+            for stats in self._stats.values():
+                entry = dict(stats)
+                entry["total_ms"] = round(stats["total_ms"], 3)
+                entry["max_ms"] = round(stats["max_ms"], 3)
+                entry["avg_ms"] = round(stats["total_ms"] / stats["count"], 3)
+                entry["histogram"] = dict(zip(labels, stats["histogram"]))
+                entry["plan"] = list(stats["plan"])
+                result.append(entry)
+
+        result.sort(key=lambda entry: entry[sort_by], reverse=True)
+        return result[:top] if top else result
+
+    def reset(self) -> None:
+        """
+        統計をクリア
+        """
+        with self._lock:
+            self._stats.clear()
+
+
+class _ProfilingCursor(sqlite3.Cursor):
+    """実行時間と返却行数をQueryProfilerに記録するカーソル
+
+    SELECTはexecuteから最後のfetchまでを1回の実行として計測する
+    """
+
+    _pending: Optional[List[Any]] = None  # [sql, params, 経過秒, 行数]
+
+    def execute(self, sql: str, parameters: Any = ()) -> "_ProfilingCursor":
+        self._finish()
+        start = time.perf_counter()
+        super().execute(sql, parameters)
+        elapsed = time.perf_counter() - start
+
+        if self.description is None:
+            self.connection.profiler.record(
+                self.connection, sql, parameters, elapsed, max(self.rowcount, 0)
+            )
+        else:
+            self._pending = [sql, parameters, elapsed, 0]
+        return self
+
+    def executemany(
+        self,
+        sql: str,
+        seq_of_parameters: Iterable[Any]
+    ) -> "_ProfilingCursor":
+        self._finish()
+        params_list = list(seq_of_parameters)
+        start = time.perf_counter()
+        super().executemany(sql, params_list)
+        elapsed = time.perf_counter() - start
+        self.connection.profiler.record(
+            self.connection,
+            sql,
+            params_list[0] if params_list else (),
+            elapsed,
+            max(self.rowcount, 0)
+        )
+        return self
+
+    def fetchone(self) -> Any:
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._add(start, 0 if row is None else 1, row is None)
+        return row
+
+    def fetchmany(self, size: Optional[int] = None) -> List[Any]:
+        size = self.arraysize if size is None else size
+        start = time.perf_counter()
+        rows = super().fetchmany(size)
+        self._add(start, len(rows), len(rows) < size)
+        return rows
+
+    def fetchall(self) -> List[Any]:
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._add(start, len(rows), True)
+        return rows
+
+    def __next__(self) -> Any:
+        start = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._add(start, 0, True)
+            raise
+        self._add(start, 1, False)
+        return row
+
+    def close(self) -> None:
+        self._finish()
+        super().close()
+
+    def __del__(self) -> None:
+        self._finish()
+
+    def _add(self, start: float, rows: int, done: bool) -> None:
+        if self._pending is None:
+            return
+        self._pending[2] += time.perf_counter() - start
+        self._pending[3] += rows
+        if done:
+            self._finish()
+
+    def _finish(self) -> None:
+        if self._pending is None:
+            return
+        sql, params, elapsed, rows = self._pending
+        self._pending = None
+        self.connection.profiler.record(self.connection, sql, params, elapsed, rows)
+
+
+class _ProfilingConnection(sqlite3.Connection):
+    """全ステートメントを_ProfilingCursor経由で実行する接続"""
+
+    profiler: QueryProfiler
+
+    def cursor(self, factory: Any = None) -> sqlite3.Cursor:
+        return super().cursor(factory or _ProfilingCursor)
+
+    def execute(self, sql: str, parameters: Any = ()) -> sqlite3.Cursor:
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql: str, seq_of_parameters: Iterable[Any]) -> sqlite3.Cursor:
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
 class SQLiteStorage:
     """SQLiteストレージクラス
 
     ローカルデータベース保存、CRUD操作、データ変換、クエリ実行機能を提供
     """
 
+    # PRAGMAプロファイル（sqlite.profileで選択、sqlite.pragmasで個別上書き）
+    PRAGMA_PROFILES: Dict[str, Dict[str, Any]] = {
+        # 電源断でもコミット済みデータを失わない（デフォルト。WAL以外はSQLiteの既定値）
+        "durable": {
+            "journal_mode": "WAL",
+            "synchronous": "FULL",
+            "cache_size": -2000,  # 2MB
+            "mmap_size": 0,
+            "temp_store": "DEFAULT",
+            "page_size": 4096,
+        },
+        # 対話的な読み書き向け（WAL + NORMALは電源断時に直近のコミットのみ失う可能性あり。要指定）
+        "balanced": {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "cache_size": -64000,  # 64MB
+            "mmap_size": 268435456,  # 256MB
+            "temp_store": "MEMORY",
+            "page_size": 4096,
+        },
+        # 夜間インポート等の一括投入向け（再実行できる処理でのみ使用）
+        "bulk_load": {
+            "journal_mode": "WAL",
+            "synchronous": "OFF",
+            "cache_size": -512000,  # 512MB
+            "mmap_size": 1073741824,  # 1GB
+            "temp_store": "MEMORY",
+            "page_size": 4096,
+        },
+    }
+
+    # query()で書き込みロックの取得・再試行を適用する文（DML）と、文ごとにコミットする文（DDL）
+    DML_PATTERN = re.compile(r"\s*(?:INSERT|UPDATE|DELETE|REPLACE)\b", re.IGNORECASE)
+    DDL_PATTERN = re.compile(r"\s*(?:CREATE|DROP|ALTER)\b", re.IGNORECASE)
+
+    # 接続単位で切り替え可能なPRAGMA（journal_mode/page_sizeはDB単位のため除外）
+    CONNECTION_PRAGMAS = ("synchronous", "cache_size", "mmap_size", "temp_store")
+
+    # select()/query()の結果形式
+    ROW_FORMATS = ("dict", "tuple", "record", "columnar")
+
+    # FTS5で使用できるトークナイザー（trigramは日本語など分かち書きしない言語向け）
+    FTS_TOKENIZERS = ("unicode61", "porter", "ascii", "trigram")
+
+    # 集計テーブル（トリガーで差分更新）の定義を保存するメタデータテーブル
+    SUMMARY_META_TABLE = "_summary_tables"
+
+    # 時間パーティションの単位と子テーブル名のサフィックス形式
+    PARTITION_INTERVALS = {"month": "%Y%m", "day": "%Y%m%d"}
+
+    # パーティションテーブルの定義を保存するメタデータテーブル
+    PARTITION_META_TABLE = "_partitioned_tables"
+    # 1つの複合SELECTのUNION ALL項数の上限（SQLiteの既定値 SQLITE_MAX_COMPOUND_SELECT）
+    MAX_COMPOUND_SELECT = 500
+
     def __init__(
         self,
         db_path: str = "data.db",
@@ -57,32 +464,307 @@ class SQLiteStorage:
         self.auto_commit = self.sqlite_config.get("auto_commit", True)
         self.check_same_thread = self.sqlite_config.get("check_same_thread", False)
         self.timeout = self.sqlite_config.get("timeout", 30)
+        # PRAGMA設定（プロファイル → journal_mode → pragmasの順に上書き）
+        self.profile = self.sqlite_config.get("profile", "durable")
+        if self.profile not in self.PRAGMA_PROFILES:
+            raise ValueError(f"無効なPRAGMAプロファイル: {self.profile}")
+        self.pragmas = dict(self.PRAGMA_PROFILES[self.profile])
+        if "journal_mode" in self.sqlite_config:
+            self.pragmas["journal_mode"] = self.sqlite_config["journal_mode"]
+        self.pragmas.update(self.sqlite_config.get("pragmas", {}))
+        self.insert_batch_size = self.sqlite_config.get("insert_batch_size", 1000)
+        self.fetch_size = self.sqlite_config.get("fetch_size", 1000)
+        self.dataframe_chunk_rows = self.sqlite_config.get(
+            "dataframe_chunk_rows", 50000
+        )
+
+        # 取得結果の形式（dict / tuple / record / columnar）
+        self.row_format = self.sqlite_config.get("row_format", "dict")
+        if self.row_format not in self.ROW_FORMATS:
+            raise ValueError(f"無効なrow_format: {self.row_format}")
+        self._record_classes: Dict[Tuple[str, ...], type] = {}
+
+        # 論理削除済みの行（deleted_atが設定された行）を取得系から除外する
+        self.live_rows_only = self.sqlite_config.get("live_rows_only", False)
+        self._soft_delete_tables: Dict[str, bool] = {}
+
+        # カラム名キャッシュ（生成カラムを含む。JSONパス指定の解決に使用）
+        self._table_columns: Dict[str, List[str]] = {}
+
+        # 全文検索インデックスの定義キャッシュ {元テーブル名: (検索カラム, トークナイザー)}
+        self._fts_tables: Dict[str, Tuple[List[str], str]] = {}
+
+        # パーティションテーブルの定義キャッシュ（通常テーブルはNone）
+        self._partition_specs: Dict[str, Optional[Dict[str, Any]]] = {}
+
+        self.cached_statements = self.sqlite_config.get("cached_statements", 128)
+
+        # 生成SQLのLRUキャッシュ
+        self.sql_cache_size = self.sqlite_config.get("sql_cache_size", 256)
+        self._sql_cache: "OrderedDict[Hashable, str]" = OrderedDict()
+        self._sql_cache_lock = threading.Lock()
+        self._sql_cache_hits = 0
+        self._sql_cache_misses = 0
+
+        # 書き込みロック取得のリトライ（BEGIN IMMEDIATEのみ1回あたりbusy_timeout_msで打ち切り、
+        # ジッター付き指数バックオフで再試行。全体の上限はtimeout。その他の文はtimeoutまで待機）
+        retry_config = self.sqlite_config.get("write_retry", {})
+        self.retry_max_attempts = retry_config.get("max_attempts", 20)
+        self.retry_busy_timeout_ms = retry_config.get("busy_timeout_ms", 100)
+        self.retry_base_delay = retry_config.get("base_delay", 0.01)
+        self.retry_max_delay = retry_config.get("max_delay", 0.5)
+        self._lock_metrics_lock = threading.Lock()
+        self._lock_waits_ms: "deque[float]" = deque(maxlen=1024)
+        self._lock_metrics = {
+            "transactions": 0,
+            "busy": 0,
+            "retries": 0,
+            "failures": 0,
+            "wait_ms_total": 0.0,
+            "wait_ms_max": 0.0,
+        }
+
+        # ステートメント監視コールバック（IndexAdvisor等）
+        self._statement_observers: List[Callable[[str, Any], None]] = []
+
+        # クエリプロファイラー（オプトイン）
+        profiling_config = self.sqlite_config.get("profiling", {})
+        self.profiler: Optional[QueryProfiler] = None
+        if profiling_config.get("enabled", False):
+            self.profiler = QueryProfiler(
+                self.logger,
+                slow_query_ms=profiling_config.get("slow_query_ms", 100),
+                explain=profiling_config.get("explain", True),
+                slow_query_log=profiling_config.get("slow_query_log"),
+                max_shapes=profiling_config.get("max_shapes", 1000)
+            )
+
+        # run_parallel()用の読み取り専用接続とスレッドプール（初回呼び出し時に作成）
+        self.parallel_workers = self.sqlite_config.get(
+            "parallel_workers", min(8, os.cpu_count() or 1)
+        )
+        self._read_only_pool: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._read_only_conns: List[sqlite3.Connection] = []
+        self._parallel_executor: Optional[ThreadPoolExecutor] = None
+        self._parallel_lock = threading.Lock()
+
+        # メモリモード（:memory:で処理し、db_pathへ定期・checkpoint()・close()時にバックアップAPIで保存）
+        memory_config = self.sqlite_config.get("memory_mode", {})
+        self.persist_path: Optional[Path] = None
+        if memory_config.get("enabled", False) and self.db_path != ":memory:":
+            self.persist_path = Path(self.db_path)
+        self.persist_interval = memory_config.get("persist_interval", 60)
+        self._persist_stop = threading.Event()
+        self._persist_thread: Optional[threading.Thread] = None
+
+        # 接続プール（スレッドごとに1接続、:memory:は全スレッドで共有）
+        self._in_memory = self.db_path == ":memory:" or self.persist_path is not None
+        self._local = threading.local()
+        self._pool: Dict[int, Tuple[threading.Thread, sqlite3.Connection]] = {}
+        self._pool_lock = threading.Lock()
+        self._shared_conn: Optional[sqlite3.Connection] = None
+        # 共有接続のトランザクション・取得をスレッド間で直列化（同じスレッドからは再入可能）
+        self._shared_lock = threading.RLock()
+        self._closed = False
 
         # 接続初期化
-        self.conn: Optional[sqlite3.Connection] = None
         self._connect()
 
+        if self.persist_path is not None and self.persist_interval:
+            self._persist_thread = threading.Thread(
+                target=self._persist_loop, name="sqlite-persist", daemon=True
+            )
+            self._persist_thread.start()
+
         self.logger.info(
             "SQLiteStorage初期化完了",
-            context={"db_path": self.db_path}
+            context={
+                "db_path": self.db_path, "memory_mode": self.persist_path is not None
+            }
+        )
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """
+        現在のスレッド用の接続を取得（未接続の場合は作成）
+        """
+        if self._closed:
+            raise sqlite3.ProgrammingError("データベース接続はクローズ済みです")
+
+        if self._in_memory:
+            if self._shared_conn is None:
+                self._connect()
+            return self._shared_conn
+
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self._connect()
+            conn = self._local.conn
+        return conn
+
+    def _create_connection(self) -> sqlite3.Connection:
+        """
+        設定を適用した新しい接続を作成
+
+        Returns:
+            sqlite3接続
+        """
+        # 読み取り・COMMITはtimeoutまで待機（BEGIN IMMEDIATEのみ_begin_immediateで短く区切って再試行）
+        conn = sqlite3.connect(
+            ":memory:" if self._in_memory else self.db_path,
+            check_same_thread=self.check_same_thread,
+            timeout=self.timeout,
+            cached_statements=self.cached_statements,
+            factory=_ProfilingConnection if self.profiler else sqlite3.Connection
+        )
+        if self.profiler:
+            conn.profiler = self.profiler
+        conn.row_factory = sqlite3.Row  # 辞書形式でアクセス可能
+
+        if self.auto_commit:
+            conn.isolation_level = None
+
+        self._apply_pragmas(conn, self.pragmas)
+
+        return conn
+
+    def _create_read_only_connection(self) -> sqlite3.Connection:
+        """
+        読み取り専用の接続を作成（run_parallel用。接続単位のPRAGMAのみ適用）
+
+        Returns:
+            sqlite3接続
+        """
+        conn = sqlite3.connect(
+            Path(self.db_path).resolve().as_uri() + "?mode=ro",
+            uri=True,
+            check_same_thread=False,
+            timeout=self.timeout,
+            cached_statements=self.cached_statements,
+            factory=_ProfilingConnection if self.profiler else sqlite3.Connection
+        )
+        if self.profiler:
+            conn.profiler = self.profiler
+        conn.row_factory = sqlite3.Row
+        self._apply_pragmas(
+            conn,
+            {
+                key: value
+                for key, value in self.pragmas.items()
+                if key in self.CONNECTION_PRAGMAS
+            }
+        )
+        return conn
+
+    def _apply_pragmas(self, conn: sqlite3.Connection, pragmas: Dict[str, Any]) -> None:
+        """
+        接続にPRAGMAを適用
+
+        page_sizeは新規DB（またはVACUUM時）のみ有効なため最初に適用する。
+        WALモードでは読み取りと書き込み（1つ）を並行実行できる。
+
+        Args:
+            conn: sqlite3接続
+            pragmas: {PRAGMA名: 値}（値がNone・空文字のものはスキップ）
+        """
+        ordered = sorted(pragmas.items(), key=lambda item: item[0] != "page_size")
+
+        for name, value in ordered:
+            if value is None or value == "":
+                continue
+            if name == "journal_mode" and self._in_memory:
+                continue
+
+            result = conn.execute(f"PRAGMA {name}={value}").fetchone()
+
+            if name == "journal_mode" and str(result[0]).upper() != str(value).upper():
+                self.logger.warning(
+                    "ジャーナルモードを変更できませんでした",
+                    context={"requested": value, "actual": result[0]}
+                )
+
+        self.logger.debug(
+            "PRAGMA適用", context={"profile": self.profile, "pragmas": pragmas}
         )
 
+    @contextmanager
+    def pragma_profile(
+        self,
+        profile: str = "bulk_load"
+    ) -> Iterator[sqlite3.Connection]:
+        """
+        現在のスレッドの接続を一時的に別のPRAGMAプロファイルに切り替え
+
+        synchronous/cache_size/mmap_size/temp_storeのみ切り替え、終了時に元の値へ戻す。
+
+        Args:
+            profile: プロファイル名（PRAGMA_PROFILESのキー）
+
+        Yields:
+            sqlite3接続
+
+        使用例:
+            with storage.pragma_profile("bulk_load"):
+                storage.insert_batched("sales", rows)
+        """
+        if profile not in self.PRAGMA_PROFILES:
+            raise ValueError(f"無効なPRAGMAプロファイル: {profile}")
+
+        conn = self.conn
+        target = {
+            name: value for name, value in self.PRAGMA_PROFILES[profile].items()
+            if name in self.CONNECTION_PRAGMAS
+        }
+        previous = {
+            name: conn.execute(f"PRAGMA {name}").fetchone()[0] for name in target
+        }
+
+        self._apply_pragmas(conn, target)
+        self.logger.info("PRAGMAプロファイル切替", context={"profile": profile})
+
+        try:
+            yield conn
+        finally:
+            self._apply_pragmas(conn, previous)
+            self.logger.info("PRAGMAプロファイル復元", context={"profile": self.profile})
+
     def _connect(self) -> None:
         """
-        データベースに接続
+        現在のスレッド用にデータベースへ接続（既存接続は張り直す）
         """
         try:
-            self.conn = sqlite3.connect(
-                self.db_path,
-                check_same_thread=self.check_same_thread,
-                timeout=self.timeout
-            )
-            self.conn.row_factory = sqlite3.Row  # 辞書形式でアクセス可能
+            conn = self._create_connection()
+            self._closed = False
+
+            if self._in_memory:
+                if self._shared_conn is not None:
+                    self._shared_conn.close()
+                if self.persist_path is not None and self.persist_path.exists():
+                    self._load_persisted(conn)
+                self._shared_conn = conn
+            else:
+                current = threading.current_thread()
+                with self._pool_lock:
+                    previous = self._pool.pop(current.ident, None)
+                    if previous:
+                        self._close_quietly(previous[1])
+
+                    # 終了済みスレッドの接続を回収
+                    for ident, (thread, pooled) in list(self._pool.items()):
+                        if not thread.is_alive():
+                            self._close_quietly(pooled)
+                            del self._pool[ident]
 
-            if self.auto_commit:
-                self.conn.isolation_level = None
+                    self._pool[current.ident] = (current, conn)
+                self._local.conn = conn
 
-            self.logger.debug(f"データベース接続成功: {self.db_path}")
+            self.logger.debug(
+                f"データベース接続成功: {self.db_path}",
+                context={
+                    "thread": threading.current_thread().name,
+                    "pool_size": len(self._pool)
+                }
+            )
 
         except Exception as e:
             self.logger.error(
@@ -92,11 +774,43 @@ class SQLiteStorage:
             )
             raise
 
+    def _load_persisted(self, conn: sqlite3.Connection) -> None:
+        """
+        メモリモードでdb_pathの内容をメモリ上のDBへ読み込む
+
+        Args:
+            conn: 読み込み先の:memory:接続
+        """
+        start = time.perf_counter()
+        source = sqlite3.connect(str(self.persist_path), timeout=self.timeout)
+        try:
+            source.backup(conn)
+        finally:
+            source.close()
+
+        self.logger.info(
+            f"永続化ファイル読み込み: {self.persist_path}",
+            context={"elapsed_sec": round(time.perf_counter() - start, 3)}
+        )
+
+    def _close_quietly(self, conn: sqlite3.Connection) -> None:
+        """
+        接続をクローズ（別スレッド生成の接続で失敗しても継続）
+
+        Args:
+            conn: クローズする接続
+        """
+        try:
+            conn.close()
+        except sqlite3.ProgrammingError as e:
+            self.logger.warning("接続クローズ失敗", context={"error": str(e)})
+
     def create_table(
         self,
         table_name: str,
         schema: Dict[str, str],
-        indexes: Optional[List[str]] = None
+        indexes: Optional[List[Union[str, List[str], Dict[str, Any]]]] = None,
+        json_columns: Optional[Dict[str, List[str]]] = None
     ) -> None:
         """
         テーブルを作成
@@ -104,7 +818,17 @@ class SQLiteStorage:
         Args:
             table_name: テーブル名
             schema: カラム定義 {"column_name": "TYPE CONSTRAINTS"}
-            indexes: インデックスを作成するカラムリスト
+            indexes: インデックス定義リスト。各要素は以下のいずれか
+                - "col": 単一カラムインデックス
+                - ["col1", "col2"]: 複合インデックス
+                - {"columns": [...], "unique": bool, "where": "...",
+                   "include": [...], "name": "..."}:
+                  UNIQUE・部分（WHERE）・カバリング（include）インデックス
+                JSONパス（"response_data.status"）はjson_columnsの生成カラムに置き換える
+            json_columns: JSONカラムから抽出する仮想生成カラム {"JSONカラム": ["パス", ...]}。
+                {"response_data": ["status"]}の場合、
+                response_data_status = json_extract(response_data, '$.status') を追加する
+                （既存テーブルにはALTER TABLEで追加）
         """
         try:
             # スキーマSQL生成
@@ -120,16 +844,37 @@ class SQLiteStorage:
                 context={"sql": create_sql}
             )
 
-            # テーブル作成
-            self.conn.execute(create_sql)
+            # テーブル作成（JSONパスの仮想生成カラムの追加と合わせて1トランザクション）
+            with self._write_transaction() as conn:
+                conn.execute(create_sql)
+
+                if json_columns:
+                    existing = {
+                        col["name"]
+                        for col in conn.execute(f"PRAGMA table_xinfo({table_name})")
+                    }
+                    for json_column, paths in json_columns.items():
+                        for path in paths:
+                            generated = self._json_generated_name(json_column, path)
+                            if generated not in existing:
+                                conn.execute(
+                                    f"ALTER TABLE {table_name} ADD COLUMN {generated} "
+                                    f"GENERATED ALWAYS AS "
+                                    f"(json_extract({json_column}, '$.{path}')) VIRTUAL"
+                                )
+            self._soft_delete_tables.pop(table_name, None)
+            self._table_columns.pop(table_name, None)
 
             # インデックス作成
-            if indexes:
-                for index_col in indexes:
-                    index_name = f"idx_{table_name}_{index_col}"
-                    index_sql = f"CREATE INDEX IF NOT EXISTS {index_name} ON {table_name} ({index_col})"
-                    self.conn.execute(index_sql)
-                    self.logger.debug(f"インデックス作成: {index_name}")
+            for index_spec in indexes or []:
+                if isinstance(index_spec, dict):
+                    self.create_index(table_name, **index_spec)
+                else:
+                    self.create_index(table_name, index_spec)
+
+            # 生存行モードでは論理削除対応テーブルに生存行のみの部分インデックスを作成
+            if self.live_rows_only and "deleted_at" in schema:
+                self.create_live_index(table_name)
 
             self.logger.info(
                 f"テーブル作成成功",
@@ -144,6 +889,77 @@ class SQLiteStorage:
             )
             raise
 
+    def create_index(
+        self,
+        table_name: str,
+        columns: Union[str, List[str]],
+        unique: bool = False,
+        where: Optional[str] = None,
+        include: Optional[List[str]] = None,
+        name: Optional[str] = None
+    ) -> str:
+        """
+        インデックスを作成
+
+        SQLiteにはINCLUDE句がないため、カバリングインデックスはincludeのカラムを
+        キーの末尾に追加して作成する（検索はキー先頭のcolumnsで行われる）。
+
+        Args:
+            table_name: テーブル名
+            columns: インデックスカラム（複合の場合はリスト。"col DESC"も可）
+            unique: UNIQUEインデックスにする
+            where: 部分インデックスの条件（例: "deleted_at IS NULL"）
+            include: カバリング用に末尾へ追加するカラム（キーに含まれるため、uniqueとは併用できない）
+            name: インデックス名（Noneの場合はidx_{table}_{col1}_{col2}...）
+
+        Returns:
+            インデックス名
+        """
+        if unique and include:
+            # includeもキーの一部になり、columns+includeの組み合わせでしか一意性を検査しないため
+            raise ValueError("unique=Trueとincludeは併用できません（一意性はcolumnsのみに設定してください）")
+        if isinstance(columns, str):
+            columns = [columns]
+        # JSONパス（"response_data.status DESC"）は生成カラムまたはjson_extract式に置き換え
+        columns = [
+            " ".join(
+                [self._json_path_sql(table_name, col.split()[0])] + col.split()[1:]
+            )
+            for col in columns
+        ]
+        key_columns = list(columns) + [
+            col for col in include or [] if col not in columns
+        ]
+
+        if name is None:
+            suffix = "_".join(
+                re.sub(r"\W+", "_", col.split()[0]).strip("_") for col in key_columns
+            )
+            name = f"{'uidx' if unique else 'idx'}_{table_name}_{suffix}"
+            if where:
+                name += "_partial"
+
+        index_sql = (
+            f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {name} "
+            f"ON {table_name} ({', '.join(key_columns)})"
+        )
+        if where:
+            index_sql += f" WHERE {where}"
+
+        try:
+            with self._write_transaction() as conn:
+                conn.execute(index_sql)
+            self.logger.debug(f"インデックス作成: {name}", context={"sql": index_sql})
+            return name
+
+        except Exception as e:
+            self.logger.error(
+                f"インデックス作成エラー",
+                context={"table_name": table_name, "index": name, "error": str(e)},
+                exc_info=True
+            )
+            raise
+
     def insert(
         self,
         table_name: str,
@@ -178,17 +994,21 @@ class SQLiteStorage:
                     if "updated_at" not in row:
                         row["updated_at"] = now
 
-            # INSERT SQL生成
-            columns = list(data[0].keys())
-            placeholders = ", ".join(["?" for _ in columns])
-            columns_sql = ", ".join(columns)
-            insert_sql = f"INSERT INTO {table_name} ({columns_sql}) VALUES ({placeholders})"
+            # パーティションテーブルはタイムスタンプで子テーブルに振り分け
+            spec = self._partition_spec(table_name)
+            if spec is not None:
+                inserted_count = self._insert_partitioned(table_name, data)
+            else:
+                # INSERT SQL生成
+                columns = list(data[0].keys())
+                insert_sql = self._build_insert_sql(table_name, columns)
 
-            # バルク挿入
-            values = [tuple(row.get(col) for col in columns) for row in data]
-            cursor = self.conn.executemany(insert_sql, values)
+                # バルク挿入
+                values = [tuple(row.get(col) for col in columns) for row in data]
+                with self._write_statement() as conn:
+                    cursor = conn.executemany(insert_sql, values)
 
-            inserted_count = cursor.rowcount
+                inserted_count = cursor.rowcount
 
             self.logger.info(
                 f"データ挿入成功",
@@ -205,44 +1025,225 @@ class SQLiteStorage:
             )
             raise
 
-    def update(
+    def insert_batched(
         self,
         table_name: str,
-        data: Dict[str, Any],
-        condition: Dict[str, Any],
+        data: Iterable[Dict[str, Any]],
+        batch_size: Optional[int] = None,
         auto_timestamp: bool = True
-    ) -> int:
+    ) -> Dict[str, Any]:
         """
-        データを更新
+        データをチャンク単位のトランザクションで一括挿入
+
+        auto_commit=Trueでもチャンクごとに明示的なBEGIN/COMMITで囲むため、
+        1行ごとのコミット（fsync）が発生しない。
 
         Args:
             table_name: テーブル名
-            data: 更新データ
-            condition: 更新条件
-            auto_timestamp: updated_atを自動更新
+            data: 挿入データ（辞書のイテラブル。ジェネレータ可）
+            batch_size: 1トランザクションあたりの行数（Noneの場合は設定値）
+            auto_timestamp: created_at/updated_atを自動設定
 
         Returns:
-            更新された行数
+            挿入結果 {"count", "batches", "elapsed_sec", "rows_per_sec"}
         """
+        batch_size = batch_size or self.insert_batch_size
+        conn = self.conn
+        start = time.perf_counter()
+        inserted_count = 0
+        batches = 0
+        columns: Optional[List[str]] = None
+        insert_sql = ""
+
         try:
-            # タイムスタンプ更新
-            if auto_timestamp and "updated_at" not in data:
-                data["updated_at"] = datetime.now().isoformat()
+            spec = self._partition_spec(table_name)
+            rows = iter(data)
+            while True:
+                chunk = list(islice(rows, batch_size))
+                if not chunk:
+                    break
 
-            # UPDATE SQL生成
-            set_clause = ", ".join([f"{col} = ?" for col in data.keys()])
-            where_clause = " AND ".join([f"{col} = ?" for col in condition.keys()])
-            update_sql = f"UPDATE {table_name} SET {set_clause} WHERE {where_clause}"
+                # タイムスタンプ追加
+                if auto_timestamp:
+                    now = datetime.now().isoformat()
+                    for row in chunk:
+                        row.setdefault("created_at", now)
+                        row.setdefault("updated_at", now)
 
-            # パラメータ結合
-            params = list(data.values()) + list(condition.values())
+                # パーティションテーブルはチャンクごとに子テーブルへ振り分け
+                if spec is not None:
+                    inserted_count += self._insert_partitioned(table_name, chunk)
+                    batches += 1
+                    continue
+
+                # INSERT SQL生成（先頭行のカラムで固定）
+                if columns is None:
+                    columns = list(chunk[0].keys())
+                    insert_sql = self._build_insert_sql(table_name, columns)
+
+                values = [tuple(row.get(col) for col in columns) for row in chunk]
+                with self._write_transaction(conn):
+                    conn.executemany(insert_sql, values)
 
-            cursor = self.conn.execute(update_sql, params)
-            updated_count = cursor.rowcount
+                inserted_count += len(values)
+                batches += 1
+
+            elapsed = time.perf_counter() - start
+            result = {
+                "count": inserted_count,
+                "batches": batches,
+                "elapsed_sec": round(elapsed, 3),
+                "rows_per_sec": (
+                    round(inserted_count / elapsed, 1) if elapsed > 0 else 0.0
+                )
+            }
 
             self.logger.info(
-                f"データ更新成功",
-                context={"table_name": table_name, "count": updated_count}
+                f"バッチ挿入成功",
+                context={"table_name": table_name, **result}
+            )
+
+            return result
+
+        except Exception as e:
+            self.logger.error(
+                f"バッチ挿入エラー",
+                context={
+                    "table_name": table_name,
+                    "inserted": inserted_count,
+                    "error": str(e)
+                },
+                exc_info=True
+            )
+            raise
+
+    def upsert(
+        self,
+        table_name: str,
+        rows: Union[Dict[str, Any], List[Dict[str, Any]]],
+        conflict_columns: List[str],
+        update_columns: Optional[List[str]] = None,
+        auto_timestamp: bool = True
+    ) -> int:
+        """
+        データを一括UPSERT（INSERT ... ON CONFLICT DO UPDATE）
+
+        1つのトランザクション内でexecutemanyするため、既存行の確認（select）と
+        insert/updateの振り分けが不要になる。conflict_columnsには
+        UNIQUE制約または主キーが必要。
+
+        Args:
+            table_name: テーブル名
+            rows: UPSERTデータ（辞書または辞書のリスト）
+            conflict_columns: 重複判定カラム（UNIQUE制約/主キー）。
+                パーティションテーブルでは一意性は子テーブル内でのみ保証される
+            update_columns: 重複時に更新するカラム
+                （Noneの場合は重複判定カラムとcreated_at以外の全カラム、空リストの場合はDO NOTHING）
+            auto_timestamp: created_at/updated_atを自動設定
+
+        Returns:
+            挿入・更新された行数
+        """
+        try:
+            # 単一データを配列化
+            if isinstance(rows, dict):
+                rows = [rows]
+
+            if not rows:
+                return 0
+
+            # タイムスタンプ追加
+            if auto_timestamp:
+                now = datetime.now().isoformat()
+                for row in rows:
+                    row.setdefault("created_at", now)
+                    row.setdefault("updated_at", now)
+
+            columns = list(rows[0].keys())
+            if update_columns is None:
+                update_columns = [
+                    col for col in columns
+                    if col not in conflict_columns and col != "created_at"
+                ]
+
+            upserted_count = 0
+            with self._write_transaction() as conn:
+                # パーティションテーブルはpartition_columnの値で子テーブルに振り分け
+                spec = self._partition_spec(table_name)
+                if spec is not None:
+                    targets = self._group_by_partition(table_name, rows, spec)
+                else:
+                    targets = {table_name: rows}
+
+                for target, group in targets.items():
+                    # UPSERT SQL生成
+                    upsert_sql = self._build_upsert_sql(
+                        target, columns, conflict_columns, update_columns
+                    )
+                    cursor = conn.executemany(
+                        upsert_sql,
+                        [tuple(row.get(col) for col in columns) for row in group]
+                    )
+                    upserted_count += cursor.rowcount
+
+            self.logger.info(
+                f"データUPSERT成功",
+                context={
+                    "table_name": table_name, "rows": len(rows), "count": upserted_count
+                }
+            )
+
+            return upserted_count
+
+        except Exception as e:
+            self.logger.error(
+                f"データUPSERTエラー",
+                context={"table_name": table_name, "error": str(e)},
+                exc_info=True
+            )
+            raise
+
+    def update(
+        self,
+        table_name: str,
+        data: Dict[str, Any],
+        condition: Dict[str, Any],
+        auto_timestamp: bool = True
+    ) -> int:
+        """
+        データを更新
+
+        Args:
+            table_name: テーブル名
+            data: 更新データ
+            condition: 更新条件
+            auto_timestamp: updated_atを自動更新
+
+        Returns:
+            更新された行数
+        """
+        try:
+            # タイムスタンプ更新
+            if auto_timestamp and "updated_at" not in data:
+                data["updated_at"] = datetime.now().isoformat()
+
+            # パラメータ結合
+            params = list(data.values()) + list(condition.values())
+
+            # パーティションテーブルは対象の子テーブルごとに実行
+            updated_count = 0
+            with self._write_statement() as conn:
+                for target in self._write_targets(table_name, condition, data):
+                    # UPDATE SQL生成
+                    update_sql = self._build_update_sql(
+                        target, list(data.keys()), list(condition.keys())
+                    )
+                    self._notify_observers(update_sql, params)
+                    updated_count += conn.execute(update_sql, params).rowcount
+
+            self.logger.info(
+                f"データ更新成功",
+                context={"table_name": table_name, "count": updated_count}
             )
 
             return updated_count
@@ -278,12 +1279,16 @@ class SQLiteStorage:
                 data = {"deleted_at": datetime.now().isoformat()}
                 return self.update(table_name, data, condition, auto_timestamp=False)
             else:
-                # 物理削除
-                where_clause = " AND ".join([f"{col} = ?" for col in condition.keys()])
-                delete_sql = f"DELETE FROM {table_name} WHERE {where_clause}"
-
-                cursor = self.conn.execute(delete_sql, list(condition.values()))
-                deleted_count = cursor.rowcount
+                # 物理削除（パーティションテーブルは対象の子テーブルごとに実行）
+                params = list(condition.values())
+                deleted_count = 0
+                with self._write_statement() as conn:
+                    for target in self._write_targets(table_name, condition):
+                        delete_sql = self._build_delete_sql(
+                            target, list(condition.keys())
+                        )
+                        self._notify_observers(delete_sql, params)
+                        deleted_count += conn.execute(delete_sql, params).rowcount
 
                 self.logger.info(
                     f"データ削除成功",
@@ -300,300 +1305,4827 @@ class SQLiteStorage:
             )
             raise
 
-    def select(
+    def create_live_index(
         self,
         table_name: str,
-        columns: Optional[List[str]] = None,
-        condition: Optional[Dict[str, Any]] = None,
-        order_by: Optional[str] = None,
-        limit: Optional[int] = None,
-        offset: Optional[int] = None
-    ) -> List[Dict[str, Any]]:
+        columns: Optional[List[str]] = None
+    ) -> str:
         """
-        データを取得
+        生存行（deleted_at IS NULL）のみを対象とする部分インデックスを作成
+
+        columns未指定の場合はdeleted_at自体の部分インデックスとなり、
+        「WHERE deleted_at IS NULL」の走査が生存行の件数分で済む。
 
         Args:
             table_name: テーブル名
-            columns: 取得カラムリスト（Noneの場合は全カラム）
-            condition: 検索条件
-            order_by: ソート順（例: "created_at DESC"）
-            limit: 取得件数制限
-            offset: オフセット
+            columns: インデックスカラム（Noneの場合はdeleted_at）
 
         Returns:
-            取得データリスト
+            インデックス名
         """
-        try:
-            # SELECT SQL生成
-            columns_sql = ", ".join(columns) if columns else "*"
-            select_sql = f"SELECT {columns_sql} FROM {table_name}"
-            params = []
+        columns = columns or ["deleted_at"]
+        suffix = "_".join(col.split()[0] for col in columns)
+        if columns == ["deleted_at"]:
+            name = f"idx_{table_name}_live"
+        else:
+            name = f"idx_{table_name}_{suffix}_live"
+        return self.create_index(
+            table_name, columns, where="deleted_at IS NULL", name=name
+        )
 
-            # WHERE句
-            if condition:
-                where_clause = " AND ".join([f"{col} = ?" for col in condition.keys()])
-                select_sql += f" WHERE {where_clause}"
-                params.extend(condition.values())
+    def purge_deleted(
+        self,
+        table_name: str,
+        older_than_days: int = 30,
+        batch_size: Optional[int] = None,
+        vacuum: bool = False
+    ) -> int:
+        """
+        論理削除からN日以上経過した行をバッチ単位で物理削除
 
-            # ORDER BY句
-            if order_by:
-                select_sql += f" ORDER BY {order_by}"
+        バッチごとに別トランザクションで削除するため、他の書き込みを長時間ブロックしない。
 
-            # LIMIT/OFFSET句
-            if limit:
-                select_sql += f" LIMIT {limit}"
-            if offset:
-                select_sql += f" OFFSET {offset}"
+        Args:
+            table_name: テーブル名
+            older_than_days: deleted_atからの経過日数
+            batch_size: 1トランザクションで削除する行数（Noneの場合は設定のinsert_batch_size）
+            vacuum: 削除後にVACUUMして空き領域を解放する
 
-            # クエリ実行
-            cursor = self.conn.execute(select_sql, params)
-            rows = cursor.fetchall()
+        Returns:
+            物理削除した行数
+        """
+        batch_size = batch_size or self.insert_batch_size
+        cutoff = (datetime.now() - timedelta(days=older_than_days)).isoformat()
+        purged_count = 0
+        batches = 0
 
-            # 辞書形式に変換
-            result = [dict(row) for row in rows]
+        try:
+            # パーティションテーブルは子テーブルごとに削除（他プロセスによる子テーブルの変更を先に反映）
+            self._check_partition_specs(self.conn)
+            for target in self._write_targets(table_name):
+                row_key = self._row_key(target)
+                purge_sql = (
+                    f"DELETE FROM {target} WHERE {row_key} IN ("
+                    f"SELECT {row_key.strip('()')} FROM {target} "
+                    f"WHERE deleted_at IS NOT NULL AND deleted_at < ? LIMIT ?)"
+                )
+                while True:
+                    with self._write_transaction() as conn:
+                        deleted = conn.execute(purge_sql, (cutoff, batch_size)).rowcount
+                    purged_count += deleted
+                    batches += 1
+                    if deleted < batch_size:
+                        break
 
-            self.logger.debug(
-                f"データ取得成功",
-                context={"table_name": table_name, "count": len(result)}
+            if vacuum and purged_count:
+                self.conn.execute("VACUUM")
+
+            self.logger.info(
+                f"論理削除データ削除成功",
+                context={
+                    "table_name": table_name,
+                    "cutoff": cutoff,
+                    "count": purged_count,
+                    "batches": batches,
+                    "vacuum": vacuum
+                }
             )
 
-            return result
+            return purged_count
 
         except Exception as e:
             self.logger.error(
-                f"データ取得エラー",
-                context={"table_name": table_name, "error": str(e)},
+                f"論理削除データ削除エラー",
+                context={
+                    "table_name": table_name, "purged": purged_count, "error": str(e)
+                },
                 exc_info=True
             )
             raise
 
-    def query(
-        self,
-        sql: str,
-        params: Optional[Union[tuple, List[Any]]] = None
-    ) -> List[Dict[str, Any]]:
+    def _row_key(self, table_name: str) -> str:
         """
-        SQLクエリを実行
+        行を一意に指定する式を取得（通常のテーブルはrowid、WITHOUT ROWIDテーブルは主キーの行値）
 
         Args:
-            sql: SQLクエリ
-            params: パラメータ（パラメータ化クエリ）
+            table_name: テーブル名
 
         Returns:
-            クエリ結果
+            "rowid"、または"(pk1, pk2, ...)"
         """
-        try:
-            params = params or []
-            cursor = self.conn.execute(sql, params)
-
-            # SELECT文の場合は結果を返す
-            if sql.strip().upper().startswith("SELECT"):
-                rows = cursor.fetchall()
-                result = [dict(row) for row in rows]
+        row = self.conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type='table' AND name=?", (table_name,)
+        ).fetchone()
+        if not row or not re.search(
+            r"\bWITHOUT\s+ROWID\b", row[0] or "", re.IGNORECASE
+        ):
+            return "rowid"
+        pk_columns = sorted(
+            (col for col in self.get_table_info(table_name) if col["pk"]),
+            key=lambda col: col["pk"]
+        )
+        return "(" + ", ".join(col["name"] for col in pk_columns) + ")"
 
-                self.logger.debug(
-                    f"クエリ実行成功",
-                    context={"sql": sql[:100], "count": len(result)}
-                )
+    def _use_live_filter(self, table_name: str, live_only: Optional[bool]) -> bool:
+        """
+        deleted_at IS NULLを付与するか判定（deleted_atカラムがあるテーブルのみ）
 
-                return result
-            else:
-                # INSERT/UPDATE/DELETE等の場合は影響行数を返す
-                self.logger.info(
-                    f"クエリ実行成功",
-                    context={"sql": sql[:100], "rowcount": cursor.rowcount}
-                )
+        Args:
+            table_name: テーブル名
+            live_only: 呼び出し時の指定（Noneの場合は設定のlive_rows_only）
 
-                return [{"rowcount": cursor.rowcount}]
+        Returns:
+            付与する場合True
+        """
+        if not (self.live_rows_only if live_only is None else live_only):
+            return False
 
-        except Exception as e:
-            self.logger.error(
-                f"クエリ実行エラー",
-                context={"sql": sql[:100], "error": str(e)},
-                exc_info=True
+        has_deleted_at = self._soft_delete_tables.get(table_name)
+        if has_deleted_at is None:
+            has_deleted_at = any(
+                col["name"] == "deleted_at" for col in self.get_table_info(table_name)
             )
-            raise
+            self._soft_delete_tables[table_name] = has_deleted_at
+        return has_deleted_at
 
-    def bulk_insert_from_df(
+    def bulk_update(
         self,
         table_name: str,
-        df: pd.DataFrame,
-        if_exists: str = "append"
+        items: List[Tuple[Dict[str, Any], Dict[str, Any]]],
+        auto_timestamp: bool = True
     ) -> int:
         """
-        DataFrameから一括挿入
+        複数の(更新データ, 更新条件)を1トランザクションで一括更新
+
+        カラム構成が同じ項目は1つのUPDATE文をexecutemanyで共有する。
+        ログは処理全体で1件のみ出力する。
 
         Args:
             table_name: テーブル名
-            df: pandas DataFrame
-            if_exists: 既存テーブルへの動作（'fail', 'replace', 'append'）
+            items: (更新データ, 更新条件)のリスト
+            auto_timestamp: updated_atを自動更新
 
         Returns:
-            挿入された行数
+            更新された行数
         """
         try:
-            # DataFrameをSQLiteに保存
-            df.to_sql(
-                table_name,
-                self.conn,
-                if_exists=if_exists,
-                index=False
-            )
+            now = datetime.now().isoformat()
+            statements: Dict[str, List[tuple]] = {}
+            # 対象の子テーブルを決める前に他プロセスによる子テーブルの変更を反映
+            self._check_partition_specs(self.conn)
 
-            inserted_count = len(df)
+            for data, condition in items:
+                if auto_timestamp and "updated_at" not in data:
+                    data = {**data, "updated_at": now}
+
+                for target in self._write_targets(table_name, condition, data):
+                    update_sql = self._build_update_sql(
+                        target, list(data.keys()), list(condition.keys())
+                    )
+                    statements.setdefault(update_sql, []).append(
+                        tuple(data.values()) + tuple(condition.values())
+                    )
+
+            updated_count = self._executemany_grouped(statements)
 
             self.logger.info(
-                f"DataFrame一括挿入成功",
-                context={"table_name": table_name, "count": inserted_count}
+                f"データ一括更新成功",
+                context={
+                    "table_name": table_name,
+                    "items": len(items),
+                    "statements": len(statements),
+                    "count": updated_count
+                }
             )
 
-            return inserted_count
+            return updated_count
 
         except Exception as e:
             self.logger.error(
-                f"DataFrame一括挿入エラー",
+                f"データ一括更新エラー",
                 context={"table_name": table_name, "error": str(e)},
                 exc_info=True
             )
             raise
 
-    def to_dataframe(
+    def bulk_delete(
         self,
         table_name: str,
-        condition: Optional[Dict[str, Any]] = None,
-        sql: Optional[str] = None
-    ) -> pd.DataFrame:
+        keys: List[Union[Any, Dict[str, Any]]],
+        key_column: str = "id",
+        soft_delete: bool = True
+    ) -> int:
         """
-        SQLite → DataFrame変換
+        複数行を1トランザクションで一括削除
 
         Args:
             table_name: テーブル名
-            condition: 検索条件
-            sql: カスタムSQLクエリ（指定時はtable_name/conditionは無視）
+            keys: 削除対象のキー値リスト、または削除条件（辞書）のリスト
+            key_column: キー値リストを渡した場合の対象カラム
+            soft_delete: 論理削除（deleted_atを設定）
 
         Returns:
-            pandas DataFrame
+            削除された行数
         """
         try:
-            if sql:
-                # カスタムSQL
-                df = pd.read_sql_query(sql, self.conn)
-            else:
-                # テーブル全体または条件付き取得
-                if condition:
-                    where_clause = " AND ".join([f"{col} = ?" for col in condition.keys()])
-                    sql = f"SELECT * FROM {table_name} WHERE {where_clause}"
-                    df = pd.read_sql_query(sql, self.conn, params=list(condition.values()))
-                else:
-                    df = pd.read_sql_query(f"SELECT * FROM {table_name}", self.conn)
+            now = datetime.now().isoformat()
+            statements: Dict[str, List[tuple]] = {}
+            # 対象の子テーブルを決める前に他プロセスによる子テーブルの変更を反映
+            self._check_partition_specs(self.conn)
 
-            self.logger.debug(
-                f"DataFrame変換成功",
-                context={"table_name": table_name, "rows": len(df)}
+            for key in keys:
+                condition = key if isinstance(key, dict) else {key_column: key}
+                condition_columns = list(condition.keys())
+
+                for target in self._write_targets(table_name, condition):
+                    if soft_delete:
+                        # 論理削除（deleted_at設定）
+                        delete_sql = self._build_update_sql(
+                            target, ["deleted_at"], condition_columns
+                        )
+                        params = (now,) + tuple(condition.values())
+                    else:
+                        # 物理削除
+                        delete_sql = self._build_delete_sql(target, condition_columns)
+                        params = tuple(condition.values())
+
+                    statements.setdefault(delete_sql, []).append(params)
+
+            deleted_count = self._executemany_grouped(statements)
+
+            self.logger.info(
+                f"データ一括削除成功",
+                context={
+                    "table_name": table_name,
+                    "keys": len(keys),
+                    "soft_delete": soft_delete,
+                    "count": deleted_count
+                }
             )
 
-            return df
+            return deleted_count
 
         except Exception as e:
             self.logger.error(
-                f"DataFrame変換エラー",
+                f"データ一括削除エラー",
                 context={"table_name": table_name, "error": str(e)},
                 exc_info=True
             )
             raise
 
-    def table_exists(self, table_name: str) -> bool:
+    def create_fts_index(
+        self,
+        table_name: str,
+        columns: List[str],
+        tokenizer: Optional[str] = None
+    ) -> str:
         """
-        テーブルの存在確認
+        全文検索インデックス（FTS5仮想テーブル）を作成
+
+        外部コンテンツ方式の{table_name}_ftsを作成し、INSERT/UPDATE/DELETEトリガーで
+        元テーブルと同期する。既存の行は作成時にインデックス化する。
 
         Args:
-            table_name: テーブル名
+            table_name: 元テーブル名
+            columns: 検索対象のテキストカラム
+            tokenizer: トークナイザー（Noneの場合は設定のfts_tokenizer。日本語は"trigram"）
 
         Returns:
-            テーブルが存在する場合True
+            FTS5仮想テーブル名
         """
+        tokenizer = tokenizer or self.sqlite_config.get("fts_tokenizer", "unicode61")
+        if tokenizer not in self.FTS_TOKENIZERS:
+            raise ValueError(f"無効なトークナイザー: {tokenizer}")
+
+        fts_table = f"{table_name}_fts"
+        columns_sql = ", ".join(columns)
+        new_values = ", ".join(f"new.{col}" for col in columns)
+        old_values = ", ".join(f"old.{col}" for col in columns)
+        delete_sql = (
+            f"INSERT INTO {fts_table}({fts_table}, rowid, {columns_sql}) "
+            f"VALUES ('delete', old.rowid, {old_values});"
+        )
+        insert_sql = (
+            f"INSERT INTO {fts_table}(rowid, {columns_sql}) "
+            f"VALUES (new.rowid, {new_values});"
+        )
+
         try:
-            sql = "SELECT name FROM sqlite_master WHERE type='table' AND name=?"
-            cursor = self.conn.execute(sql, (table_name,))
-            return cursor.fetchone() is not None
+            with self._write_transaction() as conn:
+                conn.execute(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5("
+                    f"{columns_sql}, content='{table_name}', content_rowid='rowid', "
+                    f"tokenize='{tokenizer}')"
+                )
+                conn.execute(
+                    f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ai "
+                    f"AFTER INSERT ON {table_name} BEGIN {insert_sql} END"
+                )
+                conn.execute(
+                    f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ad "
+                    f"AFTER DELETE ON {table_name} BEGIN {delete_sql} END"
+                )
+                conn.execute(
+                    f"CREATE TRIGGER IF NOT EXISTS {fts_table}_au "
+                    f"AFTER UPDATE OF {columns_sql} ON {table_name} "
+                    f"BEGIN {delete_sql} {insert_sql} END"
+                )
+                conn.execute(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')")
+            self._fts_tables.pop(table_name, None)
+
+            self.logger.info(
+                f"全文検索インデックス作成成功",
+                context={
+                    "table_name": table_name, "columns": columns, "tokenizer": tokenizer
+                }
+            )
+
+            return fts_table
 
         except Exception as e:
             self.logger.error(
-                f"テーブル存在確認エラー",
+                f"全文検索インデックス作成エラー",
                 context={"table_name": table_name, "error": str(e)},
                 exc_info=True
             )
             raise
 
-    def get_table_info(self, table_name: str) -> List[Dict[str, Any]]:
+    def search(
+        self,
+        table_name: str,
+        text: str,
+        limit: int = 20,
+        columns: Optional[List[str]] = None,
+        raw_query: bool = False,
+        live_only: Optional[bool] = None
+    ) -> List[Dict[str, Any]]:
         """
-        テーブル情報を取得
+        全文検索（関連度順）
+
+        create_fts_index()で作成したインデックスをMATCHで検索し、bm25のスコア順に元テーブルの行を返す。
+        各行には関連度（rank。小さいほど関連度が高い）が付与される。
+        trigramトークナイザーで3文字未満の検索文字列（「東京」など）は、FTSテーブルへのLIKE検索になる（rankは0）。
 
         Args:
-            table_name: テーブル名
+            table_name: 元テーブル名
+            text: 検索文字列（raw_query=Falseの場合はフレーズとして検索）
+            limit: 取得件数
+            columns: 取得カラムリスト（Noneの場合は全カラム）
+            raw_query: textをFTS5のクエリ構文（AND/OR/NEAR/前方一致*など）として扱う
+            live_only: 論理削除済みの行を除外する（Noneの場合は設定のlive_rows_only）
 
         Returns:
-            カラム情報リスト
+            検索結果リスト（関連度順）
         """
+        fts_table = f"{table_name}_fts"
+
+        def build() -> str:
+            columns_sql = ", ".join(f"t.{col}" for col in columns) if columns else "t.*"
+            if use_like:
+                rank_sql = "0.0"
+                likes = [f"{fts_table}.{col} LIKE ? ESCAPE '\\'" for col in fts_columns]
+                where_sql = "(" + " OR ".join(likes) + ")"
+            else:
+                rank_sql = f"bm25({fts_table})"
+                where_sql = f"{fts_table} MATCH ?"
+            search_sql = (
+                f"SELECT {columns_sql}, {rank_sql} AS rank FROM {fts_table} "
+                f"JOIN {table_name} AS t ON t.rowid = {fts_table}.rowid "
+                f"WHERE {where_sql}"
+            )
+            if live:
+                search_sql += " AND t.deleted_at IS NULL"
+            return search_sql + " ORDER BY rank LIMIT ?"
+
         try:
-            cursor = self.conn.execute(f"PRAGMA table_info({table_name})")
-            columns = cursor.fetchall()
+            fts_columns, tokenizer = self._fts_definition(table_name)
+            use_like = not raw_query and tokenizer == "trigram" and len(text) < 3
+            live = self._use_live_filter(table_name, live_only)
+            search_sql = self._cached_sql(
+                (
+                    "search",
+                    table_name,
+                    tuple(columns) if columns else None,
+                    live,
+                    use_like
+                ),
+                build
+            )
+            if use_like:
+                escaped = (
+                    text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+                )
+                pattern = "%" + escaped + "%"
+                params: Tuple[Any, ...] = (pattern,) * len(fts_columns) + (limit,)
+            else:
+                match = text if raw_query else '"' + text.replace('"', '""') + '"'
+                params = (match, limit)
 
-            result = [dict(col) for col in columns]
+            self._notify_observers(search_sql, params)
+            rows = self.conn.execute(search_sql, params).fetchall()
+            result = [dict(row) for row in rows]
 
             self.logger.debug(
-                f"テーブル情報取得成功",
-                context={"table_name": table_name, "columns": len(result)}
+                f"全文検索成功",
+                context={"table_name": table_name, "text": text, "count": len(result)}
             )
 
             return result
 
         except Exception as e:
             self.logger.error(
-                f"テーブル情報取得エラー",
+                f"全文検索エラー",
+                context={"table_name": table_name, "text": text, "error": str(e)},
+                exc_info=True
+            )
+            raise
+
+    def _fts_definition(self, table_name: str) -> Tuple[List[str], str]:
+        """
+        全文検索インデックスの検索カラムとトークナイザーを取得（結果はキャッシュ）
+
+        Args:
+            table_name: 元テーブル名
+
+        Returns:
+            (検索カラムリスト, トークナイザー)
+        """
+        if table_name not in self._fts_tables:
+            fts_table = f"{table_name}_fts"
+            row = self.conn.execute(
+                "SELECT sql FROM sqlite_master WHERE type='table' AND name=?",
+                (fts_table,)
+            ).fetchone()
+            if row is None:
+                raise ValueError(f"全文検索インデックスがありません: {table_name}")
+            match = re.search(r"tokenize\s*=\s*'(\w+)", row["sql"])
+            columns = [col["name"] for col in self.get_table_info(fts_table)]
+            self._fts_tables[table_name] = (
+                columns, match.group(1) if match else "unicode61"
+            )
+        return self._fts_tables[table_name]
+
+    def create_summary_table(
+        self,
+        summary_name: str,
+        source_table: str,
+        group_by: List[str],
+        aggregates: Dict[str, str],
+        where: Optional[str] = None
+    ) -> None:
+        """
+        集計テーブルを作成（元テーブルのトリガーで差分更新）
+
+        元テーブルのINSERT/UPDATE/DELETEごとに該当グループの集計値だけを更新するため、
+        参照時に元テーブルを再集計しない。作成時に既存データから初期集計する。
+
+        Args:
+            summary_name: 集計テーブル名
+            source_table: 元テーブル名（パーティションテーブルのビューは不可）
+            group_by: グループ化カラム（NOT NULLのカラムを指定）
+            aggregates: {集計カラム名: 集計式}。COUNT(*)、COUNT/SUM/TOTAL/AVG/MIN/MAX(式)を指定可能
+                （例: {"total_sales": "SUM(sales_count)",
+                      "revenue": "SUM(price * sales_count)"}）
+            where: 集計対象の行の条件（例: "deleted_at IS NULL"）
+        """
+        if not group_by:
+            raise ValueError("group_byを指定してください")
+        parsed = {
+            name: self._parse_aggregate(expr) for name, expr in aggregates.items()
+        }
+
+        try:
+            meta = self.SUMMARY_META_TABLE
+            with self._write_transaction() as conn:
+                conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {meta} ("
+                    f"summary_name TEXT PRIMARY KEY, source_table TEXT NOT NULL, "
+                    f"group_by TEXT NOT NULL, aggregates TEXT NOT NULL, where_sql TEXT)"
+                )
+                conn.execute(
+                    f"INSERT OR REPLACE INTO {meta} VALUES (?, ?, ?, ?, ?)",
+                    (
+                        summary_name,
+                        source_table,
+                        json.dumps(group_by),
+                        json.dumps(aggregates),
+                        where
+                    )
+                )
+
+                # 集計テーブル（_rowsはグループの行数。0になったグループは削除）
+                columns_sql = ", ".join(
+                    group_by + ["_rows INTEGER NOT NULL"]
+                    + [
+                        col
+                        for name, (func, _) in parsed.items()
+                        for col in self._summary_columns(name, func)
+                    ]
+                )
+                conn.execute(f"DROP TABLE IF EXISTS {summary_name}")
+                conn.execute(
+                    f"CREATE TABLE {summary_name} "
+                    f"({columns_sql}, PRIMARY KEY ({', '.join(group_by)}))"
+                )
+
+                for suffix in ("ai", "ad", "au"):
+                    conn.execute(f"DROP TRIGGER IF EXISTS {summary_name}_{suffix}")
+                add_sql = self._summary_add_sql(
+                    summary_name, source_table, group_by, parsed, where
+                )
+                remove_sql = self._summary_remove_sql(
+                    summary_name, source_table, group_by, parsed, where
+                )
+                conn.execute(
+                    f"CREATE TRIGGER {summary_name}_ai AFTER INSERT ON {source_table} "
+                    f"BEGIN {add_sql} END"
+                )
+                conn.execute(
+                    f"CREATE TRIGGER {summary_name}_ad AFTER DELETE ON {source_table} "
+                    f"BEGIN {remove_sql} END"
+                )
+                conn.execute(
+                    f"CREATE TRIGGER {summary_name}_au AFTER UPDATE ON {source_table} "
+                    f"BEGIN {remove_sql} {add_sql} END"
+                )
+
+            self.refresh_summary_table(summary_name)
+            self._table_columns.pop(summary_name, None)
+
+            self.logger.info(
+                f"集計テーブル作成成功",
+                context={
+                    "summary_name": summary_name,
+                    "source_table": source_table,
+                    "group_by": group_by
+                }
+            )
+
+        except Exception as e:
+            self.logger.error(
+                f"集計テーブル作成エラー",
+                context={
+                    "summary_name": summary_name,
+                    "source_table": source_table,
+                    "error": str(e)
+                },
+                exc_info=True
+            )
+            raise
+
+    def refresh_summary_table(self, summary_name: str) -> int:
+        """
+        集計テーブルを元テーブルから再集計（作成時・トリガー無効時の復旧用）
+
+        Args:
+            summary_name: 集計テーブル名
+
+        Returns:
+            集計テーブルの行数（グループ数）
+        """
+        try:
+            row = self.conn.execute(
+                f"SELECT source_table, group_by, aggregates, where_sql "
+                f"FROM {self.SUMMARY_META_TABLE} WHERE summary_name=?",
+                (summary_name,)
+            ).fetchone()
+            if row is None:
+                raise ValueError(f"集計テーブルではありません: {summary_name}")
+
+            group_by = json.loads(row["group_by"])
+            parsed = {
+                name: self._parse_aggregate(expr)
+                for name, expr in json.loads(row["aggregates"]).items()
+            }
+            select_exprs = list(group_by) + ["COUNT(*)"]
+            for func, arg in parsed.values():
+                if func == "AVG":
+                    select_exprs += [f"AVG({arg})", f"TOTAL({arg})", f"COUNT({arg})"]
+                else:
+                    select_exprs.append(f"{func}({arg})")
+            refresh_sql = (
+                f"INSERT INTO {summary_name} SELECT {', '.join(select_exprs)} "
+                f"FROM {row['source_table']}"
+                + (f" WHERE {row['where_sql']}" if row["where_sql"] else "")
+                + f" GROUP BY {', '.join(group_by)}"
+            )
+
+            with self._write_transaction() as conn:
+                conn.execute(f"DELETE FROM {summary_name}")
+                groups = conn.execute(refresh_sql).rowcount
+
+            self.logger.info(
+                f"集計テーブル再集計成功",
+                context={"summary_name": summary_name, "groups": groups}
+            )
+
+            return groups
+
+        except Exception as e:
+            self.logger.error(
+                f"集計テーブル再集計エラー",
+                context={"summary_name": summary_name, "error": str(e)},
+                exc_info=True
+            )
+            raise
+
+    def _parse_aggregate(self, expr: str) -> Tuple[str, str]:
+        """
+        集計式を(関数名, 引数)に分解（差分更新できる関数のみ）
+        """
+        match = re.fullmatch(
+            r"\s*(COUNT|SUM|TOTAL|AVG|MIN|MAX)\s*\((.+)\)\s*", expr, re.IGNORECASE
+        )
+        if not match or match.group(2).strip().upper().startswith("DISTINCT"):
+            raise ValueError(f"差分更新できない集計式: {expr}")
+        return match.group(1).upper(), match.group(2).strip()
+
+    def _summary_columns(self, name: str, func: str) -> List[str]:
+        """
+        集計カラムの定義（AVGは合計・件数の補助カラムを含む）
+        """
+        if func == "COUNT":
+            return [f"{name} INTEGER NOT NULL"]
+        if func == "AVG":
+            return [
+                f"{name} REAL",
+                f"_sum_{name} REAL NOT NULL",
+                f"_n_{name} INTEGER NOT NULL"
+            ]
+        return [name]
+
+    def _qualify_columns(self, table_name: str, expr: str, prefix: str) -> str:
+        """
+        式中の元テーブルのカラム参照にNEW./OLD.を付与
+        """
+        columns = sorted(self._column_names(table_name), key=len, reverse=True)
+        alternatives = "|".join(re.escape(col) for col in columns)
+        pattern = r"(?<![\w.])(" + alternatives + r")(?![\w(])"
+        return re.sub(pattern, lambda m: f"{prefix}.{m.group(1)}", expr)
+
+    def _summary_add_sql(
+        self,
+        summary_name: str,
+        source_table: str,
+        group_by: List[str],
+        parsed: Dict[str, Tuple[str, str]],
+        where: Optional[str]
+    ) -> str:
+        """
+        NEW行を集計に加算するトリガー文（グループが無ければ作成するUPSERT）
+        """
+        def new(expr: str) -> str:
+            return self._qualify_columns(source_table, expr, "NEW")
+
+        columns = list(group_by) + ["_rows"]
+        values = [f"NEW.{col}" for col in group_by] + ["1"]
+        updates = ["_rows = _rows + 1"]
+        for name, (func, arg) in parsed.items():
+            value = new(arg)
+            if func == "COUNT":
+                columns.append(name)
+                values.append("1" if arg == "*" else f"({value} IS NOT NULL)")
+                updates.append(f"{name} = {name} + excluded.{name}")
+            elif func == "AVG":
+                columns += [name, f"_sum_{name}", f"_n_{name}"]
+                values += [
+                    f"{value} * 1.0", f"COALESCE({value}, 0)", f"({value} IS NOT NULL)"
+                ]
+                updates += [
+                    f"{name} = (_sum_{name} + excluded._sum_{name}) * 1.0 "
+                    f"/ NULLIF(_n_{name} + excluded._n_{name}, 0)",
+                    f"_sum_{name} = _sum_{name} + excluded._sum_{name}",
+                    f"_n_{name} = _n_{name} + excluded._n_{name}",
+                ]
+            elif func in ("SUM", "TOTAL"):
+                columns.append(name)
+                values.append(value if func == "SUM" else f"COALESCE({value}, 0.0)")
+                updates.append(
+                    f"{name} = COALESCE({name} + excluded.{name}, "
+                    f"{name}, excluded.{name})"
+                )
+            else:
+                columns.append(name)
+                values.append(value)
+                updates.append(
+                    f"{name} = COALESCE({func}({name}, excluded.{name}), "
+                    f"{name}, excluded.{name})"
+                )
+
+        # INSERT ... SELECT ... ON CONFLICTはWHERE句が必須（構文の曖昧さ回避）
+        return (
+            f"INSERT INTO {summary_name} ({', '.join(columns)}) "
+            f"SELECT {', '.join(values)} WHERE {new(where) if where else 1} "
+            f"ON CONFLICT ({', '.join(group_by)}) DO UPDATE SET {', '.join(updates)};"
+        )
+
+    def _summary_remove_sql(
+        self,
+        summary_name: str,
+        source_table: str,
+        group_by: List[str],
+        parsed: Dict[str, Tuple[str, str]],
+        where: Optional[str]
+    ) -> str:
+        """
+        OLD行を集計から減算するトリガー文（MIN/MAXはグループ内で再計算、0行のグループは削除）
+        """
+        def old(expr: str) -> str:
+            return self._qualify_columns(source_table, expr, "OLD")
+
+        group_match = " AND ".join(f"{col} = OLD.{col}" for col in group_by)
+        updates = ["_rows = _rows - 1"]
+        for name, (func, arg) in parsed.items():
+            value = old(arg)
+            if func == "COUNT":
+                updates.append(
+                    f"{name} = {name} - " + (
+                        "1" if arg == "*" else f"({value} IS NOT NULL)"
+                    )
+                )
+            elif func == "AVG":
+                updates += [
+                    f"{name} = (_sum_{name} - COALESCE({value}, 0)) * 1.0 "
+                    f"/ NULLIF(_n_{name} - ({value} IS NOT NULL), 0)",
+                    f"_sum_{name} = _sum_{name} - COALESCE({value}, 0)",
+                    f"_n_{name} = _n_{name} - ({value} IS NOT NULL)",
+                ]
+            elif func in ("SUM", "TOTAL"):
+                updates.append(f"{name} = {name} - COALESCE({value}, 0)")
+            else:
+                source_where = f"{group_match}" + (f" AND ({where})" if where else "")
+                updates.append(
+                    f"{name} = (SELECT {func}({arg}) FROM {source_table} "
+                    f"WHERE {source_where})"
+                )
+
+        condition = group_match + (f" AND ({old(where)})" if where else "")
+        return (
+            f"UPDATE {summary_name} SET {', '.join(updates)} WHERE {condition}; "
+            f"DELETE FROM {summary_name} WHERE {group_match} AND _rows <= 0;"
+        )
+
+    def create_partitioned_table(
+        self,
+        table_name: str,
+        schema: Dict[str, str],
+        partition_column: str = "created_at",
+        interval: str = "month",
+        indexes: Optional[List[Union[str, List[str], Dict[str, Any]]]] = None,
+        json_columns: Optional[Dict[str, List[str]]] = None
+    ) -> None:
+        """
+        時間パーティションテーブルを作成
+
+        期間（月または日）ごとの子テーブル（{table_name}_pYYYYMM / _pYYYYMMDD）を作成し、
+        table_nameは全子テーブルをUNION ALLしたビューになる。
+        insert()/insert_batched()はpartition_columnの値で子テーブルに振り分ける。
+
+        Args:
+            table_name: テーブル名（ビュー名）
+            schema: カラム定義 {"column_name": "TYPE CONSTRAINTS"}
+            partition_column: 振り分けに使うタイムスタンプカラム（ISO 8601文字列）
+            interval: パーティション単位（"month" または "day"）
+            indexes: 各子テーブルに作成するインデックス定義（create_tableと同じ形式）
+            json_columns: 各子テーブルに作成するJSONパスの仮想生成カラム（create_tableと同じ形式）
+        """
+        if interval not in self.PARTITION_INTERVALS:
+            raise ValueError(f"無効なパーティション単位: {interval}")
+        if partition_column not in schema:
+            raise ValueError(f"パーティションカラムがスキーマにありません: {partition_column}")
+        if self.table_exists(table_name):
+            raise ValueError(f"同名の通常テーブルが存在します: {table_name}")
+
+        try:
+            meta = self.PARTITION_META_TABLE
+            with self._write_transaction() as conn:
+                conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {meta} ("
+                    f"table_name TEXT PRIMARY KEY, partition_column TEXT NOT NULL, "
+                    f"interval TEXT NOT NULL, schema TEXT NOT NULL, "
+                    f"indexes TEXT NOT NULL, json_columns TEXT NOT NULL)"
+                )
+                conn.execute(
+                    f"INSERT OR REPLACE INTO {meta} VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        table_name, partition_column, interval, json.dumps(schema),
+                        json.dumps(indexes or []), json.dumps(json_columns or {})
+                    )
+                )
+            self._partition_specs.pop(table_name, None)
+
+            # ビューには子テーブルが1つ以上必要なため、現在期間のパーティションを作成
+            spec = self._partition_spec(table_name)
+            self._ensure_partition(
+                table_name, spec, self._partition_suffix(interval, datetime.now())
+            )
+
+            self.logger.info(
+                f"パーティションテーブル作成成功",
+                context={
+                    "table_name": table_name,
+                    "partition_column": partition_column,
+                    "interval": interval
+                }
+            )
+
+        except Exception as e:
+            self.logger.error(
+                f"パーティションテーブル作成エラー",
                 context={"table_name": table_name, "error": str(e)},
                 exc_info=True
             )
             raise
 
-    def begin_transaction(self) -> None:
+    def list_partitions(self, table_name: str) -> List[Dict[str, str]]:
         """
-        トランザクション開始
+        パーティション（子テーブル）一覧を取得
+
+        Args:
+            table_name: パーティションテーブル名
+
+        Returns:
+            [{"name", "start", "end"}]（期間は[start, end)の日付、古い順）
         """
-        if self.auto_commit:
-            self.logger.warning("auto_commit=Trueのため、トランザクション管理は無効です")
-            return
+        spec = self._require_partition_spec(table_name)
+        partitions = []
+        for name in self._partition_names(table_name, spec):
+            start, end = self._partition_bounds(
+                spec["interval"], name[len(table_name) + 2:]
+            )
+            partitions.append({"name": name, "start": start, "end": end})
+        return partitions
 
-        self.conn.execute("BEGIN")
-        self.logger.debug("トランザクション開始")
+    def drop_partitions(self, table_name: str, older_than_days: int) -> List[str]:
+        """
+        期間全体が保持期間を過ぎたパーティションをDROP TABLEで削除
 
-    def commit(self) -> None:
+        行単位のDELETEを行わないため、データ量に関係なく短時間で完了する。
+        解放されたページは以降の書き込みで再利用される。
+
+        Args:
+            table_name: パーティションテーブル名
+            older_than_days: 保持日数（期間の終了日がこれより古いパーティションを削除）
+
+        Returns:
+            削除した子テーブル名リスト
         """
-        トランザクションコミット
+        spec = self._require_partition_spec(table_name)
+        cutoff = (datetime.now() - timedelta(days=older_than_days)).date().isoformat()
+        expired = [
+            p["name"] for p in self.list_partitions(table_name) if p["end"] <= cutoff
+        ]
+
+        try:
+            if expired:
+                with self._write_transaction() as conn:
+                    for name in expired:
+                        conn.execute(f"DROP TABLE IF EXISTS {name}")
+                    self._rebuild_partition_view(table_name, spec, conn)
+                self._partition_specs.pop(table_name, None)
+
+            self.logger.info(
+                f"パーティション削除成功",
+                context={"table_name": table_name, "cutoff": cutoff, "dropped": expired}
+            )
+
+            return expired
+
+        except Exception as e:
+            self.logger.error(
+                f"パーティション削除エラー",
+                context={"table_name": table_name, "error": str(e)},
+                exc_info=True
+            )
+            raise
+
+    def select_range(
+        self,
+        table_name: str,
+        start: Union[str, datetime],
+        end: Optional[Union[str, datetime]] = None,
+        columns: Optional[List[str]] = None,
+        condition: Optional[Dict[str, Any]] = None,
+        order_by: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
         """
-        if self.auto_commit:
-            return
+        期間を指定してパーティションテーブルからデータを取得
 
-        self.conn.commit()
-        self.logger.debug("トランザクションコミット")
+        期間[start, end)に重なる子テーブルのみを走査する（ビュー経由の全件走査を避ける）。
 
-    def rollback(self) -> None:
+        Args:
+            table_name: パーティションテーブル名
+            start: 開始日時（この値を含む）
+            end: 終了日時（この値を含まない。Noneの場合は上限なし）
+            columns: 取得カラムリスト（Noneの場合は全カラム）
+            condition: 検索条件
+            order_by: ソート順（取得カラム名で指定）
+            limit: 取得件数制限
+
+        Returns:
+            取得データリスト
         """
-        トランザクションロールバック
+        spec = self._require_partition_spec(table_name)
+        start_value = start.isoformat() if isinstance(start, datetime) else start
+        end_value = end.isoformat() if isinstance(end, datetime) else end
+
+        try:
+            partitions = [
+                p["name"] for p in self.list_partitions(table_name)
+                if p["end"] > start_value and (
+                    end_value is None or p["start"] < end_value
+                )
+            ]
+            if not partitions:
+                return []
+
+            partition_column = spec["partition_column"]
+            condition_columns = list(condition.keys()) if condition else []
+            clauses = [f"{partition_column} >= ?"]
+            branch_params: List[Any] = [start_value]
+            if end_value is not None:
+                clauses.append(f"{partition_column} < ?")
+                branch_params.append(end_value)
+            clauses.extend(
+                f"{self._json_path_sql(table_name, col)} = ?"
+                for col in condition_columns
+            )
+            branch_params.extend(condition.values() if condition else [])
+
+            def build() -> str:
+                columns_sql = ", ".join(
+                    self._json_select_expr(table_name, col) for col in columns
+                ) if columns else "*"
+                where_sql = " AND ".join(clauses)
+                branches = [
+                    f"SELECT {columns_sql} FROM {name} WHERE {where_sql}"
+                    for name in partitions
+                ]
+                # 複合SELECTの項数上限を超える場合は上限ごとのサブクエリに分けて連結
+                chunk = self.MAX_COMPOUND_SELECT
+                if len(branches) <= chunk:
+                    select_sql = " UNION ALL ".join(branches)
+                else:
+                    select_sql = " UNION ALL ".join(
+                        f"SELECT * FROM ({' UNION ALL '.join(branches[i:i + chunk])})"
+                        for i in range(0, len(branches), chunk)
+                    )
+                if order_by:
+                    order_sql = self._json_order_by(table_name, order_by)
+                    select_sql += f" ORDER BY {order_sql}"
+                if limit:
+                    select_sql += " LIMIT ?"
+                return select_sql
+
+            select_sql = self._cached_sql(
+                (
+                    "select_range", tuple(partitions),
+                    tuple(columns) if columns else None,
+                    tuple(clauses), order_by, bool(limit)
+                ),
+                build
+            )
+            params = branch_params * len(partitions)
+            if limit:
+                params.append(limit)
+
+            self._notify_observers(select_sql, params)
+            rows = self.conn.execute(select_sql, params).fetchall()
+            result = [dict(row) for row in rows]
+
+            self.logger.debug(
+                f"期間指定データ取得成功",
+                context={
+                    "table_name": table_name,
+                    "partitions": len(partitions),
+                    "count": len(result)
+                }
+            )
+
+            return result
+
+        except Exception as e:
+            self.logger.error(
+                f"期間指定データ取得エラー",
+                context={"table_name": table_name, "error": str(e)},
+                exc_info=True
+            )
+            raise
+
+    def _partition_spec(self, table_name: str) -> Optional[Dict[str, Any]]:
         """
-        if self.auto_commit:
+        パーティションテーブルの定義を取得（子テーブル一覧を含めてキャッシュ）
+
+        キャッシュは自身の子テーブル作成・削除時に破棄し、他プロセス・他接続による変更は
+        書き込みトランザクションの開始時に_check_partition_specsで検出する。
+
+        Args:
+            table_name: テーブル名
+
+        Returns:
+            {"partition_column", "interval", "schema", "indexes", "json_columns",
+             "partitions", "schema_version"}。通常テーブルの場合はNone
+        """
+        if table_name not in self._partition_specs:
+            spec = None
+            conn = self.conn
+            has_meta = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?",
+                (self.PARTITION_META_TABLE,)
+            ).fetchone()
+            if has_meta:
+                row = conn.execute(
+                    f"SELECT partition_column, interval, schema, indexes, json_columns "
+                    f"FROM {self.PARTITION_META_TABLE} WHERE table_name=?",
+                    (table_name,)
+                ).fetchone()
+                if row is not None:
+                    spec = {
+                        "partition_column": row["partition_column"],
+                        "interval": row["interval"],
+                        "schema": json.loads(row["schema"]),
+                        "indexes": json.loads(row["indexes"]),
+                        "json_columns": json.loads(row["json_columns"]),
+                    }
+                    version = conn.execute("PRAGMA schema_version").fetchone()[0]
+                    spec["schema_version"] = version
+                    spec["partitions"] = set(self._partition_names(table_name, spec))
+            self._partition_specs[table_name] = spec
+
+        return self._partition_specs[table_name]
+
+    def _check_partition_specs(self, conn: sqlite3.Connection) -> None:
+        """
+        スキーマが変更されていればパーティションテーブルの定義キャッシュを破棄
+
+        他プロセス・他接続による子テーブルの追加・削除を検出するため、書き込みロックの取得直後
+        （トランザクションごとに1回）に呼び出す。パーティションテーブルを使用していない場合は何もしない。
+
+        Args:
+            conn: 使用する接続
+        """
+        cached = [
+            name
+            for name, spec in list(self._partition_specs.items())
+            if spec is not None
+        ]
+        if not cached:
             return
 
-        self.conn.rollback()
-        self.logger.debug("トランザクションロールバック")
+        version = conn.execute("PRAGMA schema_version").fetchone()[0]
+        for name in cached:
+            spec = self._partition_specs.get(name)
+            if spec is not None and spec["schema_version"] != version:
+                self._partition_specs.pop(name, None)
 
-    def close(self) -> None:
+    def _require_partition_spec(self, table_name: str) -> Dict[str, Any]:
+        """
+        パーティションテーブルの定義を取得（パーティションテーブルでない場合はValueError）
+        """
+        spec = self._partition_spec(table_name)
+        if spec is None:
+            raise ValueError(f"パーティションテーブルではありません: {table_name}")
+        return spec
+
+    def _write_targets(
+        self,
+        table_name: str,
+        condition: Optional[Dict[str, Any]] = None,
+        data: Optional[Dict[str, Any]] = None
+    ) -> List[str]:
+        """
+        更新・削除の対象テーブルを取得
+
+        パーティションテーブル（ビュー）は直接更新できないため子テーブルを返す。
+        条件にpartition_columnがあれば該当期間の子テーブルのみ、なければ全子テーブルを対象にする。
+
+        Args:
+            table_name: テーブル名
+            condition: 更新・削除条件
+            data: 更新データ（パーティションテーブルではpartition_columnを更新できない）
+
+        Returns:
+            対象テーブル名リスト（通常テーブルは[table_name]）
+        """
+        spec = self._partition_spec(table_name)
+        if spec is None:
+            return [table_name]
+
+        partition_column = spec["partition_column"]
+        if data and partition_column in data:
+            raise ValueError(f"パーティションカラムは更新できません: {partition_column}")
+        if condition and condition.get(partition_column) is not None:
+            value = condition[partition_column]
+            name = f"{table_name}_p{self._partition_suffix(spec['interval'], value)}"
+            return [name] if name in spec["partitions"] else []
+        return sorted(spec["partitions"])
+
+    def _partition_names(self, table_name: str, spec: Dict[str, Any]) -> List[str]:
+        """
+        sqlite_masterから子テーブル名を取得（古い順）
+        """
+        digits = len(
+            datetime(2000, 1, 1).strftime(self.PARTITION_INTERVALS[spec["interval"]])
+        )
+        cursor = self.conn.execute(
+            "SELECT name FROM sqlite_master "
+            "WHERE type='table' AND name GLOB ? ORDER BY name",
+            (f"{table_name}_p" + "[0-9]" * digits,)
+        )
+        return [row["name"] for row in cursor.fetchall()]
+
+    def _partition_suffix(self, interval: str, value: Any) -> str:
+        """
+        タイムスタンプ（datetime/date/ISO 8601文字列）から子テーブル名のサフィックスを取得
+        """
+        if isinstance(value, str):
+            value = datetime.fromisoformat(value[:10])
+        return value.strftime(self.PARTITION_INTERVALS[interval])
+
+    def _partition_bounds(self, interval: str, suffix: str) -> Tuple[str, str]:
+        """
+        サフィックスからパーティションの期間[start, end)を日付文字列で取得
+        """
+        start = datetime.strptime(suffix, self.PARTITION_INTERVALS[interval])
+        if interval == "day":
+            end = start + timedelta(days=1)
+        else:
+            end = (start + timedelta(days=32)).replace(day=1)
+        return start.date().isoformat(), end.date().isoformat()
+
+    def _ensure_partition(
+        self,
+        table_name: str,
+        spec: Dict[str, Any],
+        suffix: str
+    ) -> str:
+        """
+        子テーブルが無ければ作成してビューを再作成
+
+        Returns:
+            子テーブル名
+        """
+        name = f"{table_name}_p{suffix}"
+        if name not in spec["partitions"]:
+            with self._write_transaction() as conn:
+                self.create_table(
+                    name, spec["schema"], spec["indexes"], spec["json_columns"]
+                )
+                self._rebuild_partition_view(table_name, spec, conn)
+            self._partition_specs.pop(table_name, None)
+        return name
+
+    def _rebuild_partition_view(
+        self,
+        table_name: str,
+        spec: Dict[str, Any],
+        conn: sqlite3.Connection
+    ) -> None:
+        """
+        全子テーブルをUNION ALLしたビューを再作成（子テーブルが無い場合は現在期間を作成）
+
+        子テーブルがMAX_COMPOUND_SELECTを超える場合は中間ビューに分けて連結する。
+        """
+        names = self._partition_names(table_name, spec)
+        if not names:
+            suffix = self._partition_suffix(spec["interval"], datetime.now())
+            self.create_table(
+                f"{table_name}_p{suffix}",
+                spec["schema"],
+                spec["indexes"],
+                spec["json_columns"]
+            )
+            names = self._partition_names(table_name, spec)
+
+        conn.execute(f"DROP VIEW IF EXISTS {table_name}")
+        for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type='view' AND name GLOB ?",
+            (f"{table_name}_u[0-9]*",)
+        ).fetchall():
+            conn.execute(f"DROP VIEW IF EXISTS {row['name']}")
+        self._table_columns.pop(table_name, None)
+
+        # 複合SELECTの項数上限を超える場合は上限ごとの中間ビュー（{table_name}_u0, _u1, ...）を連結
+        chunk = self.MAX_COMPOUND_SELECT
+        sources = names
+        if len(names) > chunk:
+            sources = []
+            for index in range(0, len(names), chunk):
+                sources.append(f"{table_name}_u{index // chunk}")
+                conn.execute(
+                    f"CREATE VIEW {sources[-1]} AS "
+                    + " UNION ALL ".join(
+                        f"SELECT * FROM {name}" for name in names[index:index + chunk]
+                    )
+                )
+        conn.execute(
+            f"CREATE VIEW {table_name} AS "
+            + " UNION ALL ".join(f"SELECT * FROM {name}" for name in sources)
+        )
+        spec["partitions"] = set(names)
+
+    def _insert_partitioned(self, table_name: str, rows: List[Dict[str, Any]]) -> int:
+        """
+        partition_columnの値で子テーブルに振り分けて1トランザクションで挿入
+
+        振り分けは書き込みロックの取得後に行う（他プロセスによる子テーブルの変更を反映するため）。
+
+        Returns:
+            挿入された行数
+        """
+        inserted_count = 0
+        with self._write_transaction() as conn:
+            spec = self._require_partition_spec(table_name)
+            targets = self._group_by_partition(table_name, rows, spec)
+            for name, group in targets.items():
+                columns = list(group[0].keys())
+                values = [tuple(row.get(col) for col in columns) for row in group]
+                conn.executemany(self._build_insert_sql(name, columns), values)
+                inserted_count += len(values)
+        return inserted_count
+
+    def _group_by_partition(
+        self,
+        table_name: str,
+        rows: List[Dict[str, Any]],
+        spec: Dict[str, Any]
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        partition_columnの値で行を子テーブルごとにまとめる（子テーブルが無ければ作成）
+
+        Returns:
+            {子テーブル名: 行リスト}
+        """
+        partition_column = spec["partition_column"]
+        grouped: Dict[str, List[Dict[str, Any]]] = {}
+        for row in rows:
+            value = row.get(partition_column)
+            if value is None:
+                raise ValueError(f"パーティションカラムの値がありません: {partition_column}")
+            suffix = self._partition_suffix(spec["interval"], value)
+            grouped.setdefault(suffix, []).append(row)
+
+        return {
+            self._ensure_partition(table_name, spec, suffix): group
+            for suffix, group in grouped.items()
+        }
+
+    def _cached_sql(self, key: Hashable, builder: Callable[[], str]) -> str:
+        """
+        生成SQLをLRUキャッシュから取得（未登録の場合はbuilderで生成して登録）
+
+        Args:
+            key: キャッシュキー（操作, テーブル, カラム構成, ...）
+            builder: SQL生成関数
+
+        Returns:
+            SQL
+        """
+        with self._sql_cache_lock:
+            sql = self._sql_cache.get(key)
+            if sql is not None:
+                self._sql_cache.move_to_end(key)
+                self._sql_cache_hits += 1
+                return sql
+            self._sql_cache_misses += 1
+
+        sql = builder()
+
+        with self._sql_cache_lock:
+            self._sql_cache[key] = sql
+            while len(self._sql_cache) > self.sql_cache_size:
+                self._sql_cache.popitem(last=False)
+
+        return sql
+
+    def add_statement_observer(self, observer: Callable[[str, Any], None]) -> None:
+        """
+        select/query/update/delete等で実行するSQLを受け取るコールバックを登録
+
+        Args:
+            observer: コールバック（引数: sql, params）
+        """
+        self._statement_observers.append(observer)
+
+    def remove_statement_observer(self, observer: Callable[[str, Any], None]) -> None:
+        """
+        ステートメント監視コールバックを解除
+
+        Args:
+            observer: 登録済みのコールバック
+        """
+        if observer in self._statement_observers:
+            self._statement_observers.remove(observer)
+
+    def _notify_observers(self, sql: str, params: Any) -> None:
+        """
+        登録済みのコールバックに実行SQLを通知
+
+        Args:
+            sql: SQL
+            params: パラメータ
+        """
+        for observer in self._statement_observers:
+            observer(sql, params)
+
+    def get_sql_cache_stats(self) -> Dict[str, Any]:
+        """
+        生成SQLキャッシュの統計を取得
+
+        Returns:
+            {"hits", "misses", "hit_rate", "size", "max_size", "cached_statements"}
+        """
+        with self._sql_cache_lock:
+            total = self._sql_cache_hits + self._sql_cache_misses
+            return {
+                "hits": self._sql_cache_hits,
+                "misses": self._sql_cache_misses,
+                "hit_rate": round(self._sql_cache_hits / total, 3) if total else 0.0,
+                "size": len(self._sql_cache),
+                "max_size": self.sql_cache_size,
+                "cached_statements": self.cached_statements
+            }
+
+    def _build_insert_sql(self, table_name: str, columns: List[str]) -> str:
+        """
+        INSERT SQLを生成
+
+        Args:
+            table_name: テーブル名
+            columns: 挿入カラム
+
+        Returns:
+            INSERT SQL
+        """
+        def build() -> str:
+            placeholders = ", ".join(["?" for _ in columns])
+            columns_sql = ", ".join(columns)
+            return f"INSERT INTO {table_name} ({columns_sql}) VALUES ({placeholders})"
+
+        return self._cached_sql(("insert", table_name, tuple(columns)), build)
+
+    def _build_upsert_sql(
+        self,
+        table_name: str,
+        columns: List[str],
+        conflict_columns: List[str],
+        update_columns: List[str]
+    ) -> str:
+        """
+        UPSERT SQL（INSERT ... ON CONFLICT）を生成
+
+        Args:
+            table_name: テーブル名
+            columns: 挿入カラム
+            conflict_columns: 重複判定カラム
+            update_columns: 重複時に更新するカラム（空の場合はDO NOTHING）
+
+        Returns:
+            UPSERT SQL
+        """
+        return self._cached_sql(
+            (
+                "upsert",
+                table_name,
+                tuple(columns),
+                tuple(conflict_columns),
+                tuple(update_columns)
+            ),
+            lambda: self._build_insert_sql(table_name, columns) + " "
+            + self._build_conflict_clause(conflict_columns, update_columns)
+        )
+
+    def _build_conflict_clause(
+        self,
+        conflict_columns: List[str],
+        update_columns: List[str]
+    ) -> str:
+        """
+        ON CONFLICT句を生成
+
+        Args:
+            conflict_columns: 重複判定カラム
+            update_columns: 重複時に更新するカラム（空の場合はDO NOTHING）
+
+        Returns:
+            ON CONFLICT句
+        """
+        conflict_sql = ", ".join(conflict_columns)
+        if update_columns:
+            set_clause = ", ".join(
+                [f"{col} = excluded.{col}" for col in update_columns]
+            )
+            return f"ON CONFLICT ({conflict_sql}) DO UPDATE SET {set_clause}"
+        return f"ON CONFLICT ({conflict_sql}) DO NOTHING"
+
+    def _build_update_sql(
+        self,
+        table_name: str,
+        set_columns: List[str],
+        condition_columns: List[str]
+    ) -> str:
+        """
+        UPDATE SQLを生成
+
+        Args:
+            table_name: テーブル名
+            set_columns: 更新カラム
+            condition_columns: 条件カラム
+
+        Returns:
+            UPDATE SQL
+        """
+        def build() -> str:
+            set_clause = ", ".join([f"{col} = ?" for col in set_columns])
+            where_clause = " AND ".join([f"{col} = ?" for col in condition_columns])
+            return f"UPDATE {table_name} SET {set_clause} WHERE {where_clause}"
+
+        return self._cached_sql(
+            ("update", table_name, tuple(set_columns), tuple(condition_columns)),
+            build
+        )
+
+    def _build_delete_sql(self, table_name: str, condition_columns: List[str]) -> str:
+        """
+        DELETE SQLを生成
+
+        Args:
+            table_name: テーブル名
+            condition_columns: 条件カラム
+
+        Returns:
+            DELETE SQL
+        """
+        def build() -> str:
+            where_clause = " AND ".join([f"{col} = ?" for col in condition_columns])
+            return f"DELETE FROM {table_name} WHERE {where_clause}"
+
+        return self._cached_sql(("delete", table_name, tuple(condition_columns)), build)
+
+    def _build_select_sql(
+        self,
+        table_name: str,
+        columns: Optional[List[str]],
+        condition_columns: List[str],
+        order_by: Optional[str] = None,
+        has_limit: bool = False,
+        has_offset: bool = False,
+        live_only: bool = False
+    ) -> str:
+        """
+        SELECT SQLを生成（LIMIT/OFFSETはプレースホルダ）
+
+        columns/condition_columns/order_byのJSONパス（"response_data.status"）は
+        生成カラム（無い場合はjson_extract式）に置き換える。
+
+        Args:
+            table_name: テーブル名
+            columns: 取得カラム（Noneの場合は全カラム）
+            condition_columns: 条件カラム
+            order_by: ソート順
+            has_limit: LIMIT ?を付与する
+            has_offset: OFFSET ?を付与する
+            live_only: deleted_at IS NULLを付与する
+
+        Returns:
+            SELECT SQL
+        """
+        def build() -> str:
+            columns_sql = ", ".join(
+                self._json_select_expr(table_name, col) for col in columns
+            ) if columns else "*"
+            select_sql = f"SELECT {columns_sql} FROM {table_name}"
+            clauses = [
+                f"{self._json_path_sql(table_name, col)} = ?"
+                for col in condition_columns
+            ]
+            if live_only:
+                clauses.append("deleted_at IS NULL")
+            if clauses:
+                select_sql += " WHERE " + " AND ".join(clauses)
+            if order_by:
+                select_sql += f" ORDER BY {self._json_order_by(table_name, order_by)}"
+            if has_limit:
+                select_sql += " LIMIT ?"
+            if has_offset:
+                select_sql += " OFFSET ?"
+            return select_sql
+
+        key = (
+            "select", table_name, tuple(columns) if columns else None,
+            tuple(condition_columns), order_by, has_limit, has_offset, live_only
+        )
+        return self._cached_sql(key, build)
+
+    def _json_generated_name(self, json_column: str, path: str) -> str:
+        """
+        JSONパスの仮想生成カラム名を取得（"user.id" → "{json_column}_user_id"）
+
+        Args:
+            json_column: JSONカラム名
+            path: JSONパス（$.は不要）
+
+        Returns:
+            生成カラム名
+        """
+        if not re.fullmatch(r"[\w.\[\]]+", path):
+            raise ValueError(f"無効なJSONパス: {path}")
+        return f"{json_column}_" + re.sub(r"\W+", "_", path).strip("_")
+
+    def _column_names(self, table_name: str) -> List[str]:
+        """
+        カラム名一覧を取得（生成カラムを含む。結果はキャッシュ）
+        """
+        if table_name not in self._table_columns:
+            cursor = self.conn.execute(f"PRAGMA table_xinfo({table_name})")
+            self._table_columns[table_name] = [col["name"] for col in cursor.fetchall()]
+        return self._table_columns[table_name]
+
+    def _json_path_sql(self, table_name: str, name: str) -> str:
+        """
+        "JSONカラム.パス"を生成カラム名（無い場合はjson_extract式）に置き換え
+
+        Args:
+            table_name: テーブル名
+            name: カラム名またはJSONパス
+
+        Returns:
+            SQL式（JSONパスでない場合はnameをそのまま返す）
+        """
+        if "." not in name:
+            return name
+        json_column, path = name.split(".", 1)
+        columns = self._column_names(table_name)
+        if json_column not in columns:
+            return name
+        generated = self._json_generated_name(json_column, path)
+        if generated in columns:
+            return generated
+        return f"json_extract({json_column}, '$.{path}')"
+
+    def _json_select_expr(self, table_name: str, name: str) -> str:
+        """
+        取得カラムのJSONパスを置き換え（結果のキーは指定したJSONパスのまま）
+        """
+        expr = self._json_path_sql(table_name, name)
+        return name if expr == name else f'{expr} AS "{name}"'
+
+    def _json_order_by(self, table_name: str, order_by: str) -> str:
+        """
+        ORDER BY句のJSONパスを置き換え（"response_data.status DESC, id"）
+        """
+        terms = []
+        for term in order_by.split(","):
+            parts = term.split()
+            if parts:
+                parts[0] = self._json_path_sql(table_name, parts[0])
+            terms.append(" ".join(parts))
+        return ", ".join(terms)
+
+    def _executemany_grouped(self, statements: Dict[str, List[tuple]]) -> int:
+        """
+        SQLごとにまとめたパラメータを1トランザクションでexecutemany
+
+        Args:
+            statements: {SQL: パラメータリスト}
+
+        Returns:
+            影響行数の合計
+        """
+        affected = 0
+        with self._write_transaction() as conn:
+            for sql, params_list in statements.items():
+                self._notify_observers(sql, params_list[0])
+                cursor = conn.executemany(sql, params_list)
+                affected += cursor.rowcount
+        return affected
+
+    def select(
+        self,
+        table_name: str,
+        columns: Optional[List[str]] = None,
+        condition: Optional[Dict[str, Any]] = None,
+        order_by: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        live_only: Optional[bool] = None,
+        row_format: Optional[str] = None
+    ) -> QueryResult:
+        """
+        データを取得
+
+        Args:
+            table_name: テーブル名
+            columns: 取得カラムリスト（Noneの場合は全カラム）
+            condition: 検索条件
+            order_by: ソート順（例: "created_at DESC"）
+            limit: 取得件数制限
+            offset: オフセット
+            live_only: 論理削除済みの行を除外する（Noneの場合は設定のlive_rows_only）
+            row_format: 結果形式（Noneの場合は設定のrow_format）
+                - "dict": 辞書のリスト
+                - "tuple": タプルのリスト
+                - "record": カラム名で属性アクセスできるレコード（namedtuple）のリスト
+                - "columnar": {カラム名: 値のリスト}
+
+        Returns:
+            取得データ（row_formatの形式）
+        """
+        try:
+            # SELECT SQL生成（LIMIT/OFFSETはパラメータ化してSQLを再利用）
+            select_sql = self._build_select_sql(
+                table_name,
+                columns,
+                list(condition.keys()) if condition else [],
+                order_by=order_by,
+                has_limit=bool(limit or offset),
+                has_offset=bool(offset),
+                live_only=self._use_live_filter(table_name, live_only)
+            )
+            params: List[Any] = list(condition.values()) if condition else []
+
+            if limit or offset:
+                params.append(limit or -1)
+            if offset:
+                params.append(offset)
+
+            # クエリ実行
+            self._notify_observers(select_sql, params)
+            result = self._fetch_formatted(select_sql, params, row_format)
+
+            self.logger.debug(
+                f"データ取得成功",
+                context={"table_name": table_name, "count": self._result_count(result)}
+            )
+
+            return result
+
+        except Exception as e:
+            self.logger.error(
+                f"データ取得エラー",
+                context={"table_name": table_name, "error": str(e)},
+                exc_info=True
+            )
+            raise
+
+    def query(
+        self,
+        sql: str,
+        params: Optional[Union[tuple, List[Any]]] = None,
+        row_format: Optional[str] = None
+    ) -> QueryResult:
+        """
+        SQLクエリを実行
+
+        Args:
+            sql: SQLクエリ
+            params: パラメータ（パラメータ化クエリ）
+            row_format: SELECT結果の形式（dict / tuple / record / columnar。
+                Noneの場合は設定のrow_format）
+
+        Returns:
+            クエリ結果
+        """
+        try:
+            params = params or []
+            self._notify_observers(sql, params)
+
+            # SELECT文の場合は結果を返す
+            if sql.strip().upper().startswith("SELECT"):
+                result = self._fetch_formatted(sql, params, row_format)
+
+                self.logger.debug(
+                    f"クエリ実行成功",
+                    context={"sql": sql[:100], "count": self._result_count(result)}
+                )
+
+                return result
+            else:
+                # DMLはロック取得を再試行、DDLは文ごとにコミット、PRAGMA/VACUUM等はそのまま実行
+                if self.DML_PATTERN.match(sql):
+                    with self._write_statement() as conn:
+                        cursor = conn.execute(sql, params)
+                elif self.DDL_PATTERN.match(sql):
+                    with self._write_transaction() as conn:
+                        cursor = conn.execute(sql, params)
+                else:
+                    cursor = self.conn.execute(sql, params)
+
+                # INSERT/UPDATE/DELETE等の場合は影響行数を返す
+                self.logger.info(
+                    f"クエリ実行成功",
+                    context={"sql": sql[:100], "rowcount": cursor.rowcount}
+                )
+
+                return [{"rowcount": cursor.rowcount}]
+
+        except Exception as e:
+            self.logger.error(
+                f"クエリ実行エラー",
+                context={"sql": sql[:100], "error": str(e)},
+                exc_info=True
+            )
+            raise
+
+    def run_parallel(
+        self,
+        queries: List[Union[str, Tuple[str, Union[tuple, List[Any]]]]],
+        row_format: Optional[str] = None
+    ) -> List[QueryResult]:
+        """
+        独立した複数のSELECTを読み取り専用接続で並列実行し、指定順に結果を返す
+
+        sqlite3はステートメント実行中にGILを解放するため、集計クエリ等はCPUコア数まで並列に進む。
+        各クエリは別接続（mode=ro）で実行されるため、書き込み文はエラーになる。
+        :memory:データベースは接続間でデータを共有できないため順次実行する。
+
+        Args:
+            queries: SQL、または(SQL, パラメータ)のリスト
+            row_format: 結果形式（Noneの場合は設定のrow_format）
+
+        Returns:
+            各クエリの結果リスト（queriesと同じ順序）
+        """
+        normalized = [
+            (query, []) if isinstance(query, str) else (query[0], list(query[1]))
+            for query in queries
+        ]
+        start = time.perf_counter()
+
+        try:
+            if self._in_memory or len(normalized) <= 1:
+                results = []
+                for sql, params in normalized:
+                    self._notify_observers(sql, params)
+                    results.append(self._fetch_formatted(sql, params, row_format))
+                return results
+
+            executor = self._get_parallel_executor()
+
+            def run(sql: str, params: List[Any]) -> QueryResult:
+                try:
+                    conn = self._read_only_pool.get_nowait()
+                except queue.Empty:
+                    conn = self._create_read_only_connection()
+                    with self._parallel_lock:
+                        self._read_only_conns.append(conn)
+                try:
+                    self._notify_observers(sql, params)
+                    return self._fetch_formatted(sql, params, row_format, conn)
+                finally:
+                    self._read_only_pool.put(conn)
+
+            futures = [executor.submit(run, sql, params) for sql, params in normalized]
+            results = [future.result() for future in futures]
+
+            self.logger.debug(
+                f"並列クエリ実行成功",
+                context={
+                    "queries": len(normalized),
+                    "workers": self.parallel_workers,
+                    "elapsed_sec": round(time.perf_counter() - start, 3)
+                }
+            )
+
+            return results
+
+        except Exception as e:
+            self.logger.error(
+                f"並列クエリ実行エラー",
+                context={"queries": len(normalized), "error": str(e)},
+                exc_info=True
+            )
+            raise
+
+    def _get_parallel_executor(self) -> ThreadPoolExecutor:
+        """
+        run_parallel用のスレッドプールを取得（初回に作成）
+        """
+        with self._parallel_lock:
+            if self._parallel_executor is None:
+                self._parallel_executor = ThreadPoolExecutor(
+                    max_workers=self.parallel_workers,
+                    thread_name_prefix="sqlite-parallel"
+                )
+            return self._parallel_executor
+
+    def iter_query(
+        self,
+        sql: str,
+        params: Optional[Union[tuple, List[Any]]] = None,
+        fetch_size: Optional[int] = None,
+        row_format: str = "dict"
+    ) -> Iterator[Any]:
+        """
+        SELECTクエリの結果を1行ずつ返すジェネレータ
+
+        fetchmanyでfetch_size行ずつ取得するため、結果全体をメモリに載せない。
+
+        Args:
+            sql: SELECTクエリ
+            params: パラメータ（パラメータ化クエリ）
+            fetch_size: 1回のfetchmanyで取得する行数（Noneの場合は設定値）
+            row_format: 1行の形式（dict / tuple / record）
+
+        Yields:
+            1行分のデータ（row_formatの形式）
+        """
+        if row_format not in ("dict", "tuple", "record"):
+            raise ValueError(f"iter_queryで使用できないrow_format: {row_format}")
+        fetch_size = fetch_size or self.fetch_size
+        count = 0
+
+        try:
+            self._notify_observers(sql, params or [])
+            cursor = self.conn.cursor()
+            if row_format != "dict":
+                cursor.row_factory = None
+            cursor.execute(sql, params or [])
+            convert: Callable[[Any], Any] = dict
+            if row_format == "tuple":
+                convert = tuple
+            elif row_format == "record":
+                names = [desc[0] for desc in cursor.description]
+                convert = self._record_class(names)._make
+            try:
+                while True:
+                    rows = cursor.fetchmany(fetch_size)
+                    if not rows:
+                        break
+                    for row in rows:
+                        yield convert(row)
+                    count += len(rows)
+            finally:
+                cursor.close()
+
+            self.logger.debug(
+                f"ストリーミング取得完了",
+                context={"sql": sql[:100], "count": count}
+            )
+
+        except Exception as e:
+            self.logger.error(
+                f"ストリーミング取得エラー",
+                context={"sql": sql[:100], "count": count, "error": str(e)},
+                exc_info=True
+            )
+            raise
+
+    def _fetch_formatted(
+        self,
+        sql: str,
+        params: Union[tuple, List[Any]],
+        row_format: Optional[str],
+        conn: Optional[sqlite3.Connection] = None
+    ) -> QueryResult:
+        """
+        SELECTを実行してrow_formatの形式で結果を返す
+
+        dict以外はsqlite3.Rowを生成せずタプルで受け取る（1行あたりのオブジェクト数を減らす）。
+
+        Args:
+            sql: SELECTクエリ
+            params: パラメータ
+            row_format: 結果形式（Noneの場合は設定のrow_format）
+            conn: 使用する接続（Noneの場合は現在のスレッドの接続）
+
+        Returns:
+            取得データ（row_formatの形式）
+        """
+        row_format = row_format or self.row_format
+        if row_format not in self.ROW_FORMATS:
+            raise ValueError(f"無効なrow_format: {row_format}")
+        conn = conn or self.conn
+
+        with self._serialized(conn):
+            if row_format == "dict":
+                return [dict(row) for row in conn.execute(sql, params).fetchall()]
+
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            try:
+                cursor.execute(sql, params)
+                names = [desc[0] for desc in cursor.description]
+
+                if row_format == "tuple":
+                    return cursor.fetchall()
+                if row_format == "record":
+                    return list(map(self._record_class(names)._make, cursor))
+
+                # 列ごとのリスト（fetch_size行ずつ追加するため、行タプル全体を保持しない）
+                column_lists: List[List[Any]] = [[] for _ in names]
+                while True:
+                    rows = cursor.fetchmany(self.fetch_size)
+                    if not rows:
+                        break
+                    for values, column_values in zip(column_lists, zip(*rows)):
+                        values.extend(column_values)
+                return dict(zip(names, column_lists))
+            finally:
+                cursor.close()
+
+    def _record_class(self, names: List[str]) -> type:
+        """
+        カラム構成ごとのレコードクラス（namedtuple）を取得
+
+        namedtupleは__slots__ = ()のタプルのため、1行あたりのメモリは辞書の半分以下になる。
+        識別子として使えないカラム名（"COUNT(*)"等）は_0, _1...に置き換える。
+
+        Args:
+            names: カラム名リスト
+
+        Returns:
+            レコードクラス
+        """
+        key = tuple(names)
+        record = self._record_classes.get(key)
+        if record is None:
+            record = namedtuple("Record", names, rename=True)
+            self._record_classes[key] = record
+        return record
+
+    def _result_count(self, result: QueryResult) -> int:
+        """
+        取得結果の行数
+        """
+        if isinstance(result, dict):
+            return len(next(iter(result.values()), []))
+        return len(result)
+
+    def select_page(
+        self,
+        table_name: str,
+        key_column: str = "rowid",
+        after: Optional[Any] = None,
+        limit: int = 100,
+        columns: Optional[List[str]] = None,
+        condition: Optional[Dict[str, Any]] = None,
+        descending: bool = False,
+        live_only: Optional[bool] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[Any]]:
+        """
+        キーセット方式で1ページ分のデータを取得
+
+        OFFSETではなく「WHERE key > ? ORDER BY key LIMIT n」で取得するため、
+        深いページでも先頭ページと同じコストで取得できる。
+
+        Args:
+            table_name: テーブル名
+            key_column: ページングキー（一意かつインデックス付きのカラム）
+            after: 前ページの最終キー（Noneの場合は先頭ページ）
+            limit: 1ページの件数
+            columns: 取得カラムリスト（Noneの場合は全カラム）
+            condition: 検索条件
+            descending: 降順でページングする
+            live_only: 論理削除済みの行を除外する（Noneの場合は設定のlive_rows_only）
+
+        Returns:
+            (取得データリスト, 次ページ取得用のキー。最終ページの場合はNone)
+        """
+        try:
+            columns_sql = ", ".join(columns) if columns else "*"
+            select_sql = (
+                f"SELECT {key_column} AS _page_key, {columns_sql} FROM {table_name}"
+            )
+            clauses = []
+            params: List[Any] = []
+
+            if condition:
+                clauses.extend(f"{col} = ?" for col in condition.keys())
+                params.extend(condition.values())
+
+            if self._use_live_filter(table_name, live_only):
+                clauses.append("deleted_at IS NULL")
+
+            if after is not None:
+                clauses.append(f"{key_column} {'<' if descending else '>'} ?")
+                params.append(after)
+
+            if clauses:
+                select_sql += " WHERE " + " AND ".join(clauses)
+
+            direction = "DESC" if descending else "ASC"
+            select_sql += f" ORDER BY {key_column} {direction} LIMIT ?"
+            params.append(limit)
+
+            self._notify_observers(select_sql, params)
+            cursor = self.conn.execute(select_sql, params)
+            rows = cursor.fetchmany(limit)
+
+            result = []
+            last_key = None
+            for row in rows:
+                record = dict(row)
+                last_key = record.pop("_page_key")
+                result.append(record)
+
+            next_key = last_key if len(result) == limit else None
+
+            self.logger.debug(
+                f"ページ取得成功",
+                context={"table_name": table_name, "after": after, "count": len(result)}
+            )
+
+            return result, next_key
+
+        except Exception as e:
+            self.logger.error(
+                f"ページ取得エラー",
+                context={"table_name": table_name, "after": after, "error": str(e)},
+                exc_info=True
+            )
+            raise
+
+    def iter_select(
+        self,
+        table_name: str,
+        columns: Optional[List[str]] = None,
+        condition: Optional[Dict[str, Any]] = None,
+        key_column: str = "rowid",
+        page_size: Optional[int] = None,
+        descending: bool = False,
+        live_only: Optional[bool] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        テーブル全体をキーセットページングで1行ずつ返すジェネレータ
+
+        ページごとに短いクエリを発行するため、長時間の読み取りトランザクションを
+        保持せず、メモリ使用量もページサイズ分で一定になる。
+
+        Args:
+            table_name: テーブル名
+            columns: 取得カラムリスト（Noneの場合は全カラム）
+            condition: 検索条件
+            key_column: ページングキー（一意かつインデックス付きのカラム）
+            page_size: 1ページの件数（Noneの場合は設定のfetch_size）
+            descending: 降順で取得する
+            live_only: 論理削除済みの行を除外する（Noneの場合は設定のlive_rows_only）
+
+        Yields:
+            1行分のデータ（辞書）
+        """
+        page_size = page_size or self.fetch_size
+        after = None
+
+        while True:
+            rows, after = self.select_page(
+                table_name,
+                key_column=key_column,
+                after=after,
+                limit=page_size,
+                columns=columns,
+                condition=condition,
+                descending=descending,
+                live_only=live_only
+            )
+            yield from rows
+
+            if after is None:
+                break
+
+    def bulk_insert_from_df(
+        self,
+        table_name: str,
+        df: pd.DataFrame,
+        if_exists: str = "append"
+    ) -> int:
+        """
+        DataFrameから一括挿入
+
+        Args:
+            table_name: テーブル名
+            df: pandas DataFrame
+            if_exists: 既存テーブルへの動作（'fail', 'replace', 'append'）
+
+        Returns:
+            挿入された行数
+        """
+        try:
+            # DataFrameをSQLiteに保存
+            df.to_sql(
+                table_name,
+                self.conn,
+                if_exists=if_exists,
+                index=False
+            )
+
+            inserted_count = len(df)
+
+            self.logger.info(
+                f"DataFrame一括挿入成功",
+                context={"table_name": table_name, "count": inserted_count}
+            )
+
+            return inserted_count
+
+        except Exception as e:
+            self.logger.error(
+                f"DataFrame一括挿入エラー",
+                context={"table_name": table_name, "error": str(e)},
+                exc_info=True
+            )
+            raise
+
+    def load_dataframe(
+        self,
+        table_name: str,
+        df: pd.DataFrame,
+        if_exists: str = "append",
+        chunk_rows: Optional[int] = None,
+        rebuild_indexes: bool = False
+    ) -> Dict[str, Any]:
+        """
+        DataFrameを高速に一括ロード（to_sqlの代替）
+
+        列ごとの変換方法（日時→ISO文字列、NaN/NA→NULL等）を一度だけ決め、
+        チャンク単位でベクトル化変換してitertuplesをexecutemanyに流し込む。
+        全チャンクを1トランザクションで実行する。
+
+        Args:
+            table_name: テーブル名（存在しない場合はDataFrameの型から作成）
+            df: pandas DataFrame
+            if_exists: 既存テーブルへの動作（'fail', 'replace', 'append'）
+            chunk_rows: 1回のexecutemanyの行数（Noneの場合は設定のdataframe_chunk_rows）
+            rebuild_indexes: ロード前にインデックスを削除し、ロード後に再作成する
+
+        Returns:
+            ロード結果 {"count", "chunks", "elapsed_sec", "rows_per_sec"}
+        """
+        if if_exists not in ("fail", "replace", "append"):
+            raise ValueError(f"無効なif_exists: {if_exists}")
+
+        chunk_rows = chunk_rows or self.dataframe_chunk_rows
+        start = time.perf_counter()
+        loaded_count = 0
+        chunks = 0
+
+        try:
+            columns = [str(col) for col in df.columns]
+            converters = {col: self._dataframe_converter(df[col]) for col in df.columns}
+            insert_sql = self._build_insert_sql(table_name, columns)
+
+            with self._write_transaction() as conn:
+                exists = self.table_exists(table_name)
+                if exists and if_exists == "fail":
+                    raise ValueError(f"テーブルが既に存在します: {table_name}")
+                if exists and if_exists == "replace":
+                    conn.execute(f"DROP TABLE {table_name}")
+                    exists = False
+                if not exists:
+                    self.create_table(table_name, self._schema_from_dataframe(df))
+
+                # インデックスを一時削除（UNIQUE制約由来の自動インデックスは対象外）
+                index_sqls: List[str] = []
+                if rebuild_indexes:
+                    cursor = conn.execute(
+                        "SELECT name, sql FROM sqlite_master "
+                        "WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+                        (table_name,)
+                    )
+                    for name, sql in cursor.fetchall():
+                        index_sqls.append(sql)
+                        conn.execute(f"DROP INDEX {name}")
+
+                for offset in range(0, len(df), chunk_rows):
+                    chunk = df.iloc[offset:offset + chunk_rows]
+                    converted = pd.DataFrame(
+                        {
+                            col: (
+                                converters[col](chunk[col])
+                                if converters[col] else chunk[col]
+                            )
+                            for col in df.columns
+                        },
+                        copy=False
+                    )
+                    conn.executemany(
+                        insert_sql, converted.itertuples(index=False, name=None)
+                    )
+                    loaded_count += len(chunk)
+                    chunks += 1
+
+                # インデックス再作成
+                for sql in index_sqls:
+                    conn.execute(sql)
+
+            elapsed = time.perf_counter() - start
+            result = {
+                "count": loaded_count,
+                "chunks": chunks,
+                "elapsed_sec": round(elapsed, 3),
+                "rows_per_sec": round(loaded_count / elapsed, 1) if elapsed > 0 else 0.0
+            }
+
+            self.logger.info(
+                f"DataFrameロード成功",
+                context={
+                    "table_name": table_name,
+                    "rebuilt_indexes": len(index_sqls),
+                    **result
+                }
+            )
+
+            return result
+
+        except Exception as e:
+            self.logger.error(
+                f"DataFrameロードエラー",
+                context={"table_name": table_name, "error": str(e)},
+                exc_info=True
+            )
+            raise
+
+    def _dataframe_converter(
+        self,
+        series: pd.Series
+    ) -> Optional[Callable[[pd.Series], pd.Series]]:
+        """
+        列のdtypeに応じたsqlite3バインド用の変換関数を選択
+
+        Args:
+            series: DataFrameの1列
+
+        Returns:
+            変換関数（変換不要の場合はNone）
+        """
+        dtype = series.dtype
+
+        def to_nullable(values: pd.Series) -> pd.Series:
+            return values.astype(object).where(values.notna(), None)
+
+        def to_iso(values: pd.Series) -> pd.Series:
+            # datetime.isoformat()と同じ形式（マイクロ秒が0なら省略、UTCオフセットは+HH:MM）
+            local = values.dt.tz_localize(None) if values.dt.tz is not None else values
+            stamps = local.to_numpy(dtype="datetime64[us]")
+            text = np.datetime_as_string(stamps, unit="us")
+            whole_seconds = stamps.astype("datetime64[s]") == stamps
+            text = np.where(whole_seconds, text.astype("<U19"), text).astype(object)
+            if values.dt.tz is not None:
+                offset = values.dt.strftime("%z").to_numpy(
+                    dtype=object, na_value="+0000"
+                )
+                text = text + np.array(
+                    [f"{tz[:3]}:{tz[3:]}" for tz in offset], dtype=object
+                )
+            return pd.Series(text, index=values.index, dtype=object).where(
+                values.notna(), None
+            )
+
+        if pd.api.types.is_datetime64_any_dtype(dtype):
+            return to_iso
+        if pd.api.types.is_timedelta64_dtype(dtype):
+            return lambda values: to_nullable(values.dt.total_seconds())
+        if pd.api.types.is_extension_array_dtype(dtype) or dtype == object:
+            return to_nullable
+        if pd.api.types.is_bool_dtype(dtype):
+            return lambda values: values.astype("int64")
+        # NumPyの整数・浮動小数はそのままバインド（NaNはSQLite側でNULLとして格納される）
+        if pd.api.types.is_integer_dtype(dtype) or pd.api.types.is_float_dtype(dtype):
+            return None
+        return to_nullable
+
+    def _schema_from_dataframe(self, df: pd.DataFrame) -> Dict[str, str]:
+        """
+        DataFrameのdtypeからテーブルスキーマを作成
+
+        Args:
+            df: pandas DataFrame
+
+        Returns:
+            カラム定義 {"column_name": "TYPE"}
+        """
+        schema: Dict[str, str] = {}
+        for col, dtype in df.dtypes.items():
+            if (
+                pd.api.types.is_bool_dtype(dtype)
+                or pd.api.types.is_integer_dtype(dtype)
+            ):
+                schema[str(col)] = "INTEGER"
+            elif (
+                pd.api.types.is_float_dtype(dtype)
+                or pd.api.types.is_timedelta64_dtype(dtype)
+            ):
+                schema[str(col)] = "REAL"
+            elif pd.api.types.is_datetime64_any_dtype(dtype):
+                schema[str(col)] = "TIMESTAMP"
+            else:
+                schema[str(col)] = "TEXT"
+        return schema
+
+    def to_dataframe(
+        self,
+        table_name: str,
+        condition: Optional[Dict[str, Any]] = None,
+        sql: Optional[str] = None,
+        columnar: bool = False,
+        dtypes: Optional[Dict[str, str]] = None,
+        live_only: Optional[bool] = None
+    ) -> pd.DataFrame:
+        """
+        SQLite → DataFrame変換
+
+        Args:
+            table_name: テーブル名
+            condition: 検索条件
+            sql: カスタムSQLクエリ（指定時はconditionは無視）
+            columnar: カーソルから列単位で型付き配列へ直接変換する（大量行向け）
+            dtypes: 列ごとのdtype上書き（columnar=True時のみ。未指定はテーブル定義から推定）
+            live_only: 論理削除済みの行を除外する（Noneの場合は設定のlive_rows_only。カスタムSQLには適用しない）
+
+        Returns:
+            pandas DataFrame
+        """
+        try:
+            if columnar:
+                # 列単位の高速パス（件数分の配列を確保してチャンクごとに書き込み、チャンクは都度解放）
+                df = pd.DataFrame(
+                    self._collect_columns(
+                        table_name, condition, sql, dtypes, live_only
+                    ),
+                    copy=False
+                )
+            elif sql:
+                # カスタムSQL
+                df = pd.read_sql_query(sql, self.conn)
+            else:
+                # テーブル全体または条件付き取得
+                condition = condition or {}
+                sql = self._build_select_sql(
+                    table_name, None, list(condition.keys()),
+                    live_only=self._use_live_filter(table_name, live_only)
+                )
+                df = pd.read_sql_query(sql, self.conn, params=list(condition.values()))
+
+            self.logger.debug(
+                f"DataFrame変換成功",
+                context={"table_name": table_name, "rows": len(df)}
+            )
+
+            return df
+
+        except Exception as e:
+            self.logger.error(
+                f"DataFrame変換エラー",
+                context={"table_name": table_name, "error": str(e)},
+                exc_info=True
+            )
+            raise
+
+    def iter_dataframes(
+        self,
+        table_name: str,
+        condition: Optional[Dict[str, Any]] = None,
+        sql: Optional[str] = None,
+        params: Optional[Union[tuple, List[Any]]] = None,
+        chunk_rows: Optional[int] = None,
+        dtypes: Optional[Dict[str, str]] = None,
+        live_only: Optional[bool] = None
+    ) -> Iterator[pd.DataFrame]:
+        """
+        chunk_rows行ずつDataFrameを返すジェネレータ
+
+        行を辞書に変換せず、カーソルのバッチを列単位で型付き配列に変換する。
+
+        Args:
+            table_name: テーブル名（dtype推定にも使用）
+            condition: 検索条件
+            sql: カスタムSQLクエリ（指定時はconditionは無視）
+            params: カスタムSQLのパラメータ
+            chunk_rows: 1チャンクの行数（Noneの場合は設定のdataframe_chunk_rows）
+            dtypes: 列ごとのdtype上書き（未指定はテーブル定義から推定）
+            live_only: 論理削除済みの行を除外する（Noneの場合は設定のlive_rows_only。カスタムSQLには適用しない）
+
+        Yields:
+            チャンクごとのpandas DataFrame
+        """
+        for columns in self._iter_column_chunks(
+            table_name, condition, sql, params, dtypes, chunk_rows, live_only=live_only
+        ):
+            yield pd.DataFrame(columns, copy=False)
+
+    def _iter_column_chunks(
+        self,
+        table_name: str,
+        condition: Optional[Dict[str, Any]],
+        sql: Optional[str],
+        params: Optional[Union[tuple, List[Any]]],
+        dtypes: Optional[Dict[str, str]],
+        chunk_rows: Optional[int] = None,
+        live_only: Optional[bool] = None
+    ) -> Iterator[Dict[str, pd.Series]]:
+        """
+        カーソルのバッチを列ごとの型付きSeriesに変換して返す
+
+        Args:
+            table_name: テーブル名
+            condition: 検索条件
+            sql: カスタムSQLクエリ
+            params: カスタムSQLのパラメータ
+            dtypes: 列ごとのdtype上書き
+            chunk_rows: 1チャンクの行数
+            live_only: 論理削除済みの行を除外する
+
+        Yields:
+            {カラム名: Series}（結果が0行の場合も列定義のみで1回返す）
+        """
+        chunk_rows = chunk_rows or self.dataframe_chunk_rows
+
+        if not sql:
+            condition = condition or {}
+            sql = self._build_select_sql(
+                table_name, None, list(condition.keys()),
+                live_only=self._use_live_filter(table_name, live_only)
+            )
+            params = list(condition.values())
+
+        dtype_map = self._dtype_map(table_name)
+        dtype_map.update(dtypes or {})
+
+        cursor = self.conn.cursor()
+        cursor.row_factory = None  # sqlite3.Rowを生成せずタプルで受け取る
+        try:
+            cursor.execute(sql, params or [])
+            names = [desc[0] for desc in cursor.description]
+            total = 0
+
+            while True:
+                rows = cursor.fetchmany(chunk_rows)
+                if not rows and total:
+                    break
+
+                column_values = list(zip(*rows)) if rows else [() for _ in names]
+                yield {
+                    name: self._to_series(values, dtype_map.get(name), name)
+                    for name, values in zip(names, column_values)
+                }
+
+                total += len(rows)
+                if not rows:
+                    break
+
+            self.logger.debug(
+                f"列単位取得完了",
+                context={
+                    "table_name": table_name, "rows": total, "chunk_rows": chunk_rows
+                }
+            )
+        finally:
+            cursor.close()
+
+    def _collect_columns(
+        self,
+        table_name: str,
+        condition: Optional[Dict[str, Any]],
+        sql: Optional[str],
+        dtypes: Optional[Dict[str, str]],
+        live_only: Optional[bool]
+    ) -> Dict[str, pd.Series]:
+        """
+        COUNT(*)の件数で列ごとの配列を確保し、_iter_column_chunksのチャンクを順に書き込む
+
+        全チャンクを保持してから連結しないため、ピークメモリは結果1つ分＋1チャンク程度になる。
+        NumPy型の列はその型、Int64列は値とNULLマスクの配列、その他の拡張型はobject配列に書き込み、
+        最後に1列ずつ変換する。チャンク間で型が変わった列は共通の型（なければobject）に変換する。
+
+        Args:
+            table_name: テーブル名
+            condition: 検索条件
+            sql: カスタムSQLクエリ
+            dtypes: 列ごとのdtype上書き
+            live_only: 論理削除済みの行を除外する
+
+        Returns:
+            {カラム名: Series}
+        """
+        count_sql, count_params = sql, []
+        if not count_sql:
+            condition = condition or {}
+            count_sql = self._build_select_sql(
+                table_name, None, list(condition.keys()),
+                live_only=self._use_live_filter(table_name, live_only)
+            )
+            count_params = list(condition.values())
+        capacity = self.conn.execute(
+            f"SELECT COUNT(*) FROM ({count_sql})", count_params
+        ).fetchone()[0]
+
+        buffers: Dict[str, Dict[str, Any]] = {}
+        size = 0
+        for chunk in self._iter_column_chunks(
+            table_name, condition, sql, None, dtypes, live_only=live_only
+        ):
+            rows = len(next(iter(chunk.values()))) if chunk else 0
+            # COUNT(*)の後に行が増えた場合は配列を拡張
+            if size + rows > capacity:
+                capacity = max(size + rows, capacity * 2)
+                for buffer in buffers.values():
+                    buffer["values"] = np.resize(buffer["values"], capacity)
+                    if buffer["mask"] is not None:
+                        buffer["mask"] = np.resize(buffer["mask"], capacity)
+
+            for name, series in chunk.items():
+                buffer = buffers.get(name)
+                if buffer is None:
+                    buffer = buffers[name] = self._new_column_buffer(
+                        series.dtype, capacity
+                    )
+                elif series.dtype != buffer["dtype"]:
+                    buffer = buffers[name] = self._widen_column_buffer(
+                        buffer, series.dtype
+                    )
+
+                if buffer["mask"] is not None:
+                    buffer["values"][size:size + rows] = series.array.to_numpy(
+                        dtype="int64", na_value=0
+                    )
+                    buffer["mask"][size:size + rows] = series.array.isna()
+                else:
+                    buffer["values"][size:size + rows] = series.to_numpy(
+                        dtype=buffer["values"].dtype
+                    )
+            size += rows
+
+        columns: Dict[str, pd.Series] = {}
+        for name in list(buffers):
+            buffer = buffers.pop(name)
+            values = buffer["values"][:size]
+            if buffer["mask"] is not None:
+                columns[name] = pd.Series(
+                    pd.arrays.IntegerArray(values, buffer["mask"][:size]), copy=False
+                )
+            elif isinstance(buffer["dtype"], np.dtype):
+                columns[name] = pd.Series(values, copy=False)
+            else:
+                columns[name] = pd.Series(values, dtype=buffer["dtype"])
+        return columns
+
+    @staticmethod
+    def _new_column_buffer(dtype: Any, capacity: int) -> Dict[str, Any]:
+        """
+        1列分の書き込み先配列を作成（{"dtype", "values", "mask"}）
+        """
+        if dtype == "Int64":
+            return {
+                "dtype": dtype,
+                "values": np.empty(capacity, dtype="int64"),
+                "mask": np.empty(capacity, dtype=bool)
+            }
+        numpy_dtype = dtype if isinstance(dtype, np.dtype) else np.dtype(object)
+        return {
+            "dtype": dtype,
+            "values": np.empty(capacity, dtype=numpy_dtype),
+            "mask": None
+        }
+
+    @staticmethod
+    def _widen_column_buffer(buffer: Dict[str, Any], dtype: Any) -> Dict[str, Any]:
+        """
+        チャンク間で型が変わった列の配列を共通の型（NumPy型同士で昇格できない場合はobject）に変換
+        """
+        current = buffer["dtype"]
+        if (
+            isinstance(current, np.dtype)
+            and isinstance(dtype, np.dtype)
+            and current != np.dtype(object)
+        ):
+            try:
+                widened = np.promote_types(current, dtype)
+            except TypeError:
+                widened = np.dtype(object)
+        else:
+            widened = np.dtype(object)
+
+        if buffer["mask"] is not None:
+            values = buffer["values"].astype(object)
+            values[buffer["mask"]] = None
+        else:
+            values = buffer["values"].astype(widened)
+        return {"dtype": widened, "values": values, "mask": None}
+
+    def _dtype_map(self, table_name: str) -> Dict[str, str]:
+        """
+        テーブル定義（型アフィニティ）からpandasのdtypeマップを作成
+
+        Args:
+            table_name: テーブル名
+
+        Returns:
+            {カラム名: dtype}（テーブルが存在しない場合は空）
+        """
+        dtype_map: Dict[str, str] = {}
+        if not table_name or not self.table_exists(table_name):
+            return dtype_map
+
+        for col in self.get_table_info(table_name):
+            declared = (col["type"] or "").upper()
+            if "INT" in declared:
+                # NOT NULL/主キーはNumPyの整数型、それ以外はNULLを許容する整数型
+                not_null = col["notnull"] or col["pk"]
+                dtype_map[col["name"]] = "int64" if not_null else "Int64"
+            elif any(t in declared for t in ("REAL", "FLOA", "DOUB")):
+                dtype_map[col["name"]] = "float64"
+            elif any(t in declared for t in ("CHAR", "CLOB", "TEXT")):
+                dtype_map[col["name"]] = "object"
+
+        return dtype_map
+
+    def _to_series(
+        self,
+        values: tuple,
+        dtype: Optional[str],
+        name: Optional[str] = None
+    ) -> pd.Series:
+        """
+        1列分の値を型付きSeriesに変換（型が合わない値がある場合は警告を出して推定にフォールバック）
+
+        Args:
+            values: 1列分の値
+            dtype: pandasのdtype（Noneの場合は推定）
+            name: カラム名（警告ログ用）
+
+        Returns:
+            pandas Series
+        """
+        if dtype:
+            try:
+                return pd.Series(values, dtype=dtype)
+            except (TypeError, ValueError) as e:
+                self.logger.warning(
+                    "dtype変換失敗のため型推定にフォールバック",
+                    context={"column": name, "dtype": dtype, "error": str(e)}
+                )
+        return pd.Series(values)
+
+    def get_profile_report(
+        self,
+        top: Optional[int] = 20,
+        sort_by: str = "total_ms"
+    ) -> List[Dict[str, Any]]:
+        """
+        クエリプロファイルを取得（sqlite.profiling.enabled: true の場合のみ）
+
+        Args:
+            top: 上位件数（Noneの場合は全件）
+            sort_by: ソートキー（total_ms, max_ms, count, rows）
+
+        Returns:
+            形状ごとの統計リスト
+            （count, total_ms, avg_ms, max_ms, rows, histogram, plan, full_scan）
+        """
+        if not self.profiler:
+            self.logger.warning("プロファイリングが無効です（sqlite.profiling.enabled）")
+            return []
+        return self.profiler.report(top=top, sort_by=sort_by)
+
+    def table_exists(self, table_name: str) -> bool:
+        """
+        テーブルの存在確認
+
+        Args:
+            table_name: テーブル名
+
+        Returns:
+            テーブルが存在する場合True
+        """
+        try:
+            sql = "SELECT name FROM sqlite_master WHERE type='table' AND name=?"
+            cursor = self.conn.execute(sql, (table_name,))
+            return cursor.fetchone() is not None
+
+        except Exception as e:
+            self.logger.error(
+                f"テーブル存在確認エラー",
+                context={"table_name": table_name, "error": str(e)},
+                exc_info=True
+            )
+            raise
+
+    def get_table_info(self, table_name: str) -> List[Dict[str, Any]]:
+        """
+        テーブル情報を取得
+
+        Args:
+            table_name: テーブル名
+
+        Returns:
+            カラム情報リスト
+        """
+        try:
+            cursor = self.conn.execute(f"PRAGMA table_info({table_name})")
+            columns = cursor.fetchall()
+
+            result = [dict(col) for col in columns]
+
+            self.logger.debug(
+                f"テーブル情報取得成功",
+                context={"table_name": table_name, "columns": len(result)}
+            )
+
+            return result
+
+        except Exception as e:
+            self.logger.error(
+                f"テーブル情報取得エラー",
+                context={"table_name": table_name, "error": str(e)},
+                exc_info=True
+            )
+            raise
+
+    def backup(
+        self,
+        dest: Union[str, Path],
+        pages_per_step: Optional[int] = None,
+        sleep: Optional[float] = None,
+        keep: Optional[int] = None,
+        compress: Optional[bool] = None
+    ) -> Dict[str, Any]:
+        """
+        オンラインバックアップ（sqlite3のバックアップAPIで書き込みを止めずに複製）
+
+        pages_per_stepページずつコピーし、ステップ間でsleep秒待機する。
+        WALモードでは専用接続で読み取りトランザクションを保持し、開始時点のスナップショットを複製する
+        （他接続の書き込みはそのまま進み、コピーのやり直しも発生しない）。
+        一時ファイルに書き出してから置き換えるため、出力先に不完全なファイルは残らない。
+
+        Args:
+            dest: 出力先。既存ディレクトリの場合は{DB名}_{YYYYmmdd_HHMMSS}.dbのスナップショットを作成し、
+                keep世代を超えた古いスナップショットを削除する
+            pages_per_step: 1ステップでコピーするページ数（Noneの場合は設定値）
+            sleep: ステップ間の待機秒数（Noneの場合は設定値）
+            keep: ディレクトリ指定時に残すスナップショット数（Noneの場合は設定値）
+            compress: gzip圧縮して.gzで出力する（Noneの場合は設定値）
+
+        Returns:
+            バックアップ結果 {"path", "pages", "steps", "elapsed_sec", "size_bytes", "removed"}
+        """
+        backup_config = self.sqlite_config.get("backup", {})
+        pages_per_step = pages_per_step or backup_config.get("pages_per_step", 256)
+        sleep = sleep if sleep is not None else backup_config.get("sleep", 0.005)
+        keep = keep or backup_config.get("keep", 7)
+        if compress is None:
+            compress = backup_config.get("compress", False)
+
+        dest = Path(dest)
+        snapshot_dir = dest if dest.is_dir() else None
+        if snapshot_dir is not None:
+            stem = Path(self.db_path).stem if self.db_path != ":memory:" else "memory"
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            dest = snapshot_dir / f"{stem}_{timestamp}.db"
+        else:
+            dest.parent.mkdir(parents=True, exist_ok=True)
+        final_path = dest.with_name(dest.name + ".gz") if compress else dest
+        tmp_path = dest.with_name(dest.name + ".tmp")
+
+        start = time.perf_counter()
+        progress_state = {"steps": 0, "pages": 0}
+
+        def progress(status: int, remaining: int, total: int) -> None:
+            progress_state["steps"] += 1
+            progress_state["pages"] = total
+
+        # ファイルDBは呼び出し元のトランザクションと分離するため専用接続から複製
+        if self._in_memory:
+            source = self.conn
+        else:
+            source = sqlite3.connect(
+                self.db_path, timeout=self.timeout, isolation_level=None
+            )
+        try:
+            # 他接続の書き込みでバックアップが最初からやり直しにならないよう、WALスナップショットを固定
+            if not self._in_memory:
+                journal_mode = source.execute("PRAGMA journal_mode").fetchone()[0]
+                if journal_mode.lower() == "wal":
+                    source.execute("BEGIN")
+                    source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+
+            target = sqlite3.connect(str(tmp_path))
+            try:
+                # :memory:は他スレッドのトランザクション完了を待ってから複製（コミット前の内容を含めない）
+                with self._serialized(source):
+                    source.backup(
+                        target, pages=pages_per_step, progress=progress, sleep=sleep
+                    )
+            finally:
+                target.close()
+
+            if compress:
+                with open(tmp_path, "rb") as src, gzip.open(final_path, "wb") as dst:
+                    shutil.copyfileobj(src, dst)
+                tmp_path.unlink()
+            else:
+                tmp_path.replace(final_path)
+
+            removed: List[str] = []
+            if snapshot_dir is not None:
+                snapshots = sorted(
+                    path for path in snapshot_dir.glob(f"{stem}_*.db*")
+                    if re.fullmatch(
+                        rf"{re.escape(stem)}_\d{{8}}_\d{{6}}\.db(\.gz)?", path.name
+                    )
+                )
+                for old in snapshots[:-keep]:
+                    old.unlink()
+                    removed.append(str(old))
+
+            result = {
+                "path": str(final_path),
+                "pages": progress_state["pages"],
+                "steps": progress_state["steps"],
+                "elapsed_sec": round(time.perf_counter() - start, 3),
+                "size_bytes": final_path.stat().st_size,
+                "removed": removed,
+            }
+
+            self.logger.info(f"バックアップ成功", context=result)
+
+            return result
+
+        except Exception as e:
+            if tmp_path.exists():
+                tmp_path.unlink()
+            self.logger.error(
+                f"バックアップエラー",
+                context={"dest": str(dest), "error": str(e)},
+                exc_info=True
+            )
+            raise
+
+        finally:
+            if source is not self.conn:
+                source.close()
+
+    def checkpoint(self) -> Optional[Dict[str, Any]]:
+        """
+        現在の内容をディスクへ反映
+
+        メモリモードではメモリ上のDBをバックアップAPIでdb_pathへ保存する
+        （一時ファイルから置き換えるため、保存途中で終了しても直前の保存内容が残る）。
+        他スレッドのトランザクションは完了を待ち、判定と保存の間に書き込みが割り込まないよう
+        共有接続のロックを保持したまま保存する。呼び出し元スレッド自身のトランザクション中は
+        コミット前の内容を保存しないよう延期してNoneを返す。
+        ファイルDBではWALの内容をDB本体へ書き戻し、WALファイルを切り詰める。
+
+        Returns:
+            メモリモード: バックアップ結果（backup()と同じ。延期した場合はNone）
+            ファイルDB: {"busy", "log_frames", "checkpointed_frames"}
+        """
+        if self.persist_path is None:
+            busy, log_frames, checkpointed = self.conn.execute(
+                "PRAGMA wal_checkpoint(TRUNCATE)"
+            ).fetchone()
+            return {
+                "busy": busy,
+                "log_frames": log_frames,
+                "checkpointed_frames": checkpointed
+            }
+
+        return self._persist(blocking=True)
+
+    def _persist(self, blocking: bool) -> Optional[Dict[str, Any]]:
+        """
+        メモリモードで共有接続のロックを保持したままdb_pathへ保存
+
+        Args:
+            blocking: Falseの場合、他スレッドがトランザクション中なら待たずに延期する
+
+        Returns:
+            バックアップ結果（延期した場合はNone）
+        """
+        if not self._shared_lock.acquire(blocking=blocking):
+            return None
+        try:
+            if self.conn.in_transaction:
+                self.logger.warning(
+                    "トランザクション実行中のため永続化を延期",
+                    context={"db_path": self.db_path}
+                )
+                return None
+
+            return self.backup(
+                self.persist_path, pages_per_step=-1, sleep=0, compress=False
+            )
+        finally:
+            self._shared_lock.release()
+
+    def _persist_loop(self) -> None:
+        """
+        メモリモードでpersist_interval秒ごとにdb_pathへ保存（延期・失敗時は1秒後に再試行）
+
+        トランザクション中のスレッドがclose()でこのスレッドの終了を待つ場合があるため、ロックは待たない。
+        """
+        interval = self.persist_interval
+        while not self._persist_stop.wait(interval):
+            try:
+                persisted = self._persist(blocking=False) is not None
+                interval = self.persist_interval if persisted else 1.0
+            except Exception:
+                # エラー内容はbackup()でログ出力済み
+                interval = min(1.0, self.persist_interval)
+
+    @contextmanager
+    def _serialized(self, conn: Optional[sqlite3.Connection] = None) -> Iterator[None]:
+        """
+        :memory:（メモリモードを含む）の共有接続を使う処理を直列化
+
+        全スレッドが1接続を共有するため、他スレッドのトランザクション中に割り込むと
+        そのトランザクションに参加したり、コミット前の内容を読んだりしてしまう。
+        ファイルDB（スレッドごとの接続）や共有接続以外の接続では何もしない。
+
+        Args:
+            conn: 使用する接続（Noneの場合は現在のスレッドの接続）
+        """
+        if not self._in_memory or (conn is not None and conn is not self._shared_conn):
+            yield
+            return
+        with self._shared_lock:
+            yield
+
+    @contextmanager
+    def _write_transaction(
+        self,
+        conn: Optional[sqlite3.Connection] = None
+    ) -> Iterator[sqlite3.Connection]:
+        """
+        書き込み用トランザクション（auto_commitの設定に関わらずBEGIN IMMEDIATE/COMMIT）
+
+        開始時に書き込みロックを取得するため、途中でロック競合（database is locked）が発生しない。
+        呼び出し元で既にトランザクションが開始されている場合はそれに参加し、
+        コミット・ロールバックは呼び出し元に任せる。
+        共有接続（:memory:）では他スレッドのトランザクション完了を待ってから判定する。
+
+        Args:
+            conn: 使用する接続（Noneの場合は現在のスレッドの接続）
+
+        Yields:
+            sqlite3接続
+        """
+        conn = conn or self.conn
+
+        with self._serialized(conn):
+            if conn.in_transaction:
+                yield conn
+                return
+
+            self._begin_immediate(conn)
+            try:
+                yield conn
+            except Exception:
+                conn.rollback()
+                # ロールバックで取り消された子テーブルの作成・削除をキャッシュに残さない
+                self._partition_specs.clear()
+                raise
+            conn.commit()
+
+    @contextmanager
+    def _write_statement(self) -> Iterator[sqlite3.Connection]:
+        """
+        単一文の書き込み（insert/update/delete/query）用の接続を取得
+
+        auto_commit=Trueでは文ごとに_write_transactionで囲み、ロック取得の再試行を適用する。
+        auto_commit=Falseでは未開始ならbegin_transaction()で開始し、コミットは呼び出し元に任せる。
+
+        Yields:
+            sqlite3接続
+        """
+        if self.auto_commit:
+            with self._write_transaction() as conn:
+                yield conn
+            return
+
+        conn = self.conn
+        with self._serialized(conn):
+            if not conn.in_transaction:
+                self.begin_transaction()
+            yield conn
+
+    def _begin_immediate(self, conn: sqlite3.Connection) -> None:
+        """
+        BEGIN IMMEDIATEで書き込みロックを取得（競合時はジッター付き指数バックオフで再試行）
+
+        1回の試行はbusy_timeout_msで打ち切り、待機時間の合計がtimeoutを超えるか
+        max_attemptsに達した場合は最後のエラーを送出する。
+        busy_timeout_msは再試行の間だけ設定し、終了後は接続のbusy_timeout（timeout）に戻す。
+
+        Args:
+            conn: 使用する接続
+        """
+        start = time.perf_counter()
+        deadline = start + self.timeout
+        attempt = 0
+        busy_count = 0
+
+        conn.execute(f"PRAGMA busy_timeout = {int(self.retry_busy_timeout_ms)}")
+        try:
+            while True:
+                try:
+                    conn.execute("BEGIN IMMEDIATE")
+                    break
+                except sqlite3.OperationalError as e:
+                    message = str(e).lower()
+                    if "locked" not in message and "busy" not in message:
+                        raise
+                    busy_count += 1
+                    attempt += 1
+                    remaining = deadline - time.perf_counter()
+                    if attempt >= self.retry_max_attempts or remaining <= 0:
+                        self._record_lock_wait(
+                            start, busy_count, attempt - 1, failed=True
+                        )
+                        self.logger.warning(
+                            f"書き込みロック取得失敗",
+                            context={"attempts": attempt, "error": str(e)}
+                        )
+                        raise
+                    # フルジッター（0〜上限の一様乱数）で複数プロセスの再試行タイミングを分散
+                    delay = random.uniform(
+                        0,
+                        min(
+                            self.retry_max_delay,
+                            self.retry_base_delay * 2 ** (attempt - 1)
+                        )
+                    )
+                    time.sleep(min(delay, remaining))
+        finally:
+            conn.execute(f"PRAGMA busy_timeout = {int(self.timeout * 1000)}")
+
+        self._record_lock_wait(start, busy_count, attempt, failed=False)
+        # 書き込みロック保持中は他プロセスがスキーマを変更できないため、ここで1回だけ確認
+        self._check_partition_specs(conn)
+
+    def _record_lock_wait(
+        self,
+        start: float,
+        busy_count: int,
+        retries: int,
+        failed: bool
+    ) -> None:
+        """
+        書き込みロック取得の待機時間・リトライ回数を記録
+        """
+        wait_ms = (time.perf_counter() - start) * 1000
+        with self._lock_metrics_lock:
+            metrics = self._lock_metrics
+            metrics["transactions"] += 1
+            metrics["busy"] += busy_count
+            metrics["retries"] += retries
+            metrics["failures"] += int(failed)
+            metrics["wait_ms_total"] += wait_ms
+            metrics["wait_ms_max"] = max(metrics["wait_ms_max"], wait_ms)
+            self._lock_waits_ms.append(wait_ms)
+
+    def get_lock_metrics(self) -> Dict[str, Any]:
+        """
+        書き込みロック競合のメトリクスを取得
+
+        Returns:
+            {"transactions", "busy", "retries", "failures", "wait_ms_total",
+             "wait_ms_max", "wait_ms_p50", "wait_ms_p99"}（p50/p99は直近1024件の書き込みトランザクション）
+        """
+        with self._lock_metrics_lock:
+            metrics = dict(self._lock_metrics)
+            waits = list(self._lock_waits_ms)
+        metrics["wait_ms_total"] = round(metrics["wait_ms_total"], 3)
+        metrics["wait_ms_max"] = round(metrics["wait_ms_max"], 3)
+        for percentile in (50, 99):
+            value = round(float(np.percentile(waits, percentile)), 3) if waits else 0.0
+            metrics[f"wait_ms_p{percentile}"] = value
+        return metrics
+
+    def begin_transaction(self) -> None:
+        """
+        トランザクション開始（BEGIN IMMEDIATE。ロック競合時は再試行）
+        """
+        if self.auto_commit:
+            self.logger.warning("auto_commit=Trueのため、トランザクション管理は無効です")
+            return
+
+        # 共有接続ではcommit()/rollback()まで他スレッドの書き込み・取得を待たせる
+        if self._in_memory:
+            self._shared_lock.acquire()
+            self._local.holds_shared_lock = True
+        try:
+            self._begin_immediate(self.conn)
+        except Exception:
+            self._release_shared_lock()
+            raise
+        self.logger.debug("トランザクション開始")
+
+    def _release_shared_lock(self) -> None:
+        """
+        begin_transaction()で取得した共有接続のロックを解放
+        """
+        if getattr(self._local, "holds_shared_lock", False):
+            self._local.holds_shared_lock = False
+            self._shared_lock.release()
+
+    def commit(self) -> None:
+        """
+        トランザクションコミット
+        """
+        if self.auto_commit:
+            return
+
+        try:
+            self.conn.commit()
+        finally:
+            self._release_shared_lock()
+        self.logger.debug("トランザクションコミット")
+
+    def rollback(self) -> None:
+        """
+        トランザクションロールバック
+        """
+        if self.auto_commit:
+            return
+
+        try:
+            self.conn.rollback()
+        finally:
+            self._release_shared_lock()
+        self.logger.debug("トランザクションロールバック")
+
+    def close(self) -> None:
+        """
+        データベース接続をクローズ（プール内の全接続）
+        """
+        if self._closed:
+            return
+
+        # メモリモードは定期保存を止め、未コミットの変更を破棄してから最終保存
+        if self.persist_path is not None:
+            if self._persist_thread is not None:
+                self._persist_stop.set()
+                self._persist_thread.join()
+                self._persist_thread = None
+            with self._shared_lock:
+                if self.conn.in_transaction:
+                    self.conn.rollback()
+                self._release_shared_lock()
+                self.checkpoint()
+
+        # 実行中のワーカーが_parallel_lockを取得できるよう、ロックの外で終了を待つ
+        with self._parallel_lock:
+            executor, self._parallel_executor = self._parallel_executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+        with self._parallel_lock:
+            read_only_conns, self._read_only_conns = self._read_only_conns, []
+            self._read_only_pool = queue.LifoQueue()
+        for read_only in read_only_conns:
+            self._close_quietly(read_only)
+
+        with self._pool_lock:
+            for _, pooled in self._pool.values():
+                self._close_quietly(pooled)
+            self._pool.clear()
+
+        if self._shared_conn is not None:
+            self._close_quietly(self._shared_conn)
+            self._shared_conn = None
+
+        self._local = threading.local()
+        self._closed = True
+        self.logger.info("データベース接続クローズ")
+
+
+class IndexAdvisor:
+    """インデックスアドバイザー
+
+    SQLiteStorageのselect/query/update/delete等で実行されたステートメント形状を記録し、
+    EXPLAIN QUERY PLANで全件走査（SCAN）になっている形状に対してインデックスを提案・作成する
+    """
+
+    # WHERE句の範囲（WHERE〜GROUP BY/ORDER BY/LIMIT/HAVING）
+    WHERE_PATTERN = re.compile(
+        r"\bWHERE\b(.*?)(?:\bGROUP\s+BY\b|\bORDER\s+BY\b|\bLIMIT\b|\bHAVING\b|$)",
+        re.IGNORECASE | re.DOTALL
+    )
+    # インデックスの等価検索に使える条件（=, IN, IS）
+    EQUALITY_PATTERN = re.compile(
+        r"(?:\b\w+\.)?\b(\w+)\s*(?:==?|\bIN\b|\bIS\b(?!\s+NOT\b))",
+        re.IGNORECASE
+    )
+    # インデックスの範囲検索に使える条件（>, <, BETWEEN, 前方一致LIKE）
+    RANGE_PATTERN = re.compile(
+        r"(?:\b\w+\.)?\b(\w+)\s*(?:>=|<=|>|<|\bBETWEEN\b|\bLIKE\b)",
+        re.IGNORECASE
+    )
+    # 全件走査ステップ（"SCAN t" / 旧形式 "SCAN TABLE t"。インデックスを走査する"USING (COVERING )INDEX"は除外）
+    SCAN_PATTERN = re.compile(
+        r"^SCAN (?:TABLE )?(\w+)(?!.*\bUSING (?:COVERING )?INDEX\b)"
+    )
+
+    # SQLiteのプランナーが範囲条件で想定する絞り込み率
+    RANGE_SELECTIVITY = 4
+
+    def __init__(self, storage: "SQLiteStorage", max_shapes: int = 1000):
+        """
+        初期化
+
+        Args:
+            storage: 対象のSQLiteStorage
+            max_shapes: 記録する形状数の上限
+        """
+        self.storage = storage
+        self.logger = storage.logger
+        self.max_shapes = max_shapes
+        self._workload: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """
+        ステートメントの記録を開始
+        """
+        self.storage.add_statement_observer(self.capture)
+        self.logger.info("インデックスアドバイザー記録開始")
+
+    def stop(self) -> None:
+        """
+        ステートメントの記録を停止
+        """
+        self.storage.remove_statement_observer(self.capture)
+        self.logger.info("インデックスアドバイザー記録停止", context={"shapes": len(self._workload)})
+
+    def __enter__(self) -> "IndexAdvisor":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type: Any, exc_value: Any, traceback: Any) -> None:
+        self.stop()
+
+    def capture(self, sql: str, params: Any) -> None:
+        """
+        実行されたステートメントを形状ごとに記録（最初のパラメータをサンプルとして保持）
+
+        Args:
+            sql: SQL
+            params: パラメータ
+        """
+        shape = QueryProfiler.normalize(sql)
+        with self._lock:
+            entry = self._workload.get(shape)
+            if entry is None:
+                if len(self._workload) >= self.max_shapes:
+                    return
+                entry = {"sql": sql, "params": params, "count": 0}
+                self._workload[shape] = entry
+            entry["count"] += 1
+
+    def analyze(
+        self,
+        apply: bool = False,
+        run_analyze: bool = True
+    ) -> List[Dict[str, Any]]:
+        """
+        記録した形状を分析してインデックスを提案
+
+        候補インデックスはSAVEPOINT内で実際に作成してANALYZEし、SCANが消えることの確認と
+        sqlite_stat1による推定走査行数の算出を行った後にロールバックする。
+
+        Args:
+            apply: 効果を確認できた候補を実際に作成する
+            run_analyze: 分析前にANALYZEを実行して統計を更新する
+
+        Returns:
+            提案リスト（推定効果の大きい順）
+            {"table", "columns", "sql", "shapes", "executions", "rows_before",
+             "rows_after_est", "est_speedup", "verified", "created"}
+        """
+        conn = self.storage.conn
+
+        try:
+            if run_analyze:
+                conn.execute("ANALYZE")
+
+            with self._lock:
+                workload = [dict(entry) for entry in self._workload.values()]
+
+            # SCANを含む形状から候補インデックスを集約
+            candidates: Dict[Tuple[str, Tuple[str, ...]], Dict[str, Any]] = {}
+            for entry in workload:
+                for table in self._scanned_tables(conn, entry["sql"], entry["params"]):
+                    equality, range_column = self._candidate_columns(
+                        table, entry["sql"]
+                    )
+                    columns = equality + ([range_column] if range_column else [])
+                    if not columns:
+                        continue
+
+                    candidate = candidates.setdefault((table, tuple(columns)), {
+                        "table": table,
+                        "columns": columns,
+                        "equality_count": len(equality),
+                        "has_range": range_column is not None,
+                        "entries": [],
+                    })
+                    candidate["entries"].append(entry)
+
+            candidates = self._dedupe_candidates(conn, candidates)
+            suggestions = [
+                self._evaluate(conn, candidate) for candidate in candidates.values()
+            ]
+            suggestions.sort(
+                key=lambda item: item["executions"] * item["est_speedup"], reverse=True
+            )
+
+            if apply:
+                for suggestion in suggestions:
+                    if suggestion["verified"]:
+                        self.storage.create_index(
+                            suggestion["table"], suggestion["columns"]
+                        )
+                        suggestion["created"] = True
+
+            self.logger.info(
+                "インデックス分析完了",
+                context={
+                    "shapes": len(workload),
+                    "suggestions": len(suggestions),
+                    "created": sum(1 for item in suggestions if item["created"])
+                }
+            )
+
+            return suggestions
+
+        except Exception as e:
+            self.logger.error(
+                "インデックス分析エラー",
+                context={"error": str(e)},
+                exc_info=True
+            )
+            raise
+
+    def _dedupe_candidates(
+        self,
+        conn: sqlite3.Connection,
+        candidates: Dict[Tuple[str, Tuple[str, ...]], Dict[str, Any]]
+    ) -> Dict[Tuple[str, Tuple[str, ...]], Dict[str, Any]]:
+        """
+        先頭カラムが重複する候補をまとめる
+
+        カラム構成が同じテーブルの他の候補の先頭部分と一致する候補は、長い方の候補に形状を
+        まとめて除外する（長い方のインデックスで検索できるため）。
+        既存インデックスの先頭部分と一致する候補も除外する。
+
+        Args:
+            conn: 接続
+            candidates: {(テーブル, カラム構成): 候補}
+
+        Returns:
+            重複を除いた候補
+        """
+        existing: Dict[str, List[Tuple[str, ...]]] = {}
+        for table in {table for table, _ in candidates}:
+            existing[table] = [
+                tuple(
+                    row["name"]
+                    for row in conn.execute(f"PRAGMA index_info({index['name']})")
+                )
+                for index in conn.execute(f"PRAGMA index_list({table})").fetchall()
+                if not index["partial"]
+            ]
+
+        # 長い候補から順に、先頭部分が一致する既存インデックス・採用済み候補を探す
+        result: Dict[Tuple[str, Tuple[str, ...]], Dict[str, Any]] = {}
+        for key in sorted(candidates, key=lambda item: len(item[1]), reverse=True):
+            table, columns = key
+            if any(index[:len(columns)] == columns for index in existing[table]):
+                continue
+            covering = next(
+                (
+                    result[other] for other in result
+                    if other[0] == table and other[1][:len(columns)] == columns
+                ),
+                None
+            )
+            if covering is not None:
+                covering["entries"].extend(candidates[key]["entries"])
+                continue
+            result[key] = candidates[key]
+        return result
+
+    def _scanned_tables(
+        self,
+        conn: sqlite3.Connection,
+        sql: str,
+        params: Any
+    ) -> List[str]:
+        """
+        EXPLAIN QUERY PLANで全件走査されるテーブルを取得
+
+        Args:
+            conn: 接続
+            sql: SQL
+            params: パラメータ
+
+        Returns:
+            テーブル名リスト
+        """
+        if not sql.lstrip().upper().startswith(("SELECT", "WITH", "UPDATE", "DELETE")):
+            return []
+
+        try:
+            plan = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params or ()).fetchall()
+        except sqlite3.Error as e:
+            self.logger.debug("クエリプラン取得失敗", context={"sql": sql[:100], "error": str(e)})
+            return []
+
+        tables = []
+        for row in plan:
+            match = self.SCAN_PATTERN.match(row[-1])
+            if (
+                match
+                and match.group(1) not in tables
+                and self.storage.table_exists(match.group(1))
+            ):
+                tables.append(match.group(1))
+        return tables
+
+    def _candidate_columns(
+        self,
+        table: str,
+        sql: str
+    ) -> Tuple[List[str], Optional[str]]:
+        """
+        WHERE句からインデックス候補カラムを抽出（等価条件のカラム → 範囲条件のカラム1つ）
+
+        Args:
+            table: テーブル名
+            sql: SQL
+
+        Returns:
+            (等価条件カラムリスト, 範囲条件カラム)
+        """
+        match = self.WHERE_PATTERN.search(sql)
+        if not match:
+            return [], None
+
+        where = match.group(1)
+        table_columns = {col["name"] for col in self.storage.get_table_info(table)}
+
+        equality: List[str] = []
+        for col in self.EQUALITY_PATTERN.findall(where):
+            if col in table_columns and col not in equality:
+                equality.append(col)
+
+        range_column = next(
+            (
+                col
+                for col in self.RANGE_PATTERN.findall(where)
+                if col in table_columns and col not in equality
+            ),
+            None
+        )
+        return equality, range_column
+
+    def _evaluate(
+        self,
+        conn: sqlite3.Connection,
+        candidate: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        候補インデックスをSAVEPOINT内で作成し、効果を検証・推定してロールバック
+
+        Args:
+            conn: 接続
+            candidate: 候補インデックス
+
+        Returns:
+            提案
+        """
+        table = candidate["table"]
+        columns = candidate["columns"]
+        name = f"idx_{table}_{'_'.join(columns)}"
+        create_sql = f"CREATE INDEX {name} ON {table} ({', '.join(columns)})"
+
+        rows_before = 0
+        rows_after = 0
+        verified = False
+
+        conn.execute("SAVEPOINT index_advisor")
+        try:
+            conn.execute(create_sql)
+            conn.execute(f"ANALYZE {name}")
+
+            # sqlite_stat1: "総行数 先頭1カラムあたりの平均行数 先頭2カラムあたりの平均行数 ..."
+            row = conn.execute(
+                "SELECT stat FROM sqlite_stat1 WHERE idx = ?", (name,)
+            ).fetchone()
+            if row:
+                stat = [int(value) for value in row[0].split()[:len(columns) + 1]]
+                rows_before = stat[0]
+                rows_after = stat[candidate["equality_count"] or 0]
+                if candidate["has_range"]:
+                    rows_after = max(1, rows_after // self.RANGE_SELECTIVITY)
+
+            verified = all(
+                table not in self._scanned_tables(conn, entry["sql"], entry["params"])
+                for entry in candidate["entries"]
+            )
+        finally:
+            conn.execute("ROLLBACK TO index_advisor")
+            conn.execute("RELEASE index_advisor")
+
+        return {
+            "table": table,
+            "columns": columns,
+            "sql": create_sql,
+            "shapes": [
+                QueryProfiler.normalize(entry["sql"]) for entry in candidate["entries"]
+            ],
+            "executions": sum(entry["count"] for entry in candidate["entries"]),
+            "rows_before": rows_before,
+            "rows_after_est": rows_after,
+            "est_speedup": round(rows_before / max(rows_after, 1), 1),
+            "verified": verified,
+            "created": False
+        }
+
+
+class WriteBehindWriter:
+    """書き込みバッファ（ライトビハインド）クラス
+
+    バックグラウンドスレッドが専用の書き込み接続を持ち、キューに積まれたinsert/upsertを
+    1トランザクションで書き込む。連続する同じテーブル・カラム構成の要求は1回のexecutemanyにまとめ、
+    要求の順序は保持する（同じ行への書き込みは後の要求が優先される）。
+    件数（flush_rows）または経過時間（flush_interval）で書き込む。
+    """
+
+    _STOP = object()
+
+    def __init__(
+        self,
+        storage: "SQLiteStorage",
+        max_queue: Optional[int] = None,
+        flush_rows: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        put_timeout: Optional[float] = None
+    ):
+        """
+        初期化（書き込みスレッドを開始）
+
+        Args:
+            storage: 書き込み先のSQLiteStorage
+            max_queue: キューの最大件数（超えた場合はput_timeoutまで呼び出し元を待たせる）
+            flush_rows: この行数に達したら書き込む
+            flush_interval: 最初の未書き込み要求からこの秒数で書き込む
+            put_timeout: キューが満杯の場合の待機秒数（Noneの場合は無期限。超過時はqueue.Full）
+        """
+        config = storage.sqlite_config.get("write_behind", {})
+        self.storage = storage
+        self.logger = storage.logger
+        self.max_queue = max_queue or config.get("max_queue", 10000)
+        self.flush_rows = flush_rows or config.get("flush_rows", 1000)
+        self.flush_interval = flush_interval or config.get("flush_interval", 1.0)
+        if put_timeout is None:
+            put_timeout = config.get("put_timeout")
+        self.put_timeout = put_timeout
+
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=self.max_queue)
+        self._metrics_lock = threading.Lock()
+        self._metrics = {
+            "submitted_rows": 0,
+            "written_rows": 0,
+            "batches": 0,
+            "errors": 0,
+            "max_queue_depth": 0,
+            "last_flush_ms": 0.0,
+        }
+        self._closed = False
+
+        self._thread = threading.Thread(
+            target=self._run, name="sqlite-write-behind", daemon=True
+        )
+        self._thread.start()
+
+        self.logger.info(
+            "WriteBehindWriter開始",
+            context={
+                "max_queue": self.max_queue,
+                "flush_rows": self.flush_rows,
+                "flush_interval": self.flush_interval
+            }
+        )
+
+    def insert(
+        self,
+        table_name: str,
+        data: Union[Dict[str, Any], List[Dict[str, Any]]],
+        auto_timestamp: bool = True
+    ) -> "Future[int]":
+        """
+        挿入要求をキューに追加
+
+        Args:
+            table_name: テーブル名
+            data: 挿入データ（辞書または辞書のリスト）
+            auto_timestamp: created_at/updated_atを自動設定
+
+        Returns:
+            書き込み完了時に挿入行数が設定されるFuture
+        """
+        return self._submit("insert", table_name, data, auto_timestamp)
+
+    def upsert(
+        self,
+        table_name: str,
+        rows: Union[Dict[str, Any], List[Dict[str, Any]]],
+        conflict_columns: List[str],
+        update_columns: Optional[List[str]] = None,
+        auto_timestamp: bool = True
+    ) -> "Future[int]":
+        """
+        UPSERT要求をキューに追加
+
+        Args:
+            table_name: テーブル名
+            rows: UPSERTデータ（辞書または辞書のリスト）
+            conflict_columns: 重複判定カラム（UNIQUE制約/主キー）
+            update_columns: 重複時に更新するカラム（Noneの場合は重複判定カラムとcreated_at以外の全カラム）
+            auto_timestamp: created_at/updated_atを自動設定
+
+        Returns:
+            書き込み完了時に対象行数が設定されるFuture
+        """
+        return self._submit(
+            "upsert", table_name, rows, auto_timestamp, conflict_columns, update_columns
+        )
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """
+        これまでに追加した要求がすべてコミットされるまで待機
+
+        Args:
+            timeout: 待機秒数（Noneの場合は無期限）
+        """
+        if self._closed:
+            raise RuntimeError("WriteBehindWriterは停止済みです")
+        future: "Future[None]" = Future()
+        self._put(("flush", future))
+        future.result(timeout=timeout)
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """
+        未書き込みの要求を書き込んでスレッドを停止
+
+        Args:
+            timeout: 停止待機秒数（Noneの場合は無期限）
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(self._STOP)
+        self._thread.join(timeout=timeout)
+        self.logger.info("WriteBehindWriter停止", context=self.get_metrics())
+
+    def __enter__(self) -> "WriteBehindWriter":
+        return self
+
+    def __exit__(self, exc_type: Any, exc_value: Any, traceback: Any) -> None:
+        self.close()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        メトリクスを取得
+
+        Returns:
+            {"queue_depth", "max_queue_depth", "submitted_rows", "written_rows",
+             "batches", "avg_batch_rows", "errors", "last_flush_ms"}
+        """
+        with self._metrics_lock:
+            metrics = dict(self._metrics)
+        metrics["queue_depth"] = self._queue.qsize()
+        metrics["avg_batch_rows"] = (
+            round(metrics["written_rows"] / metrics["batches"], 1)
+            if metrics["batches"] else 0.0
+        )
+        return metrics
+
+    def _submit(
+        self,
+        operation: str,
+        table_name: str,
+        data: Union[Dict[str, Any], List[Dict[str, Any]]],
+        auto_timestamp: bool,
+        conflict_columns: Optional[List[str]] = None,
+        update_columns: Optional[List[str]] = None
+    ) -> "Future[int]":
+        """
+        要求をタプル化してキューに追加（タイムスタンプは呼び出し時点で設定）
+        """
+        if self._closed:
+            raise RuntimeError("WriteBehindWriterは停止済みです")
+
+        rows = [data] if isinstance(data, dict) else list(data)
+        future: "Future[int]" = Future()
+        if not rows:
+            future.set_result(0)
+            return future
+
+        if auto_timestamp:
+            now = datetime.now().isoformat()
+            for row in rows:
+                row.setdefault("created_at", now)
+                row.setdefault("updated_at", now)
+
+        columns = list(rows[0].keys())
+        if operation == "upsert":
+            if update_columns is None:
+                update_columns = [
+                    col for col in columns
+                    if col not in conflict_columns and col != "created_at"
+                ]
+            key = (
+                operation,
+                table_name,
+                tuple(columns),
+                tuple(conflict_columns),
+                tuple(update_columns)
+            )
+        else:
+            key = (operation, table_name, tuple(columns))
+
+        values = [tuple(row.get(col) for col in columns) for row in rows]
+        self._put(("write", key, values, future))
+
+        with self._metrics_lock:
+            self._metrics["submitted_rows"] += len(values)
+            self._metrics["max_queue_depth"] = max(
+                self._metrics["max_queue_depth"], self._queue.qsize()
+            )
+
+        return future
+
+    def _put(self, item: Any) -> None:
+        """
+        キューに追加（満杯の場合はput_timeoutまで待機）
+        """
+        self._queue.put(item, timeout=self.put_timeout)
+
+    def _run(self) -> None:
+        """
+        書き込みスレッド本体
+        """
+        pending: List[Dict[str, Any]] = []
+        pending_rows = 0
+        deadline: Optional[float] = None
+
+        while True:
+            timeout = (
+                None if deadline is None else max(0.0, deadline - time.monotonic())
+            )
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is self._STOP:
+                self._write(pending)
+                break
+
+            # 呼び出し元でキャンセル済みの要求は書き込まない（以降はキャンセル不可になる）
+            if (
+                item is not None
+                and item is not self._STOP
+                and not item[-1].set_running_or_notify_cancel()
+            ):
+                item = None
+
+            if item is not None and item[0] == "write":
+                _, key, values, future = item
+                # 直前の要求と同じ構成の場合のみまとめる（要求の順序を保持）
+                if pending and pending[-1]["key"] == key:
+                    group = pending[-1]
+                else:
+                    group = {"key": key, "requests": []}
+                    pending.append(group)
+                group["requests"].append((future, values))
+                pending_rows += len(values)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+
+            flush_requested = item is not None and item[0] == "flush"
+            expired = deadline is not None and time.monotonic() >= deadline
+            if pending and (
+                flush_requested or expired or pending_rows >= self.flush_rows
+            ):
+                self._write(pending)
+                pending = []
+                pending_rows = 0
+                deadline = None
+
+            if flush_requested:
+                item[1].set_result(None)
+
+    def _write(self, pending: List[Dict[str, Any]]) -> None:
+        """
+        まとめた要求を順に1トランザクションで書き込み、Futureに結果を設定
+
+        グループごとにSAVEPOINTを設定し、失敗したグループは要求単位で再実行する
+        （エラーになった要求のFutureのみ失敗にし、他の要求は書き込む）。
+
+        Args:
+            pending: [{"key": (操作, テーブル, カラム構成, ...),
+                       "requests": [(Future, 値リスト), ...]}]
+        """
+        if not pending:
+            return
+
+        start = time.perf_counter()
+        results: List[Tuple[Future, Optional[Exception], int]] = []
+
+        def route(key: Tuple, values: List[tuple]) -> Dict[str, List[tuple]]:
+            # パーティションテーブル（ビュー）はpartition_columnの値で子テーブルに振り分け
+            table_name, columns = key[1], list(key[2])
+            spec = self.storage._partition_spec(table_name)
+            if spec is None:
+                return {table_name: values}
+            rows = [dict(zip(columns, value)) for value in values]
+            grouped = self.storage._group_by_partition(table_name, rows, spec)
+            return {
+                target: [tuple(row[col] for col in columns) for row in group]
+                for target, group in grouped.items()
+            }
+
+        def execute(conn: sqlite3.Connection, key: Tuple, values: List[tuple]) -> None:
+            conn.execute("SAVEPOINT write_behind")
+            try:
+                for target, target_values in route(key, values).items():
+                    if key[0] == "upsert":
+                        sql = self.storage._build_upsert_sql(
+                            target, list(key[2]), list(key[3]), list(key[4])
+                        )
+                    else:
+                        sql = self.storage._build_insert_sql(target, list(key[2]))
+                    conn.executemany(sql, target_values)
+            except Exception:
+                conn.execute("ROLLBACK TO write_behind")
+                # 取り消された子テーブルの作成をキャッシュに残さない
+                self.storage._partition_specs.pop(key[1], None)
+                raise
+            finally:
+                conn.execute("RELEASE write_behind")
+
+        try:
+            with self.storage._write_transaction() as conn:
+                for group in pending:
+                    key = group["key"]
+                    requests = group["requests"]
+                    try:
+                        batch = [value for _, values in requests for value in values]
+                        execute(conn, key, batch)
+                        results.extend(
+                            (future, None, len(values)) for future, values in requests
+                        )
+                        continue
+                    except (sqlite3.DatabaseError, ValueError) as e:
+                        if len(requests) == 1:
+                            future, values = requests[0]
+                            results.append((future, e, len(values)))
+                            continue
+
+                    for future, values in requests:
+                        try:
+                            execute(conn, key, values)
+                            results.append((future, None, len(values)))
+                        except (sqlite3.DatabaseError, ValueError) as e:
+                            results.append((future, e, len(values)))
+
+        except Exception as e:
+            # コミット失敗等、トランザクション全体が失敗した場合は全要求を失敗にする
+            results = [
+                (future, e, len(values))
+                for group in pending
+                for future, values in group["requests"]
+            ]
+
+        failed = [
+            (future, error, count)
+            for future, error, count in results
+            if error is not None
+        ]
+        written = sum(count for _, error, count in results if error is None)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with self._metrics_lock:
+            self._metrics["written_rows"] += written
+            self._metrics["batches"] += 1
+            self._metrics["errors"] += len(failed)
+            self._metrics["last_flush_ms"] = round(elapsed_ms, 3)
+
+        if failed:
+            self.logger.error(
+                "ライトビハインド書き込みエラー",
+                context={
+                    "failed_requests": len(failed),
+                    "failed_rows": sum(count for _, _, count in failed),
+                    "error": str(failed[0][1])
+                }
+            )
+
+        for future, error, count in results:
+            if error is None:
+                future.set_result(count)
+            else:
+                future.set_exception(error)
+
+        self.logger.debug(
+            "ライトビハインド書き込み",
+            context={"rows": written, "elapsed_ms": round(elapsed_ms, 3)}
+        )
+
+
+class AsyncSQLiteStorage:
+    """非同期SQLiteストレージクラス（asyncio向け）
+
+    SQLiteStorageの操作を専用スレッドで実行し、イベントループをブロックしない。
+    書き込みは1スレッド（送信順に実行）、読み取りは複数スレッドで実行し、
+    各スレッドはSQLiteStorageの接続プールから専用の接続を使用する。
+    """
+
+    _END = object()
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        config_path: str = "config.yaml",
+        read_workers: Optional[int] = None,
+        storage: Optional[SQLiteStorage] = None
+    ):
+        """
+        初期化
+
+        Args:
+            db_path: データベースファイルパス（storage指定時は不要）
+            config_path: 設定ファイルパス
+            read_workers: 読み取りスレッド数（Noneの場合は設定のasync.read_workers）
+            storage: 既存のSQLiteStorage（Noneの場合は新規作成し、close()でクローズ）
+        """
+        self._owns_storage = storage is None
+        self.storage = storage or SQLiteStorage(db_path, config_path)
+        self.logger = self.storage.logger
+
+        async_config = self.storage.sqlite_config.get("async", {})
+        self.read_workers = read_workers or async_config.get("read_workers", 4)
+
+        self._writer = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="sqlite-async-write"
+        )
+        # :memory:は全スレッドで1接続を共有するため、読み取りも書き込みスレッドで実行
+        self._reader = (
+            self._writer if self.storage._in_memory
+            else ThreadPoolExecutor(
+                max_workers=self.read_workers, thread_name_prefix="sqlite-async-read"
+            )
+        )
+
+    async def __aenter__(self) -> "AsyncSQLiteStorage":
+        return self
+
+    async def __aexit__(self, exc_type: Any, exc_value: Any, traceback: Any) -> None:
+        await self.close()
+
+    async def run_read(
+        self,
+        func: Callable[..., Any],
+        *args: Any,
+        **kwargs: Any
+    ) -> Any:
+        """
+        任意の読み取り処理を読み取りスレッドで実行
+
+        Args:
+            func: 実行する関数（SQLiteStorageのメソッド等）
+            *args: 位置引数
+            **kwargs: キーワード引数
+
+        Returns:
+            funcの戻り値
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._reader, partial(func, *args, **kwargs))
+
+    async def run_write(
+        self,
+        func: Callable[..., Any],
+        *args: Any,
+        **kwargs: Any
+    ) -> Any:
+        """
+        任意の書き込み処理を書き込みスレッドで実行（送信順に1件ずつ実行）
+
+        Args:
+            func: 実行する関数（SQLiteStorageのメソッド等）
+            *args: 位置引数
+            **kwargs: キーワード引数
+
+        Returns:
+            funcの戻り値
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._writer, partial(func, *args, **kwargs))
+
+    async def create_table(
+        self,
+        table_name: str,
+        schema: Dict[str, str],
+        indexes: Optional[List[Union[str, List[str], Dict[str, Any]]]] = None,
+        json_columns: Optional[Dict[str, List[str]]] = None
+    ) -> None:
+        """テーブルを作成（引数はSQLiteStorage.create_tableと同じ）"""
+        await self.run_write(
+            self.storage.create_table, table_name, schema, indexes, json_columns
+        )
+
+    async def insert(
+        self,
+        table_name: str,
+        data: Union[Dict[str, Any], List[Dict[str, Any]]],
+        auto_timestamp: bool = True
+    ) -> int:
+        """データを挿入（引数はSQLiteStorage.insertと同じ）"""
+        return await self.run_write(
+            self.storage.insert, table_name, data, auto_timestamp
+        )
+
+    async def insert_batched(
+        self,
+        table_name: str,
+        data: Iterable[Dict[str, Any]],
+        batch_size: Optional[int] = None,
+        auto_timestamp: bool = True
+    ) -> Dict[str, Any]:
+        """データをチャンク単位のトランザクションで一括挿入（引数はSQLiteStorage.insert_batchedと同じ）"""
+        return await self.run_write(
+            self.storage.insert_batched, table_name, data, batch_size, auto_timestamp
+        )
+
+    async def upsert(
+        self,
+        table_name: str,
+        rows: Union[Dict[str, Any], List[Dict[str, Any]]],
+        conflict_columns: List[str],
+        update_columns: Optional[List[str]] = None,
+        auto_timestamp: bool = True
+    ) -> int:
+        """UPSERT（引数はSQLiteStorage.upsertと同じ）"""
+        return await self.run_write(
+            self.storage.upsert,
+            table_name,
+            rows,
+            conflict_columns,
+            update_columns,
+            auto_timestamp
+        )
+
+    async def update(
+        self,
+        table_name: str,
+        data: Dict[str, Any],
+        condition: Dict[str, Any],
+        auto_timestamp: bool = True
+    ) -> int:
+        """データを更新（引数はSQLiteStorage.updateと同じ）"""
+        return await self.run_write(
+            self.storage.update, table_name, data, condition, auto_timestamp
+        )
+
+    async def delete(
+        self,
+        table_name: str,
+        condition: Dict[str, Any],
+        soft_delete: bool = True
+    ) -> int:
+        """データを削除（引数はSQLiteStorage.deleteと同じ）"""
+        return await self.run_write(
+            self.storage.delete, table_name, condition, soft_delete
+        )
+
+    async def bulk_update(
+        self,
+        table_name: str,
+        items: List[Tuple[Dict[str, Any], Dict[str, Any]]],
+        auto_timestamp: bool = True
+    ) -> int:
+        """複数行を一括更新（引数はSQLiteStorage.bulk_updateと同じ）"""
+        return await self.run_write(
+            self.storage.bulk_update, table_name, items, auto_timestamp
+        )
+
+    async def bulk_delete(
+        self,
+        table_name: str,
+        keys: List[Union[Any, Dict[str, Any]]],
+        key_column: str = "id",
+        soft_delete: bool = True
+    ) -> int:
+        """複数行を一括削除（引数はSQLiteStorage.bulk_deleteと同じ）"""
+        return await self.run_write(
+            self.storage.bulk_delete, table_name, keys, key_column, soft_delete
+        )
+
+    async def select(
+        self,
+        table_name: str,
+        columns: Optional[List[str]] = None,
+        condition: Optional[Dict[str, Any]] = None,
+        order_by: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        live_only: Optional[bool] = None,
+        row_format: Optional[str] = None
+    ) -> QueryResult:
+        """データを取得（引数はSQLiteStorage.selectと同じ）"""
+        return await self.run_read(
+            self.storage.select,
+            table_name,
+            columns,
+            condition,
+            order_by,
+            limit,
+            offset,
+            live_only,
+            row_format
+        )
+
+    async def select_page(
+        self,
+        table_name: str,
+        key_column: str = "rowid",
+        after: Optional[Any] = None,
+        limit: int = 100,
+        columns: Optional[List[str]] = None,
+        condition: Optional[Dict[str, Any]] = None,
+        descending: bool = False,
+        live_only: Optional[bool] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[Any]]:
+        """キーセット方式で1ページ分のデータを取得（引数はSQLiteStorage.select_pageと同じ）"""
+        return await self.run_read(
+            self.storage.select_page,
+            table_name,
+            key_column,
+            after,
+            limit,
+            columns,
+            condition,
+            descending,
+            live_only
+        )
+
+    async def query(
+        self,
+        sql: str,
+        params: Optional[Union[tuple, List[Any]]] = None,
+        row_format: Optional[str] = None
+    ) -> QueryResult:
+        """
+        SQLクエリを実行（SELECT/WITH/EXPLAINは読み取りスレッド、それ以外は書き込みスレッド）
+        """
+        if sql.lstrip().upper().startswith(("SELECT", "WITH", "EXPLAIN")):
+            return await self.run_read(self.storage.query, sql, params, row_format)
+        return await self.run_write(self.storage.query, sql, params, row_format)
+
+    async def to_dataframe(
+        self,
+        table_name: str,
+        condition: Optional[Dict[str, Any]] = None,
+        sql: Optional[str] = None,
+        columnar: bool = False,
+        dtypes: Optional[Dict[str, str]] = None,
+        live_only: Optional[bool] = None
+    ) -> pd.DataFrame:
+        """SQLite → DataFrame変換（引数はSQLiteStorage.to_dataframeと同じ）"""
+        return await self.run_read(
+            self.storage.to_dataframe,
+            table_name,
+            condition,
+            sql,
+            columnar,
+            dtypes,
+            live_only
+        )
+
+    def iter_query(
+        self,
+        sql: str,
+        params: Optional[Union[tuple, List[Any]]] = None,
+        fetch_size: Optional[int] = None,
+        row_format: str = "dict"
+    ) -> AsyncIterator[Any]:
+        """
+        SELECTクエリの結果を1行ずつ返す非同期イテレータ（async for で使用）
+
+        Args:
+            sql: SELECTクエリ
+            params: パラメータ
+            fetch_size: 読み取りスレッドから受け渡す行数（Noneの場合は設定のfetch_size）
+            row_format: 1行の形式（dict / tuple / record）
+
+        Yields:
+            1行分のデータ（row_formatの形式）
+        """
+        fetch_size = fetch_size or self.storage.fetch_size
+        return self._iterate(
+            partial(self.storage.iter_query, sql, params, fetch_size, row_format),
+            fetch_size
+        )
+
+    def iter_select(
+        self,
+        table_name: str,
+        columns: Optional[List[str]] = None,
+        condition: Optional[Dict[str, Any]] = None,
+        key_column: str = "rowid",
+        page_size: Optional[int] = None,
+        descending: bool = False,
+        live_only: Optional[bool] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        テーブル全体をキーセットページングで1行ずつ返す非同期イテレータ（引数はSQLiteStorage.iter_selectと同じ）
+        """
+        return self._iterate(
+            partial(
+                self.storage.iter_select,
+                table_name,
+                columns,
+                condition,
+                key_column,
+                page_size,
+                descending,
+                live_only
+            ),
+            self.storage.fetch_size
+        )
+
+    def iter_dataframes(
+        self,
+        table_name: str,
+        condition: Optional[Dict[str, Any]] = None,
+        sql: Optional[str] = None,
+        params: Optional[Union[tuple, List[Any]]] = None,
+        chunk_rows: Optional[int] = None,
+        dtypes: Optional[Dict[str, str]] = None,
+        live_only: Optional[bool] = None
+    ) -> AsyncIterator[pd.DataFrame]:
+        """
+        chunk_rows行ずつDataFrameを返す非同期イテレータ（引数はSQLiteStorage.iter_dataframesと同じ）
+        """
+        return self._iterate(
+            partial(
+                self.storage.iter_dataframes,
+                table_name,
+                condition,
+                sql,
+                params,
+                chunk_rows,
+                dtypes,
+                live_only
+            ),
+            1
+        )
+
+    async def _iterate(
+        self,
+        factory: Callable[[], Iterator[Any]],
+        batch_size: int
+    ) -> AsyncIterator[Any]:
+        """
+        同期ジェネレータを1つの読み取りスレッドで実行し、batch_size件ずつイベントループへ受け渡す
+
+        受け渡しキューは2バッチまでのため、消費が遅い場合は読み取りスレッド側が待機する。
+        途中でループを抜けた場合は読み取りスレッド側のジェネレータ（カーソル）も閉じる。
+        """
+        loop = asyncio.get_running_loop()
+        queue_: "asyncio.Queue[Any]" = asyncio.Queue(maxsize=2)
+        stop = threading.Event()
+
+        def put(item: Any) -> None:
+            asyncio.run_coroutine_threadsafe(queue_.put(item), loop).result()
+
+        def produce() -> None:
+            generator = factory()
+            try:
+                batch: List[Any] = []
+                for item in generator:
+                    if stop.is_set():
+                        return
+                    batch.append(item)
+                    if len(batch) >= batch_size:
+                        put(batch)
+                        batch = []
+                if batch:
+                    put(batch)
+                put(self._END)
+            except Exception as e:
+                put(e)
+            finally:
+                generator.close()
+
+        producer = loop.run_in_executor(self._reader, produce)
+        try:
+            while True:
+                item = await queue_.get()
+                if item is self._END:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                for value in item:
+                    yield value
+        finally:
+            # 途中終了時は読み取りスレッドの待機を解除して終了を待つ
+            stop.set()
+            while not producer.done():
+                while not queue_.empty():
+                    queue_.get_nowait()
+                await asyncio.wait([producer], timeout=0.05)
+
+    async def close(self) -> None:
+        """
+        実行中の処理の完了を待ってスレッドを停止（storageを新規作成した場合はクローズ）
+        """
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._shutdown)
+
+    def _shutdown(self) -> None:
+        """
+        スレッドプールを停止
+        """
+        self._writer.shutdown(wait=True)
+        if self._reader is not self._writer:
+            self._reader.shutdown(wait=True)
+        if self._owns_storage:
+            self.storage.close()
+
+
+class ShardedSQLiteStorage:
+    """シャーディングSQLiteストレージクラス
+
+    複数のDBファイル（シャード）にシャードキーで書き込みを振り分け、ファイルロックの競合を分散する。
+    読み取りは全シャードをATTACHした接続上のUNION ALLビューで統一的に扱い、
+    シャードキーを含まない取得はシャードごとに並列実行する。
+    """
+
+    def __init__(
+        self,
+        shard_paths: Optional[List[str]] = None,
+        shard_key: Optional[str] = None,
+        config_path: str = "config.yaml",
+        router: Optional[Callable[[Any], int]] = None
+    ):
+        """
+        初期化
+
+        Args:
+            shard_paths: シャードのDBファイルパスリスト（Noneの場合は設定のsharding.paths）。
+                ATTACHできるのは既定で10ファイルまで
+            shard_key: 書き込みの振り分けに使うカラム名（Noneの場合は設定のsharding.shard_key）
+            config_path: 設定ファイルパス
+            router: シャードキーの値からシャード番号を返す関数（Noneの場合はCRC32の剰余）
+        """
+        # 全シャードをATTACHする統合読み取り用の接続（:memory:は全スレッドで1接続を共有）
+        self.hub = SQLiteStorage(":memory:", config_path)
+        self.logger = self.hub.logger
+
+        sharding_config = self.hub.sqlite_config.get("sharding", {})
+        shard_paths = shard_paths or sharding_config.get("paths", [])
+        self.shard_key = shard_key or sharding_config.get("shard_key")
+        if not shard_paths:
+            raise ValueError("シャードのDBファイルパスが指定されていません")
+        if not self.shard_key:
+            raise ValueError("シャードキーが指定されていません")
+
+        self.router = router
+        self.shards = [SQLiteStorage(path, config_path) for path in shard_paths]
+        self._executor = ThreadPoolExecutor(
+            max_workers=len(self.shards), thread_name_prefix="sqlite-shard"
+        )
+
+        try:
+            for index, shard in enumerate(self.shards):
+                self.hub.conn.execute(
+                    f"ATTACH DATABASE ? AS shard_{index}",
+                    (str(Path(shard.db_path).resolve()),)
+                )
+            self.refresh_views()
+
+            self.logger.info(
+                "ShardedSQLiteStorage初期化完了",
+                context={"shards": len(self.shards), "shard_key": self.shard_key}
+            )
+
+        except Exception as e:
+            self.logger.error(
+                f"シャード初期化エラー",
+                context={"shards": shard_paths, "error": str(e)},
+                exc_info=True
+            )
+            self.close()
+            raise
+
+    def __enter__(self) -> "ShardedSQLiteStorage":
+        return self
+
+    def __exit__(self, exc_type: Any, exc_value: Any, traceback: Any) -> None:
+        self.close()
+
+    def shard_for(self, key: Any) -> int:
+        """
+        シャードキーの値から書き込み先のシャード番号を取得
+
+        Args:
+            key: シャードキーの値
+
+        Returns:
+            シャード番号（0〜シャード数-1）
+        """
+        if key is None:
+            raise ValueError(f"シャードキーの値がありません: {self.shard_key}")
+        if self.router is not None:
+            return self.router(key) % len(self.shards)
+        # hash()はプロセスごとに値が変わるため、固定のCRC32で振り分ける
+        return zlib.crc32(str(key).encode("utf-8")) % len(self.shards)
+
+    def create_table(
+        self,
+        table_name: str,
+        schema: Dict[str, str],
+        **kwargs: Any
+    ) -> None:
+        """
+        全シャードにテーブルを作成し、統合ビューを更新（引数はSQLiteStorage.create_tableと同じ）
+        """
+        for shard in self.shards:
+            shard.create_table(table_name, schema, **kwargs)
+        self._create_view(table_name)
+
+    def insert(
+        self,
+        table_name: str,
+        data: Union[Dict[str, Any], List[Dict[str, Any]]],
+        auto_timestamp: bool = True
+    ) -> int:
+        """
+        データをシャードキーで振り分けて挿入（シャードごとに並列実行）
+
+        Args:
+            table_name: テーブル名
+            data: 挿入データ（辞書または辞書のリスト。シャードキーのカラムが必須）
+            auto_timestamp: created_at/updated_atを自動設定
+
+        Returns:
+            挿入された行数
+        """
+        rows = [data] if isinstance(data, dict) else data
+        results = self._map_shards(
+            {
+                index: partial(
+                    self.shards[index].insert, table_name, group, auto_timestamp
+                )
+                for index, group in self._group_rows(rows).items()
+            }
+        )
+        return sum(results.values())
+
+    def insert_batched(
+        self,
+        table_name: str,
+        data: Iterable[Dict[str, Any]],
+        batch_size: Optional[int] = None,
+        auto_timestamp: bool = True
+    ) -> Dict[str, Any]:
+        """
+        データをシャードキーで振り分け、シャードごとに並列でチャンク単位の一括挿入
+
+        入力はシャード数×batch_size行ずつ読み込んで振り分けるため、ジェネレータも扱える。
+
+        Args:
+            table_name: テーブル名
+            data: 挿入データ（辞書のイテラブル。シャードキーのカラムが必須）
+            batch_size: 1トランザクションあたりの行数（Noneの場合は設定値）
+            auto_timestamp: created_at/updated_atを自動設定
+
+        Returns:
+            挿入結果 {"count", "batches", "elapsed_sec", "rows_per_sec", "shards"}
+        """
+        batch_size = batch_size or self.hub.insert_batch_size
+        start = time.perf_counter()
+        counts = [0] * len(self.shards)
+        batches = 0
+
+        rows = iter(data)
+        while True:
+            chunk = list(islice(rows, batch_size * len(self.shards)))
+            if not chunk:
+                break
+            results = self._map_shards(
+                {
+                    index: partial(
+                        self.shards[index].insert_batched,
+                        table_name,
+                        group,
+                        batch_size,
+                        auto_timestamp
+                    )
+                    for index, group in self._group_rows(chunk).items()
+                }
+            )
+            for index, result in results.items():
+                counts[index] += result["count"]
+                batches += result["batches"]
+
+        elapsed = time.perf_counter() - start
+        inserted_count = sum(counts)
+        return {
+            "count": inserted_count,
+            "batches": batches,
+            "elapsed_sec": round(elapsed, 3),
+            "rows_per_sec": round(inserted_count / elapsed, 1) if elapsed > 0 else 0.0,
+            "shards": counts
+        }
+
+    def upsert(
+        self,
+        table_name: str,
+        rows: Union[Dict[str, Any], List[Dict[str, Any]]],
+        conflict_columns: List[str],
+        update_columns: Optional[List[str]] = None,
+        auto_timestamp: bool = True
+    ) -> int:
+        """
+        UPSERTをシャードキーで振り分けて実行（引数はSQLiteStorage.upsertと同じ）
+
+        一意性はシャード内でのみ保証されるため、conflict_columnsにはシャードキーを含めること。
+        """
+        rows = [rows] if isinstance(rows, dict) else rows
+        results = self._map_shards(
+            {index: partial(
+                self.shards[index].upsert,
+                table_name,
+                group,
+                conflict_columns,
+                update_columns,
+                auto_timestamp
+            ) for index, group in self._group_rows(rows).items()}
+        )
+        return sum(results.values())
+
+    def update(
+        self,
+        table_name: str,
+        data: Dict[str, Any],
+        condition: Dict[str, Any],
+        auto_timestamp: bool = True
+    ) -> int:
+        """
+        データを更新（conditionにシャードキーがあれば該当シャードのみ、なければ全シャードで並列実行）
+
+        Args:
+            table_name: テーブル名
+            data: 更新データ
+            condition: 更新条件
+            auto_timestamp: updated_atを自動更新
+
+        Returns:
+            更新された行数
+        """
+        results = self._map_shards(
+            {
+                index: partial(
+                    self.shards[index].update,
+                    table_name,
+                    dict(data),
+                    condition,
+                    auto_timestamp
+                )
+                for index in self._target_shards(condition)
+            }
+        )
+        return sum(results.values())
+
+    def delete(
+        self,
+        table_name: str,
+        condition: Dict[str, Any],
+        soft_delete: bool = True
+    ) -> int:
+        """
+        データを削除（conditionにシャードキーがあれば該当シャードのみ、なければ全シャードで並列実行）
+
+        Args:
+            table_name: テーブル名
+            condition: 削除条件
+            soft_delete: 論理削除（deleted_atを設定）
+
+        Returns:
+            削除された行数
+        """
+        results = self._map_shards(
+            {
+                index: partial(
+                    self.shards[index].delete, table_name, condition, soft_delete
+                )
+                for index in self._target_shards(condition)
+            }
+        )
+        return sum(results.values())
+
+    def select(
+        self,
+        table_name: str,
+        columns: Optional[List[str]] = None,
+        condition: Optional[Dict[str, Any]] = None,
+        order_by: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        live_only: Optional[bool] = None,
+        row_format: Optional[str] = None
+    ) -> QueryResult:
+        """
+        データを取得（引数はSQLiteStorage.selectと同じ）
+
+        conditionにシャードキーがあれば該当シャードのみを読む。
+        なければorder_by/limit/offset指定時は統合ビュー、未指定時は全シャードを並列に読んで連結する。
+        """
+        targets = self._target_shards(condition)
+        if len(targets) > 1 and (order_by or limit or offset):
+            return self.hub.select(
+                table_name,
+                columns,
+                condition,
+                order_by,
+                limit,
+                offset,
+                live_only,
+                row_format
+            )
+
+        results = self._map_shards(
+            {
+                index: partial(
+                    self.shards[index].select, table_name, columns, condition,
+                    order_by, limit, offset, live_only, row_format
+                )
+                for index in targets
+            }
+        )
+        return self._concat_results([results[index] for index in targets])
+
+    def query(
+        self,
+        sql: str,
+        params: Optional[Union[tuple, List[Any]]] = None,
+        row_format: Optional[str] = None
+    ) -> QueryResult:
+        """
+        統合ビュー（全シャードのUNION ALL）に対してSELECTを実行
+
+        テーブル名はビュー名としてそのまま使える。個別シャードはshard_0.table_nameで参照できる。
+
+        Args:
+            sql: SELECTクエリ
+            params: パラメータ
+            row_format: 結果形式（Noneの場合は設定のrow_format）
+
+        Returns:
+            取得データ（row_formatの形式）
+        """
+        return self.hub.query(sql, params, row_format)
+
+    def fan_out(
+        self,
+        sql: str,
+        params: Optional[Union[tuple, List[Any]]] = None,
+        row_format: Optional[str] = None
+    ) -> List[QueryResult]:
+        """
+        同じSQLを全シャードで並列実行し、シャードごとの結果を返す
+
+        シャード単位の部分集計（COUNT/SUM等）を並列に求め、呼び出し側で合算する用途を想定。
+
+        Args:
+            sql: SQLクエリ
+            params: パラメータ
+            row_format: 結果形式（Noneの場合は設定のrow_format）
+
+        Returns:
+            シャードごとの結果リスト（シャード番号順）
+        """
+        results = self._map_shards(
+            {
+                index: partial(shard.query, sql, params, row_format)
+                for index, shard in enumerate(self.shards)
+            }
+        )
+        return [results[index] for index in range(len(self.shards))]
+
+    def refresh_views(self) -> List[str]:
+        """
+        全シャードに存在するテーブルの統合ビューを作り直す
+
+        Returns:
+            ビューを作成したテーブル名リスト
+        """
+        common: Optional[set] = None
+        for index in range(len(self.shards)):
+            names = {
+                row["name"] for row in self.hub.conn.execute(
+                    f"SELECT name FROM shard_{index}.sqlite_master "
+                    f"WHERE type = 'table' AND sql NOT LIKE 'CREATE VIRTUAL%' "
+                    f"AND name NOT LIKE 'sqlite\\_%' ESCAPE '\\' "
+                    f"AND name NOT LIKE '\\_%' ESCAPE '\\' "
+                    f"AND name NOT GLOB '*_fts_*'"
+                )
+            }
+            common = names if common is None else common & names
+
+        tables = sorted(common or [])
+        for table_name in tables:
+            self._create_view(table_name)
+        return tables
+
+    def close(self) -> None:
+        """
+        スレッドプールを停止し、全シャードと統合接続をクローズ
+        """
+        self._executor.shutdown(wait=True)
+        for shard in self.shards:
+            shard.close()
+        self.hub.close()
+
+    def _create_view(self, table_name: str) -> None:
+        """
+        統合ビュー（TEMP VIEW）を作成
+
+        :memory:のmainスキーマには他スキーマを参照するビューを作れないため、TEMPスキーマに作成する。
+        """
+        union_sql = " UNION ALL ".join(
+            f"SELECT * FROM shard_{index}.{table_name}"
+            for index in range(len(self.shards))
+        )
+        conn = self.hub.conn
+        conn.execute(f"DROP VIEW IF EXISTS temp.{table_name}")
+        conn.execute(f"CREATE TEMP VIEW {table_name} AS {union_sql}")
+        self.hub._table_columns.pop(table_name, None)
+        self.hub._soft_delete_tables.pop(table_name, None)
+
+        self.logger.debug(
+            f"統合ビュー作成",
+            context={"table_name": table_name, "shards": len(self.shards)}
+        )
+
+    def _group_rows(
+        self,
+        rows: Iterable[Dict[str, Any]]
+    ) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        行をシャード番号ごとにまとめる
+        """
+        groups: Dict[int, List[Dict[str, Any]]] = {}
+        for row in rows:
+            groups.setdefault(self.shard_for(row.get(self.shard_key)), []).append(row)
+        return groups
+
+    def _target_shards(self, condition: Optional[Dict[str, Any]]) -> List[int]:
+        """
+        条件から対象のシャード番号を求める（シャードキーを含まない場合は全シャード）
+        """
+        if condition and self.shard_key in condition:
+            return [self.shard_for(condition[self.shard_key])]
+        return list(range(len(self.shards)))
+
+    def _map_shards(self, tasks: Dict[int, Callable[[], Any]]) -> Dict[int, Any]:
+        """
+        シャードごとの処理を並列実行（1件のみの場合は呼び出し元スレッドで実行）
+
+        シャード間の書き込みは1つのトランザクションにならないため、一部のシャードのみ反映される場合がある。
+
+        Args:
+            tasks: {シャード番号: 引数なしの関数}
+
+        Returns:
+            {シャード番号: 戻り値}
+        """
+        if len(tasks) == 1:
+            index, task = next(iter(tasks.items()))
+            return {index: task()}
+
+        futures = {index: self._executor.submit(task) for index, task in tasks.items()}
+        return {index: future.result() for index, future in futures.items()}
+
+    @staticmethod
+    def _concat_results(results: List[QueryResult]) -> QueryResult:
         """
-        データベース接続をクローズ
+        シャードごとの取得結果を連結（columnarはカラムごとに連結）
         """
-        if self.conn:
-            self.conn.close()
-            self.logger.info("データベース接続クローズ")
+        if len(results) == 1:
+            return results[0]
+        if results and isinstance(results[0], dict):
+            merged: Dict[str, List[Any]] = {name: [] for name in results[0]}
+            for result in results:
+                for name, values in result.items():
+                    merged[name].extend(values)
+            return merged
+        return [row for result in results for row in result]
 
 
 # 使用例
@@ -660,7 +6192,8 @@ if __name__ == "__main__":
 
         # 集計クエリ
         result = storage.query(
-            "SELECT COUNT(*) as count, AVG(age) as avg_age FROM users WHERE deleted_at IS NULL"
+            "SELECT COUNT(*) as count, AVG(age) as avg_age "
+            "FROM users WHERE deleted_at IS NULL"
         )
         print(f"統計: {result}")
 
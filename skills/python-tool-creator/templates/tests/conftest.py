@@ -0,0 +1,72 @@
+"""
+テスト共通設定
+
+テンプレートディレクトリをインポートパスに追加し、
+設定ファイルを書き出してSQLiteStorageを作成するフィクスチャを提供する。
+"""
+
+import sys
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import pytest
+import yaml
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlite_storage_base import SQLiteStorage  # noqa: E402
+
+
+@pytest.fixture
+def write_config(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> Callable[[Optional[Dict[str, Any]]], str]:
+    """
+    tmp_pathに設定ファイルを書き出すファクトリ（作業ディレクトリもtmp_pathに変更）
+
+    Args:
+        sqlite_config: 設定ファイルのsqliteセクション
+
+    Returns:
+        設定ファイルパス
+    """
+    monkeypatch.chdir(tmp_path)
+    counter = iter(range(1_000_000))
+
+    def factory(sqlite_config: Optional[Dict[str, Any]] = None) -> str:
+        config_path = tmp_path / f"config_{next(counter)}.yaml"
+        config = {
+            "logging": {"level": "WARNING", "handlers": {"file": {"enabled": False}}},
+            "sqlite": sqlite_config or {},
+        }
+        config_path.write_text(yaml.safe_dump(config), encoding="utf-8")
+        return str(config_path)
+
+    return factory
+
+
+@pytest.fixture
+def make_storage(
+    tmp_path: Path, write_config: Callable[[Optional[Dict[str, Any]]], str]
+) -> Callable[..., SQLiteStorage]:
+    """
+    tmp_path上にSQLiteStorageを作成するファクトリ（テスト終了時にクローズ）
+
+    Args:
+        db_name: データベースファイル名（":memory:"も可）
+        sqlite_config: 設定ファイルのsqliteセクション
+    """
+    created: List[SQLiteStorage] = []
+
+    def factory(
+        db_name: str = "test.db", sqlite_config: Optional[Dict[str, Any]] = None
+    ) -> SQLiteStorage:
+        db_path = db_name if db_name == ":memory:" else str(tmp_path / db_name)
+        storage = SQLiteStorage(db_path, write_config(sqlite_config))
+        created.append(storage)
+        return storage
+
+    yield factory
+
+    for storage in created:
+        storage.close()
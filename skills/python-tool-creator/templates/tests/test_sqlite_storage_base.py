@@ -0,0 +1,1716 @@
+"""
+sqlite_storage_base のテスト
+
+リクエストごとの機能と、書き込み順序・トランザクション分離・パーティション上限など
+並行処理や境界値で壊れやすい挙動の回帰テスト。
+"""
+
+import asyncio
+import gzip
+import json
+import sqlite3
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from sqlite_storage_base import (
+    AsyncSQLiteStorage,
+    IndexAdvisor,
+    QueryProfiler,
+    ShardedSQLiteStorage,
+    SQLiteStorage,
+    WriteBehindWriter,
+)
+
+ITEM_SCHEMA = {
+    "id": "INTEGER PRIMARY KEY",
+    "name": "TEXT",
+    "value": "INTEGER",
+    "created_at": "TEXT",
+    "updated_at": "TEXT",
+    "deleted_at": "TEXT",
+}
+
+
+class TestConnectionPool:
+    """接続プール・WALモードのテストクラス"""
+
+    def test_WALモードで接続(self, make_storage):
+        """ファイルDBがWALモードで開かれることを確認"""
+        storage = make_storage()
+
+        assert storage.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    def test_スレッドごとに専用の接続(self, make_storage):
+        """同じスレッドでは同じ接続、別スレッドでは別の接続を使うことを確認"""
+        storage = make_storage()
+        result = {}
+
+        thread = threading.Thread(target=lambda: result.update(conn=storage.conn))
+        thread.start()
+        thread.join(timeout=5)
+
+        assert storage.conn is storage.conn
+        assert result["conn"] is not storage.conn
+
+    def test_書き込み中も読み取れる(self, make_storage, tmp_path):
+        """他接続の書き込みトランザクション中もコミット済みの内容を読めることを確認"""
+        storage = make_storage()
+        storage.create_table("items", ITEM_SCHEMA)
+        storage.insert("items", {"id": 1, "name": "a"})
+
+        writer = sqlite3.connect(str(tmp_path / "test.db"), isolation_level=None)
+        try:
+            writer.execute("BEGIN IMMEDIATE")
+            writer.execute("INSERT INTO items (id, name) VALUES (2, 'b')")
+
+            started = time.perf_counter()
+            rows = storage.select("items")
+            elapsed = time.perf_counter() - started
+        finally:
+            writer.execute("ROLLBACK")
+            writer.close()
+
+        assert [row["id"] for row in rows] == [1]
+        assert elapsed < 1
+
+    def test_並行書き込みで行が欠けない(self, make_storage):
+        """複数スレッドからの挿入がすべて保存されることを確認"""
+        storage = make_storage()
+        storage.create_table("items", ITEM_SCHEMA)
+
+        def write(offset: int) -> None:
+            for i in range(50):
+                storage.insert("items", {"id": offset + i})
+
+        threads = [threading.Thread(target=write, args=(n * 100,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=30)
+
+        assert storage.query("SELECT COUNT(*) AS n FROM items")[0]["n"] == 200
+
+
+class TestInsertBatched:
+    """insert_batchedのテストクラス"""
+
+    def test_チャンク単位で挿入(self, make_storage):
+        """ジェネレータの全行をbatch_sizeごとのトランザクションで挿入することを確認"""
+        storage = make_storage()
+        storage.create_table("items", ITEM_SCHEMA)
+
+        result = storage.insert_batched(
+            "items", ({"id": i, "name": str(i)} for i in range(10)), batch_size=3
+        )
+
+        assert result["count"] == 10
+        assert result["batches"] == 4
+        assert result["rows_per_sec"] > 0
+        assert len(storage.select("items")) == 10
+
+    def test_タイムスタンプを自動設定(self, make_storage):
+        """auto_timestamp=Trueでcreated_at/updated_atが設定されることを確認"""
+        storage = make_storage()
+        storage.create_table("items", ITEM_SCHEMA)
+
+        storage.insert_batched("items", [{"id": 1}])
+
+        row = storage.select("items")[0]
+        assert row["created_at"] and row["created_at"] == row["updated_at"]
+
+    def test_失敗したチャンクはロールバック(self, make_storage):
+        """制約違反のチャンクは書き込まれず、エラーが送出されることを確認"""
+        storage = make_storage()
+        storage.create_table("items", ITEM_SCHEMA)
+
+        with pytest.raises(sqlite3.IntegrityError):
+            storage.insert_batched(
+                "items", [{"id": 1}, {"id": 2}, {"id": 3}, {"id": 3}], batch_size=2
+            )
+
+        assert [row["id"] for row in storage.select("items", order_by="id")] == [1, 2]
+
+
+class TestStreaming:
+    """iter_query/select_page/iter_selectのテストクラス"""
+
+    @pytest.fixture
+    def storage(self, make_storage):
+        storage = make_storage()
+        storage.create_table("items", ITEM_SCHEMA)
+        storage.insert("items", [{"id": i, "value": i} for i in range(1, 26)])
+        return storage
+
+    def test_iter_queryで全行を取得(self, storage):
+        """fetch_sizeより多い行を順に返すことを確認"""
+        rows = storage.iter_query("SELECT id FROM items ORDER BY id", fetch_size=4)
+
+        assert [row["id"] for row in rows] == list(range(1, 26))
+
+    def test_キーセットページング(self, storage):
+        """前ページの最後のキーから次ページを取得することを確認"""
+        first, last_key = storage.select_page("items", key_column="id", limit=10)
+        second, _ = storage.select_page(
+            "items", key_column="id", after=last_key, limit=10
+        )
+
+        assert [row["id"] for row in first] == list(range(1, 11))
+        assert [row["id"] for row in second] == list(range(11, 21))
+
+    def test_最終ページの次キーはNone(self, storage):
+        """残りがlimit未満のページでは次のキーがNoneになることを確認"""
+        rows, next_key = storage.select_page(
+            "items", key_column="id", after=20, limit=10
+        )
+
+        assert [row["id"] for row in rows] == list(range(21, 26))
+        assert next_key is None
+
+    def test_iter_selectの降順と条件(self, storage):
+        """降順・条件付きで全ページを走査することを確認"""
+        rows = storage.iter_select(
+            "items", condition={"value": 3}, key_column="id", page_size=2
+        )
+        descending = storage.iter_select(
+            "items", key_column="id", page_size=7, descending=True
+        )
+
+        assert [row["id"] for row in rows] == [3]
+        assert [row["id"] for row in descending] == list(range(25, 0, -1))
+
+
+class TestUpsert:
+    """upsertのテストクラス"""
+
+    @pytest.fixture
+    def storage(self, make_storage):
+        storage = make_storage()
+        storage.create_table("items", {**ITEM_SCHEMA, "name": "TEXT UNIQUE"})
+        return storage
+
+    def test_挿入と更新(self, storage):
+        """存在しない行は挿入し、重複する行は更新することを確認"""
+        storage.upsert("items", [{"name": "a", "value": 1}], ["name"])
+        created_at = storage.select("items")[0]["created_at"]
+
+        count = storage.upsert(
+            "items", [{"name": "a", "value": 2}, {"name": "b", "value": 3}], ["name"]
+        )
+
+        rows = storage.select("items", order_by="name")
+        assert count == 2
+        assert [(row["name"], row["value"]) for row in rows] == [("a", 2), ("b", 3)]
+        # created_atは更新しない
+        assert rows[0]["created_at"] == created_at
+
+    def test_更新カラムの指定(self, storage):
+        """update_columns以外のカラムは重複時に更新しないことを確認"""
+        storage.upsert("items", {"name": "a", "value": 1, "id": 10}, ["name"])
+
+        row = {"name": "a", "value": 2, "id": 99}
+        storage.upsert("items", row, ["name"], update_columns=["value"])
+
+        rows = storage.select("items", columns=["id", "value"])
+        assert rows == [{"id": 10, "value": 2}]
+
+    def test_空リスト(self, storage):
+        """空のリストでは何もせず0を返すことを確認"""
+        assert storage.upsert("items", [], ["name"]) == 0
+
+
+class TestBulkOperations:
+    """bulk_update/bulk_deleteのテストクラス"""
+
+    @pytest.fixture
+    def storage(self, make_storage):
+        storage = make_storage()
+        storage.create_table("items", ITEM_SCHEMA)
+        storage.insert(
+            "items", [{"id": i, "name": str(i), "value": 0} for i in range(1, 6)]
+        )
+        return storage
+
+    def test_一括更新(self, storage):
+        """(更新データ, 条件)の組をまとめて更新し、更新行数を返すことを確認"""
+        count = storage.bulk_update("items", [
+            ({"value": 10}, {"id": 1}),
+            ({"value": 20}, {"id": 2}),
+            ({"value": 99}, {"id": 100}),
+        ])
+
+        values = {row["id"]: row["value"] for row in storage.select("items")}
+        assert count == 2
+        assert (values[1], values[2], values[3]) == (10, 20, 0)
+
+    def test_一括論理削除(self, storage):
+        """キーリストの行にdeleted_atを設定することを確認"""
+        assert storage.bulk_delete("items", [1, 2]) == 2
+
+        deleted = storage.query("SELECT id FROM items WHERE deleted_at IS NOT NULL")
+        assert [row["id"] for row in deleted] == [1, 2]
+        assert len(storage.select("items")) == 5
+
+    def test_一括物理削除と条件辞書(self, storage):
+        """soft_delete=Falseで行を削除し、辞書のキーも指定できることを確認"""
+        count = storage.bulk_delete(
+            "items", [{"name": "3"}, {"name": "4"}], soft_delete=False
+        )
+
+        assert count == 2
+        rows = storage.select("items", order_by="id")
+        assert [row["id"] for row in rows] == [1, 2, 5]
+
+    def test_更新データの異なる組は別の文で実行(self, storage):
+        """カラム構成が異なる組が混在しても正しく更新されることを確認"""
+        storage.bulk_update("items", [
+            ({"value": 1}, {"id": 1}),
+            ({"name": "x"}, {"id": 2}),
+        ])
+
+        rows = {row["id"]: row for row in storage.select("items")}
+        assert (rows[1]["value"], rows[2]["name"]) == (1, "x")
+
+
+class TestSqlCache:
+    """生成SQLキャッシュのテストクラス"""
+
+    def test_同じ形の操作はキャッシュを再利用(self, make_storage):
+        """同じテーブル・カラム構成の2回目以降の生成がヒットになることを確認"""
+        storage = make_storage(sqlite_config={"cached_statements": 64})
+        storage.create_table("items", ITEM_SCHEMA)
+        before = storage.get_sql_cache_stats()
+
+        for i in range(5):
+            storage.insert("items", {"id": i, "name": "a"})
+
+        stats = storage.get_sql_cache_stats()
+        assert stats["hits"] - before["hits"] >= 4
+        assert stats["cached_statements"] == 64
+        assert 0 < stats["hit_rate"] <= 1
+
+    def test_上限を超えると古い順に破棄(self, make_storage):
+        """sql_cache_sizeを超えた生成SQLが追い出されることを確認"""
+        storage = make_storage(sqlite_config={"sql_cache_size": 2})
+        storage.create_table("items", ITEM_SCHEMA)
+
+        for column in ("name", "value", "created_at"):
+            storage.select("items", columns=[column])
+
+        stats = storage.get_sql_cache_stats()
+        assert stats["size"] <= stats["max_size"] == 2
+
+
+class TestPragmaProfiles:
+    """PRAGMAプロファイルのテストクラス"""
+
+    def test_設定のプロファイルを適用(self, make_storage):
+        """profile指定でsynchronous/cache_sizeが設定されることを確認"""
+        storage = make_storage(sqlite_config={"profile": "bulk_load"})
+        conn = storage.conn
+
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 0
+        assert conn.execute("PRAGMA cache_size").fetchone()[0] == -512000
+
+    def test_デフォルトは耐久性重視(self, make_storage):
+        """profile未指定ではsynchronous=FULL・mmapなしのSQLite既定値になることを確認"""
+        storage = make_storage()
+        conn = storage.conn
+
+        assert storage.profile == "durable"
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 2
+        assert conn.execute("PRAGMA cache_size").fetchone()[0] == -2000
+        assert conn.execute("PRAGMA mmap_size").fetchone()[0] == 0
+        assert conn.execute("PRAGMA temp_store").fetchone()[0] == 0
+
+    def test_個別PRAGMAで上書き(self, make_storage):
+        """pragmasの個別指定がプロファイルより優先されることを確認"""
+        storage = make_storage(sqlite_config={"pragmas": {"cache_size": -1000}})
+
+        assert storage.conn.execute("PRAGMA cache_size").fetchone()[0] == -1000
+
+    def test_一時的な切り替えと復元(self, make_storage):
+        """pragma_profile()の終了時に元の値へ戻ることを確認"""
+        storage = make_storage(sqlite_config={"profile": "durable"})
+        before = storage.conn.execute("PRAGMA synchronous").fetchone()[0]
+
+        with storage.pragma_profile("bulk_load") as conn:
+            assert conn.execute("PRAGMA synchronous").fetchone()[0] == 0
+
+        assert storage.conn.execute("PRAGMA synchronous").fetchone()[0] == before
+
+    def test_未定義のプロファイルはエラー(self, make_storage):
+        """存在しないプロファイル名を拒否することを確認"""
+        storage = make_storage()
+
+        with pytest.raises(ValueError):
+            with storage.pragma_profile("unknown"):
+                pass
+
+
+class TestColumnarDataFrame:
+    """to_dataframe(columnar=True)/iter_dataframesのテストクラス"""
+
+    SCHEMA = {
+        "id": "INTEGER PRIMARY KEY",
+        "name": "TEXT",
+        "value": "INTEGER",
+        "ratio": "REAL",
+    }
+
+    def test_複数チャンクの結果が通常パスと一致(self, make_storage):
+        """チャンクをまたいでもNULL許容整数・浮動小数・文字列の値と型が正しいことを確認"""
+        storage = make_storage(sqlite_config={"dataframe_chunk_rows": 7})
+        storage.create_table("items", self.SCHEMA)
+        storage.insert("items", [
+            {
+                "id": i,
+                "name": f"n{i}",
+                "value": None if i % 3 == 0 else i,
+                "ratio": i / 2,
+            }
+            for i in range(30)
+        ], auto_timestamp=False)
+
+        df = storage.to_dataframe("items", columnar=True)
+
+        assert len(df) == 30
+        assert str(df["id"].dtype) == "int64"
+        assert str(df["value"].dtype) == "Int64"
+        assert df["value"].isna().sum() == 10
+        assert df["ratio"].tolist() == [i / 2 for i in range(30)]
+        assert df["name"].tolist() == [f"n{i}" for i in range(30)]
+
+    def test_型変換失敗時は警告して推定(self, make_storage, monkeypatch):
+        """宣言型に変換できない値がある列は警告ログを出して推定にフォールバックすることを確認"""
+        storage = make_storage()
+        storage.query("CREATE TABLE mixed (x INTEGER NOT NULL)")
+        storage.query("INSERT INTO mixed VALUES ('text')")
+        warnings = []
+        monkeypatch.setattr(
+            storage.logger, "warning", lambda message, **kwargs: warnings.append(kwargs)
+        )
+
+        df = storage.to_dataframe("mixed", columnar=True)
+
+        assert df["x"].tolist() == ["text"]
+        assert warnings and warnings[0]["context"]["column"] == "x"
+
+    def test_チャンクごとのDataFrame(self, make_storage):
+        """iter_dataframesがchunk_rows行ずつ返し、カスタムSQLのパラメータを使うことを確認"""
+        storage = make_storage()
+        storage.create_table("items", self.SCHEMA)
+        storage.insert("items", [{"id": i, "value": i} for i in range(10)], False)
+
+        chunks = list(storage.iter_dataframes("items", chunk_rows=4))
+        filtered = list(storage.iter_dataframes(
+            "items", sql="SELECT id FROM items WHERE value >= ?", params=(8,)
+        ))
+
+        assert [len(chunk) for chunk in chunks] == [4, 4, 2]
+        assert filtered[0]["id"].tolist() == [8, 9]
+
+    def test_0件(self, make_storage):
+        """該当行がない場合は列だけのDataFrameを返すことを確認"""
+        storage = make_storage()
+        storage.create_table("items", self.SCHEMA)
+
+        df = storage.to_dataframe("items", condition={"id": -1}, columnar=True)
+
+        assert len(df) == 0
+        assert list(df.columns) == list(self.SCHEMA)
+
+
+class TestLoadDataFrame:
+    """load_dataframeのテストクラス"""
+
+    def test_日時はisoformatと同じ形式で保存(self, make_storage):
+        """マイクロ秒0の省略とUTCオフセットの形式がdatetime.isoformat()と一致することを確認"""
+        storage = make_storage()
+        naive = [datetime(2026, 1, 1), datetime(2026, 1, 1, 0, 0, 0, 123456)]
+        aware = [value.replace(tzinfo=timezone(timedelta(hours=9))) for value in naive]
+        df = pd.DataFrame({"naive": naive, "aware": aware})
+
+        storage.load_dataframe("stamps", df)
+
+        rows = storage.query(
+            "SELECT naive, aware FROM stamps ORDER BY rowid", row_format="tuple"
+        )
+        expected = [(n.isoformat(), a.isoformat()) for n, a in zip(naive, aware)]
+        assert [tuple(row) for row in rows] == expected
+
+    def test_欠損値はNULL(self, make_storage):
+        """NaN/NaT/Noneと真偽値が変換されて保存されることを確認"""
+        storage = make_storage()
+        df = pd.DataFrame({
+            "amount": [1.5, float("nan")],
+            "name": ["a", None],
+            "flag": [True, False],
+            "sold_at": [pd.Timestamp("2026-01-01"), pd.NaT],
+        })
+
+        result = storage.load_dataframe("sales", df, chunk_rows=1)
+
+        rows = storage.query("SELECT * FROM sales ORDER BY rowid", row_format="tuple")
+        assert [tuple(row) for row in rows] == [
+            (1.5, "a", 1, "2026-01-01T00:00:00"),
+            (None, None, 0, None),
+        ]
+        assert result["count"] == 2
+
+    def test_インデックスを再作成(self, make_storage):
+        """rebuild_indexes=Trueでロード後もインデックスが残ることを確認"""
+        storage = make_storage()
+        df = pd.DataFrame({"id": range(5), "name": list("abcde")})
+        storage.load_dataframe("items", df.head(0))
+        storage.query("CREATE INDEX idx_items_name ON items (name)")
+
+        storage.load_dataframe("items", df, rebuild_indexes=True)
+
+        indexes = storage.conn.execute("PRAGMA index_list(items)").fetchall()
+        assert [row["name"] for row in indexes] == ["idx_items_name"]
+        assert storage.query("SELECT COUNT(*) AS n FROM items")[0]["n"] == 5
+
+    def test_if_exists_replace(self, make_storage):
+        """if_exists="replace"で既存の行を置き換えることを確認"""
+        storage = make_storage()
+        storage.load_dataframe("items", pd.DataFrame({"id": [1, 2]}))
+
+        storage.load_dataframe("items", pd.DataFrame({"id": [3]}), if_exists="replace")
+
+        assert [row["id"] for row in storage.query("SELECT id FROM items")] == [3]
+
+
+class TestQueryProfiler:
+    """クエリプロファイラーのテストクラス"""
+
+    def test_形状ごとに集計(self, make_storage):
+        """リテラルの異なる同じ形のSQLを1つの形状として集計することを確認"""
+        storage = make_storage(sqlite_config={"profiling": {"enabled": True}})
+        storage.create_table("items", ITEM_SCHEMA)
+        storage.insert("items", [{"id": i, "name": str(i)} for i in range(3)])
+
+        for i in range(3):
+            storage.query(f"SELECT * FROM items WHERE name = '{i}'")
+
+        report = storage.get_profile_report(top=None)
+        shape = "SELECT * FROM items WHERE name = ?"
+        entry = next(entry for entry in report if entry["shape"] == shape)
+        assert entry["count"] == 3
+        assert entry["rows"] == 3
+        assert sum(entry["histogram"].values()) == 3
+        assert entry["full_scan"]
+
+    def test_インデックス検索は全件走査にしない(self, make_storage):
+        """SEARCHのみのプランはfull_scan=Falseになることを確認"""
+        storage = make_storage(sqlite_config={"profiling": {"enabled": True}})
+        storage.create_table("items", ITEM_SCHEMA)
+
+        storage.query("SELECT * FROM items WHERE id = 1")
+
+        report = storage.get_profile_report(top=None)
+        shape = "SELECT * FROM items WHERE id = ?"
+        entry = next(entry for entry in report if entry["shape"] == shape)
+        assert entry["plan"] and not entry["full_scan"]
+
+    def test_カバリングインデックスの走査は全件走査にしない(self, make_storage):
+        """SCAN ... USING COVERING INDEXのプランはfull_scan=Falseになることを確認"""
+        storage = make_storage(sqlite_config={"profiling": {"enabled": True}})
+        storage.create_table("items", ITEM_SCHEMA, indexes=["name"])
+
+        storage.query("SELECT name FROM items ORDER BY name")
+
+        report = storage.get_profile_report(top=None)
+        shape = "SELECT name FROM items ORDER BY name"
+        entry = next(entry for entry in report if entry["shape"] == shape)
+        assert "USING COVERING INDEX" in " ".join(entry["plan"])
+        assert not entry["full_scan"]
+
+    def test_スロークエリログ(self, make_storage, tmp_path):
+        """閾値以上のクエリをJSON Linesで追記することを確認"""
+        log_path = tmp_path / "slow.jsonl"
+        storage = make_storage(sqlite_config={"profiling": {
+            "enabled": True, "slow_query_ms": 0, "slow_query_log": str(log_path)
+        }})
+
+        storage.query("SELECT 1 AS one")
+
+        lines = log_path.read_text(encoding="utf-8").splitlines()
+        entries = [json.loads(line) for line in lines]
+        assert any(entry["sql"] == "SELECT 1 AS one" for entry in entries)
+
+    def test_無効時は空(self, make_storage):
+        """profiling未設定では記録しないことを確認"""
+        storage = make_storage()
+        storage.query("SELECT 1")
+
+        assert storage.profiler is None
+        assert storage.get_profile_report() == []
+
+    def test_正規化(self):
+        """文字列・数値リテラルと空白を正規化することを確認"""
+        shape = QueryProfiler.normalize("SELECT *  FROM t WHERE a = 'x''y' AND b = 1.5")
+
+        assert shape == "SELECT * FROM t WHERE a = ? AND b = ?"
+
+
+class TestCreateIndex:
+    """複合・部分・カバリングインデックスのテストクラス"""
+
+    @staticmethod
+    def plan(storage, sql):
+        rows = storage.conn.execute(f"EXPLAIN QUERY PLAN {sql}")
+        return " ".join(row[-1] for row in rows)
+
+    def test_複合インデックスで検索(self, make_storage):
+        """等価条件と範囲条件を1つの複合インデックスで検索することを確認"""
+        storage = make_storage()
+        storage.create_table("api", {
+            "id": "INTEGER PRIMARY KEY", "api_name": "TEXT", "fetched_at": "TEXT"
+        }, indexes=[["api_name", "fetched_at"]])
+
+        plan = self.plan(
+            storage, "SELECT id FROM api WHERE api_name = 'a' AND fetched_at >= '2026'"
+        )
+
+        assert "idx_api_api_name_fetched_at" in plan
+        assert "api_name=? AND fetched_at>?" in plan
+
+    def test_部分インデックスとUNIQUE(self, make_storage):
+        """WHERE付きのUNIQUEインデックスが条件を満たす行にのみ一意性を課すことを確認"""
+        storage = make_storage()
+        storage.create_table("items", ITEM_SCHEMA, indexes=[
+            {"columns": ["name"], "unique": True, "where": "deleted_at IS NULL"}
+        ])
+        storage.insert("items", {"id": 1, "name": "a", "deleted_at": "2026-01-01"})
+        storage.insert("items", {"id": 2, "name": "a"})
+
+        with pytest.raises(sqlite3.IntegrityError):
+            storage.insert("items", {"id": 3, "name": "a"})
+
+    def test_カバリングインデックス(self, make_storage):
+        """includeのカラムまで含め、テーブルを読まずに取得することを確認"""
+        storage = make_storage()
+        storage.create_table("items", ITEM_SCHEMA, indexes=[
+            {"columns": ["name"], "include": ["value"], "name": "idx_items_cover"}
+        ])
+
+        plan = self.plan(storage, "SELECT value FROM items WHERE name = 'a'")
+
+        assert "COVERING INDEX idx_items_cover" in plan
+
+    def test_uniqueとincludeの併用はエラー(self, make_storage):
+        """includeがキーに含まれ一意性が変わるため拒否することを確認"""
+        storage = make_storage()
+
+        with pytest.raises(ValueError):
+            storage.create_table("items", ITEM_SCHEMA, indexes=[
+                {"columns": ["name"], "unique": True, "include": ["value"]}
+            ])
+
+
+class TestIndexAdvisor:
+    """IndexAdvisorのテストクラス"""
+
+    @pytest.fixture
+    def storage(self, make_storage):
+        storage = make_storage()
+        storage.create_table("items", ITEM_SCHEMA)
+        storage.insert_batched(
+            "items", ({"id": i, "name": f"n{i % 100}", "value": i} for i in range(2000))
+        )
+        return storage
+
+    def test_全件走査を解消するインデックスを提案(self, storage):
+        """記録した条件カラムのインデックスを検証付きで提案することを確認"""
+        advisor = IndexAdvisor(storage)
+        advisor.start()
+        storage.select("items", condition={"name": "n1"})
+        advisor.stop()
+
+        suggestions = advisor.analyze()
+
+        assert [s["columns"] for s in suggestions] == [["name"]]
+        assert suggestions[0]["verified"] and not suggestions[0]["created"]
+        assert not storage.conn.execute("PRAGMA index_list(items)").fetchall()
+
+    def test_applyで作成(self, storage):
+        """apply=Trueで提案したインデックスを作成することを確認"""
+        advisor = IndexAdvisor(storage)
+        advisor.start()
+        storage.query("SELECT id FROM items WHERE value > ?", (1990,))
+        advisor.stop()
+
+        suggestions = advisor.analyze(apply=True)
+
+        assert suggestions[0]["created"]
+        indexes = storage.conn.execute("PRAGMA index_list(items)").fetchall()
+        names = [row["name"] for row in indexes]
+        assert suggestions[0]["sql"].split()[2] in names
+
+    def test_先頭カラムが重複する候補はまとめる(self, storage):
+        """長い候補の先頭部分と一致する候補を除外し、1つのインデックスにまとめることを確認"""
+        advisor = IndexAdvisor(storage)
+        advisor.start()
+        storage.select("items", condition={"name": "n1"})
+        storage.query(
+            "SELECT * FROM items WHERE name = ? AND value > ?", ("n1", 1000)
+        )
+        advisor.stop()
+
+        suggestions = advisor.analyze(apply=True)
+
+        assert [s["columns"] for s in suggestions] == [["name", "value"]]
+        assert len(suggestions[0]["shapes"]) == 2
+        assert suggestions[0]["verified"] and suggestions[0]["created"]
+        indexes = storage.conn.execute("PRAGMA index_list(items)").fetchall()
+        assert [row["name"] for row in indexes] == ["idx_items_name_value"]
+
+    def test_既存インデックスで検索できる候補は除外(self, storage):
+        """既存インデックスの先頭部分と一致する候補を提案しないことを確認"""
+        storage.create_index("items", ["name", "value"])
+        advisor = IndexAdvisor(storage)
+        advisor.start()
+        # LIKEは既存インデックスを使えず全件走査になるが、候補(name)は既存の先頭部分
+        storage.query("SELECT * FROM items WHERE name LIKE ?", ("n1%",))
+        advisor.stop()
+
+        assert advisor.analyze() == []
+
+    def test_停止後は記録しない(self, storage):
+        """stop()後に実行したステートメントは分析対象にならないことを確認"""
+        advisor = IndexAdvisor(storage)
+        advisor.start()
+        advisor.stop()
+        storage.select("items", condition={"name": "n1"})
+
+        assert advisor.analyze() == []
+
+    @pytest.mark.parametrize("detail, table", [
+        ("SCAN items", "items"),
+        ("SCAN TABLE items", "items"),
+        ("SCAN items USING COVERING INDEX idx_items_name", None),
+        ("SCAN items USING INDEX idx_items_name", None),
+        ("SEARCH items USING INDEX idx_items_name (name=?)", None),
+    ])
+    def test_インデックス走査は全件走査に含めない(self, detail, table):
+        """USING (COVERING) INDEXを含むプランを全件走査として検出しないことを確認"""
+        match = IndexAdvisor.SCAN_PATTERN.match(detail)
+
+        assert (match.group(1) if match else None) == table
+
+
+class TestLiveRows:
+    """論理削除を考慮した取得・物理削除のテストクラス"""
+
+    @pytest.fixture
+    def storage(self, make_storage):
+        storage = make_storage(sqlite_config={"live_rows_only": True})
+        storage.create_table("items", ITEM_SCHEMA)
+        storage.insert("items", [{"id": i, "name": str(i)} for i in range(1, 4)])
+        storage.delete("items", {"id": 2})
+        return storage
+
+    def test_生存行のみ取得(self, storage):
+        """live_rows_only設定でselect/to_dataframeが論理削除済みの行を除外することを確認"""
+        assert [row["id"] for row in storage.select("items")] == [1, 3]
+        assert storage.to_dataframe("items")["id"].tolist() == [1, 3]
+        assert len(storage.select("items", live_only=False)) == 3
+
+    def test_deleted_atのないテーブルは対象外(self, storage):
+        """deleted_atカラムがないテーブルには条件を付けないことを確認"""
+        storage.query("CREATE TABLE plain (id INTEGER)")
+        storage.query("INSERT INTO plain VALUES (1)")
+
+        assert storage.select("plain") == [{"id": 1}]
+
+    def test_生存行の部分インデックス(self, storage):
+        """deleted_at IS NULLの部分インデックスを作成することを確認"""
+        name = storage.create_live_index("items", ["name"])
+
+        rows = storage.query("SELECT sql FROM sqlite_master WHERE name = ?", (name,))
+        assert "WHERE deleted_at IS NULL" in rows[0]["sql"]
+
+    def test_経過日数で物理削除(self, storage):
+        """older_than_daysより前に論理削除した行のみを削除することを確認"""
+        old = (datetime.now() - timedelta(days=40)).isoformat()
+        storage.update("items", {"deleted_at": old}, {"id": 3}, auto_timestamp=False)
+
+        assert storage.purge_deleted("items", older_than_days=30, batch_size=1) == 1
+        remaining = storage.select("items", live_only=False, order_by="id")
+        assert [row["id"] for row in remaining] == [1, 2]
+
+    def test_WITHOUT_ROWIDテーブル(self, make_storage):
+        """rowidのないテーブルを主キーで物理削除できることを確認"""
+        storage = make_storage()
+        storage.query(
+            "CREATE TABLE tags (kind TEXT, code INTEGER, deleted_at TEXT, "
+            "PRIMARY KEY (kind, code)) WITHOUT ROWID"
+        )
+        storage.insert("tags", [
+            {"kind": "a", "code": i, "deleted_at": "2000-01-01" if i % 2 else None}
+            for i in range(6)
+        ], auto_timestamp=False)
+
+        assert storage.purge_deleted("tags", batch_size=2) == 3
+        codes = [row["code"] for row in storage.select("tags", order_by="code")]
+        assert codes == [0, 2, 4]
+
+
+class TestWriteBehindWriter:
+    """WriteBehindWriterのテストクラス"""
+
+    def test_まとめて書き込み(self, make_storage):
+        """連続する要求を1トランザクションで書き込み、メトリクスに反映することを確認"""
+        storage = make_storage()
+        storage.create_table("items", ITEM_SCHEMA)
+
+        with WriteBehindWriter(storage, flush_interval=60) as writer:
+            futures = [writer.insert("items", {"id": i}) for i in range(10)]
+            writer.flush()
+            metrics = writer.get_metrics()
+
+        assert [future.result(timeout=5) for future in futures] == [1] * 10
+        assert metrics["written_rows"] == metrics["submitted_rows"] == 10
+        assert metrics["batches"] == 1
+        assert len(storage.select("items")) == 10
+
+    def test_件数で書き込み(self, make_storage):
+        """flush_rowsに達した時点でflush()なしに書き込むことを確認"""
+        storage = make_storage()
+        storage.create_table("items", ITEM_SCHEMA)
+
+        with WriteBehindWriter(storage, flush_rows=3, flush_interval=60) as writer:
+            futures = [writer.insert("items", {"id": i}) for i in range(3)]
+            assert futures[-1].result(timeout=5) == 1
+
+    def test_送信順序を保持(self, make_storage):
+        """同じ行へのupsertは後の要求が優先されることを確認"""
+        storage = make_storage()
+        storage.create_table("items", ITEM_SCHEMA)
+
+        with WriteBehindWriter(storage, flush_interval=60) as writer:
+            for value in range(1, 4):
+                writer.upsert("items", {"id": 1, "value": value}, ["id"])
+                writer.insert("items", {"name": f"other{value}"})
+            writer.flush()
+
+        assert storage.select("items", condition={"id": 1})[0]["value"] == 3
+        assert len(storage.select("items")) == 4
+
+    def test_キャンセル済みFutureはスキップ(self, make_storage):
+        """キャンセルした要求は書き込まれず、書き込みスレッドが継続することを確認"""
+        storage = make_storage()
+        storage.create_table("items", ITEM_SCHEMA)
+
+        with WriteBehindWriter(storage, flush_interval=60) as writer:
+            cancelled = writer.insert("items", {"id": 1})
+            assert cancelled.cancel()
+            kept = writer.insert("items", {"id": 2})
+            writer.flush()
+            assert kept.result(timeout=5) == 1
+
+            writer.insert("items", {"id": 3})
+            writer.flush()
+
+        ids = [row["id"] for row in storage.select("items", order_by="id")]
+        assert ids == [2, 3]
+
+    def test_不正な行は自分のFutureのみ失敗(self, make_storage):
+        """制約違反の要求だけが失敗し、同じバッチの他の要求はコミットされることを確認"""
+        storage = make_storage()
+        storage.create_table("items", {**ITEM_SCHEMA, "name": "TEXT NOT NULL"})
+
+        with WriteBehindWriter(storage, flush_interval=60) as writer:
+            good = writer.insert("items", {"id": 1, "name": "a"})
+            bad = writer.insert("items", {"id": 2, "name": None})
+            after = writer.insert("items", {"id": 3, "name": "c"})
+            writer.flush()
+
+        assert good.result(timeout=5) == 1
+        assert after.result(timeout=5) == 1
+        with pytest.raises(sqlite3.IntegrityError):
+            bad.result(timeout=5)
+        ids = [row["id"] for row in storage.select("items", order_by="id")]
+        assert ids == [1, 3]
+
+    def test_停止後のflushはエラー(self, make_storage):
+        """close()後のflush()が待機せずRuntimeErrorになることを確認"""
+        writer = WriteBehindWriter(make_storage())
+        writer.close()
+
+        with pytest.raises(RuntimeError):
+            writer.flush(timeout=1)
+
+    def test_パーティションテーブルに書き込み(self, make_storage):
+        """パーティションテーブルへの要求を子テーブルに振り分けることを確認"""
+        storage = make_storage()
+        storage.create_partitioned_table(
+            "sales",
+            {
+                "id": "INTEGER PRIMARY KEY",
+                "value": "INTEGER",
+                "sold_at": "TEXT NOT NULL",
+            },
+            partition_column="sold_at",
+            interval="day",
+        )
+
+        with WriteBehindWriter(storage, flush_interval=60) as writer:
+            inserted = writer.insert("sales", [
+                {"id": 1, "value": 1, "sold_at": "2025-01-01"},
+                {"id": 2, "value": 2, "sold_at": "2025-01-02"},
+            ], auto_timestamp=False)
+            upserted = writer.upsert(
+                "sales", {"id": 2, "value": 3, "sold_at": "2025-01-02"}, ["id"],
+                auto_timestamp=False,
+            )
+            missing = writer.insert(
+                "sales", {"id": 3, "value": 4}, auto_timestamp=False
+            )
+            writer.flush()
+
+        assert inserted.result(timeout=5) == 2
+        assert upserted.result(timeout=5) == 1
+        with pytest.raises(ValueError):
+            missing.result(timeout=5)
+        child = storage.query("SELECT id FROM sales_p20250102")
+        assert [row["id"] for row in child] == [2]
+        rows = storage.select("sales", columns=["id", "value"], order_by="id")
+        assert rows == [{"id": 1, "value": 1}, {"id": 2, "value": 3}]
+
+
+class TestPartitionedTable:
+    """時間パーティションテーブルのテストクラス"""
+
+    SCHEMA = {
+        "id": "INTEGER PRIMARY KEY",
+        "value": "INTEGER",
+        "sold_at": "TEXT NOT NULL",
+        "created_at": "TEXT",
+        "updated_at": "TEXT",
+        "deleted_at": "TEXT",
+    }
+
+    @pytest.fixture
+    def storage(self, make_storage):
+        storage = make_storage()
+        storage.create_partitioned_table(
+            "sales", self.SCHEMA, partition_column="sold_at", interval="day"
+        )
+        return storage
+
+    def test_日時で子テーブルへ振り分け(self, storage):
+        """挿入行がpartition_columnの日付の子テーブルに入り、ビューで参照できることを確認"""
+        storage.insert("sales", [
+            {"id": 1, "value": 1, "sold_at": "2025-01-01T10:00:00"},
+            {"id": 2, "value": 2, "sold_at": "2025-01-02T10:00:00"},
+        ], auto_timestamp=False)
+
+        child = storage.query("SELECT id FROM sales_p20250102")
+        assert [row["id"] for row in child] == [2]
+        assert [row["id"] for row in storage.select("sales", order_by="id")] == [1, 2]
+
+    def test_期間検索は該当パーティションのみ(self, storage):
+        """select_rangeが[start, end)の行のみを返すことを確認"""
+        storage.insert("sales", [
+            {"id": i, "value": i, "sold_at": f"2025-01-0{i}"} for i in range(1, 6)
+        ], auto_timestamp=False)
+
+        rows = storage.select_range("sales", "2025-01-02", "2025-01-04", order_by="id")
+
+        assert [row["id"] for row in rows] == [2, 3]
+
+    def test_保持期間を過ぎたパーティションを削除(self, storage):
+        """drop_partitionsが古い子テーブルだけをDROPすることを確認"""
+        recent = datetime.now().date().isoformat()
+        storage.insert("sales", [
+            {"id": 1, "value": 1, "sold_at": "2020-01-01"},
+            {"id": 2, "value": 2, "sold_at": recent},
+        ], auto_timestamp=False)
+
+        dropped = storage.drop_partitions("sales", older_than_days=30)
+
+        assert dropped == ["sales_p20200101"]
+        assert [row["id"] for row in storage.select("sales")] == [2]
+
+    def test_複合SELECTの上限を超えるパーティション数(self, storage):
+        """500を超える子テーブルでもビューと期間検索が使えることを確認"""
+        start = date(2025, 1, 1)
+        rows = [
+            {"id": i, "value": i, "sold_at": (start + timedelta(days=i)).isoformat()}
+            for i in range(SQLiteStorage.MAX_COMPOUND_SELECT + 100)
+        ]
+        storage.insert("sales", rows, auto_timestamp=False)
+
+        # 作成時の当日分の子テーブルを含む
+        assert len(storage.list_partitions("sales")) >= len(rows)
+        assert storage.query("SELECT COUNT(*) AS n FROM sales")[0]["n"] == len(rows)
+        ranged = storage.select_range("sales", "2025-01-01", "2026-12-31")
+        assert len(ranged) == len(rows)
+
+    def test_更新削除は子テーブルへ振り分け(self, storage):
+        """update/delete/upsertがビューではなく子テーブルに対して実行されることを確認"""
+        storage.insert("sales", [
+            {"id": 1, "value": 1, "sold_at": "2025-01-01"},
+            {"id": 2, "value": 2, "sold_at": "2025-01-02"},
+        ], auto_timestamp=False)
+
+        assert storage.update("sales", {"value": 10}, {"id": 1}) == 1
+        row = {"id": 2, "value": 20, "sold_at": "2025-01-02"}
+        assert storage.upsert("sales", row, ["id"]) == 1
+        assert storage.delete("sales", {"id": 1}, soft_delete=False) == 1
+
+        rows = storage.select("sales")
+        assert [(row["id"], row["value"]) for row in rows] == [(2, 20)]
+
+    def test_パーティションカラムの更新はエラー(self, storage):
+        """子テーブルをまたぐ移動になる更新を拒否することを確認"""
+        row = {"id": 1, "value": 1, "sold_at": "2025-01-01"}
+        storage.insert("sales", row, auto_timestamp=False)
+
+        with pytest.raises(ValueError):
+            storage.update("sales", {"sold_at": "2025-02-01"}, {"id": 1})
+
+    def test_他プロセスの削除後も書き込める(self, storage, make_storage):
+        """別接続で子テーブルが削除された後の挿入で子テーブルを作り直すことを確認"""
+        row = {"id": 1, "value": 1, "sold_at": "2025-01-01"}
+        storage.insert("sales", row, auto_timestamp=False)
+
+        other = make_storage()
+        other.drop_partitions("sales", older_than_days=1)
+
+        storage.insert("sales", {**row, "id": 2}, auto_timestamp=False)
+        assert [row["id"] for row in storage.select("sales")] == [2]
+
+    def test_他プロセスが追加した子テーブルも更新対象(self, storage, make_storage):
+        """別接続で追加された子テーブルの行も更新されることを確認"""
+        row = {"id": 1, "value": 1, "sold_at": "2025-01-01"}
+        storage.insert("sales", row, auto_timestamp=False)
+
+        other = make_storage()
+        added = {**row, "id": 2, "sold_at": "2025-01-05"}
+        other.insert("sales", added, auto_timestamp=False)
+
+        assert storage.update("sales", {"value": 10}, {"value": 1}) == 2
+        assert [row["value"] for row in storage.select("sales")] == [10, 10]
+
+    def test_スキーマの確認はトランザクションごとに1回(self, make_storage):
+        """同じトランザクション内の書き込みではschema_versionを読み直さないことを確認"""
+        storage = make_storage(sqlite_config={"auto_commit": False})
+        storage.create_partitioned_table(
+            "sales", self.SCHEMA, partition_column="sold_at", interval="day"
+        )
+        storage.insert("sales", {"id": 0, "value": 0, "sold_at": "2025-01-01"})
+        storage.commit()
+        statements = []
+        storage.conn.set_trace_callback(statements.append)
+
+        storage.begin_transaction()
+        for i in range(1, 6):
+            storage.insert("sales", {"id": i, "value": i, "sold_at": "2025-01-01"})
+            storage.update("sales", {"value": 0}, {"id": i})
+        storage.commit()
+
+        storage.conn.set_trace_callback(None)
+        assert sum("schema_version" in sql for sql in statements) == 1
+
+
+class TestBackup:
+    """backupのテストクラス"""
+
+    @pytest.fixture
+    def storage(self, make_storage):
+        storage = make_storage()
+        storage.create_table("items", ITEM_SCHEMA)
+        storage.insert("items", [{"id": i} for i in range(100)])
+        return storage
+
+    def test_ファイルへ複製(self, storage, tmp_path):
+        """出力先のDBが元と同じ内容になることを確認"""
+        dest = tmp_path / "copy.db"
+
+        result = storage.backup(dest, pages_per_step=1, sleep=0)
+
+        with sqlite3.connect(dest) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM items").fetchone()[0] == 100
+        assert result["path"] == str(dest)
+        assert result["steps"] >= 1
+
+    def test_書き込みを止めない(self, storage, tmp_path):
+        """バックアップ中の他スレッドの書き込みが待たされないことを確認"""
+        waits = []
+
+        def write() -> None:
+            for i in range(100, 110):
+                started = time.perf_counter()
+                storage.insert("items", {"id": i})
+                waits.append(time.perf_counter() - started)
+
+        thread = threading.Thread(target=write)
+        thread.start()
+        storage.backup(tmp_path / "copy.db", pages_per_step=1, sleep=0.01)
+        thread.join(timeout=10)
+
+        assert len(waits) == 10
+        assert max(waits) < 1
+
+    def test_世代管理と圧縮(self, storage, tmp_path):
+        """ディレクトリ指定でkeep世代を超えた古いスナップショットを削除することを確認"""
+        snapshots = tmp_path / "snapshots"
+        snapshots.mkdir()
+        for stamp in ("20200101_000000", "20200102_000000"):
+            (snapshots / f"test_{stamp}.db").write_bytes(b"")
+        (snapshots / "notes.txt").write_text("keep", encoding="utf-8")
+
+        result = storage.backup(snapshots, keep=2, compress=True)
+
+        remaining = sorted(path.name for path in snapshots.iterdir())
+        snapshot = Path(result["path"]).name
+        assert remaining == ["notes.txt", "test_20200102_000000.db", snapshot]
+        assert result["removed"] == [str(snapshots / "test_20200101_000000.db")]
+        with gzip.open(result["path"]) as f:
+            assert f.read(16) == b"SQLite format 3\x00"
+
+
+class TestFullTextSearch:
+    """FTS5全文検索のテストクラス"""
+
+    SCHEMA = {
+        "id": "INTEGER PRIMARY KEY",
+        "title": "TEXT",
+        "body": "TEXT",
+        "deleted_at": "TEXT",
+    }
+
+    @pytest.fixture
+    def storage(self, make_storage):
+        storage = make_storage()
+        storage.create_table("notes", self.SCHEMA)
+        storage.insert("notes", [
+            {"id": 1, "title": "sqlite tips", "body": "use an index"},
+            {"id": 2, "title": "python", "body": "sqlite sqlite sqlite"},
+        ], auto_timestamp=False)
+        storage.create_fts_index("notes", ["title", "body"])
+        return storage
+
+    def test_既存行を関連度順に検索(self, storage):
+        """作成前の行もインデックス化され、bm25の順に返すことを確認"""
+        rows = storage.search("notes", "sqlite")
+
+        assert [row["id"] for row in rows] == [2, 1]
+        assert rows[0]["rank"] <= rows[1]["rank"]
+
+    def test_トリガーで同期(self, storage):
+        """挿入・更新・削除がFTSインデックスに反映されることを確認"""
+        storage.insert("notes", {"id": 3, "title": "fts5", "body": "trigger"}, False)
+        storage.update("notes", {"body": "changed"}, {"id": 1}, auto_timestamp=False)
+        storage.delete("notes", {"id": 2}, soft_delete=False)
+
+        assert [row["id"] for row in storage.search("notes", "trigger")] == [3]
+        assert [row["id"] for row in storage.search("notes", "changed")] == [1]
+        assert [row["id"] for row in storage.search("notes", "sqlite")] == [1]
+        assert storage.search("notes", "index") == []
+
+    def test_クエリ構文(self, storage):
+        """raw_query=TrueでFTS5の前方一致・ORを使えることを確認"""
+        rows = storage.search("notes", "pyth* OR index", raw_query=True)
+
+        assert sorted(row["id"] for row in rows) == [1, 2]
+
+    def test_日本語のtrigram検索(self, make_storage):
+        """trigramトークナイザーで日本語の部分一致（2文字を含む）を検索できることを確認"""
+        storage = make_storage()
+        storage.create_table("notes", self.SCHEMA)
+        storage.insert("notes", [
+            {"id": 1, "title": "東京都の天気", "body": "晴れ"},
+            {"id": 2, "title": "大阪府の天気", "body": "雨"},
+        ], auto_timestamp=False)
+        storage.create_fts_index("notes", ["title", "body"], tokenizer="trigram")
+
+        assert [row["id"] for row in storage.search("notes", "東京都")] == [1]
+        assert [row["id"] for row in storage.search("notes", "大阪")] == [2]
+
+    def test_未対応のトークナイザーはエラー(self, make_storage):
+        """FTS_TOKENIZERS以外を拒否することを確認"""
+        storage = make_storage()
+        storage.create_table("notes", self.SCHEMA)
+
+        with pytest.raises(ValueError):
+            storage.create_fts_index("notes", ["title"], tokenizer="mecab")
+
+
+class TestJsonColumns:
+    """JSON生成カラムのテストクラス"""
+
+    SCHEMA = {"id": "INTEGER PRIMARY KEY", "response_data": "TEXT"}
+
+    @pytest.fixture
+    def storage(self, make_storage):
+        storage = make_storage()
+        storage.create_table(
+            "api",
+            self.SCHEMA,
+            indexes=["response_data.status"],
+            json_columns={"response_data": ["status"]},
+        )
+        storage.insert("api", [
+            {
+                "id": i,
+                "response_data": json.dumps({"status": status, "user": {"name": name}}),
+            }
+            for i, status, name in ((1, 200, "a"), (2, 500, "b"))
+        ], auto_timestamp=False)
+        return storage
+
+    def test_JSONパスで検索(self, storage):
+        """生成カラムに置き換えた条件・取得カラムで検索できることを確認"""
+        rows = storage.select(
+            "api", columns=["id", "response_data.status"],
+            condition={"response_data.status": 500}
+        )
+
+        assert rows == [{"id": 2, "response_data.status": 500}]
+
+    def test_生成カラムのインデックスを使用(self, storage):
+        """JSONパスの条件がインデックス検索になることを確認"""
+        sql = "SELECT id FROM api WHERE response_data_status = 200"
+        rows = storage.conn.execute(f"EXPLAIN QUERY PLAN {sql}")
+        plan = " ".join(row[-1] for row in rows)
+
+        assert "USING INDEX" in plan
+
+    def test_生成カラムのないパスはjson_extract(self, storage):
+        """json_columnsにないパスもjson_extractで検索・並べ替えできることを確認"""
+        rows = storage.select(
+            "api", columns=["id"],
+            condition={"response_data.user.name": "a"},
+            order_by="response_data.status DESC"
+        )
+
+        assert rows == [{"id": 1}]
+
+    def test_既存テーブルへの追加(self, storage):
+        """既存テーブルにALTER TABLEで生成カラムを追加できることを確認"""
+        storage.create_table(
+            "api", self.SCHEMA, json_columns={"response_data": ["user.name"]}
+        )
+
+        rows = storage.select("api", condition={"response_data.user.name": "b"})
+        assert [row["id"] for row in rows] == [2]
+
+
+class TestWriteRetry:
+    """書き込みロックの再試行のテストクラス"""
+
+    @staticmethod
+    def hold_write_lock(path, seconds, mode="IMMEDIATE"):
+        """別接続で書き込みロックをseconds秒保持し、解放するタイマーを返す"""
+        other = sqlite3.connect(
+            str(path), isolation_level=None, check_same_thread=False
+        )
+        other.execute(f"BEGIN {mode}")
+
+        def release() -> None:
+            other.execute("COMMIT")
+            other.close()
+
+        timer = threading.Timer(seconds, release)
+        timer.start()
+        return timer
+
+    def test_ロック競合を再試行して記録(self, make_storage, tmp_path):
+        """他接続の書き込み中の挿入が再試行で成功し、メトリクスに記録されることを確認"""
+        storage = make_storage(sqlite_config={"write_retry": {"busy_timeout_ms": 20}})
+        storage.create_table("items", ITEM_SCHEMA)
+
+        timer = self.hold_write_lock(tmp_path / "test.db", 0.3)
+        storage.insert("items", {"id": 1})
+        timer.join()
+
+        metrics = storage.get_lock_metrics()
+        assert metrics["busy"] >= 1 and metrics["retries"] >= 1
+        assert metrics["failures"] == 0
+        assert metrics["wait_ms_max"] >= 200
+
+    def test_上限を超えたら送出(self, make_storage, tmp_path):
+        """timeoutまでロックを取得できない場合はエラーにして失敗を記録することを確認"""
+        storage = make_storage(sqlite_config={
+            "timeout": 0.2, "write_retry": {"busy_timeout_ms": 20}
+        })
+        storage.create_table("items", ITEM_SCHEMA)
+
+        timer = self.hold_write_lock(tmp_path / "test.db", 1)
+        try:
+            with pytest.raises(sqlite3.OperationalError):
+                storage.insert("items", {"id": 1})
+        finally:
+            timer.join()
+
+        assert storage.get_lock_metrics()["failures"] == 1
+
+    def test_単一文の書き込みもロック解放を待つ(self, make_storage, tmp_path):
+        """他接続が書き込みロックを保持中のquery()がエラーにならず完了することを確認"""
+        storage = make_storage(sqlite_config={"write_retry": {"busy_timeout_ms": 50}})
+        storage.create_table("items", ITEM_SCHEMA)
+
+        timer = self.hold_write_lock(tmp_path / "test.db", 0.3)
+        try:
+            storage.query("INSERT INTO items (id, name) VALUES (1, 'a')")
+        finally:
+            timer.join()
+
+        assert storage.select("items")[0]["name"] == "a"
+
+    def test_読み取りとCOMMITはtimeoutまで待つ(self, make_storage, tmp_path):
+        """ロールバックジャーナルの競合中もselectとCOMMITがtimeoutまで待機することを確認"""
+        storage = make_storage(sqlite_config={
+            "pragmas": {"journal_mode": "DELETE"},
+            "write_retry": {"busy_timeout_ms": 20},
+        })
+        storage.create_table("items", ITEM_SCHEMA)
+        storage.insert("items", {"id": 1})
+
+        # 他接続の排他ロック中は読み取りがブロックされる
+        timer = self.hold_write_lock(tmp_path / "test.db", 0.3, mode="EXCLUSIVE")
+        try:
+            assert len(storage.select("items")) == 1
+        finally:
+            timer.join()
+
+        # 他接続の読み取り（SHAREDロック）中はCOMMITがブロックされる
+        reader = sqlite3.connect(
+            str(tmp_path / "test.db"), isolation_level=None, check_same_thread=False
+        )
+        reader.execute("BEGIN")
+        reader.execute("SELECT * FROM items").fetchall()
+        timer = threading.Timer(0.3, lambda: reader.execute("COMMIT"))
+        timer.start()
+        try:
+            storage.insert("items", {"id": 2})
+        finally:
+            timer.join()
+            reader.close()
+
+        assert len(storage.select("items")) == 2
+        assert storage.conn.execute("PRAGMA busy_timeout").fetchone()[0] == 30000
+
+
+class TestSummaryTable:
+    """集計テーブルのテストクラス"""
+
+    SCHEMA = {
+        "id": "INTEGER PRIMARY KEY",
+        "product": "TEXT NOT NULL",
+        "region": "TEXT NOT NULL",
+        "amount": "INTEGER",
+        "deleted_at": "TEXT",
+    }
+
+    @pytest.fixture
+    def storage(self, make_storage):
+        storage = make_storage()
+        storage.create_table("sales", self.SCHEMA)
+        storage.insert("sales", [
+            {"id": 1, "product": "A", "region": "east", "amount": 10},
+            {"id": 2, "product": "A", "region": "east", "amount": 20},
+        ], auto_timestamp=False)
+        storage.create_summary_table(
+            "sales_summary", "sales", ["product", "region"],
+            {"orders": "COUNT(*)", "total": "SUM(amount)", "peak": "MAX(amount)"},
+            where="deleted_at IS NULL",
+        )
+        return storage
+
+    def summary(self, storage):
+        rows = storage.query(
+            "SELECT product, region, orders, total, peak FROM sales_summary "
+            "ORDER BY product, region"
+        )
+        return [tuple(row.values()) for row in rows]
+
+    def test_既存データから初期集計(self, storage):
+        """作成時に元テーブルの既存行を集計することを確認"""
+        assert self.summary(storage) == [("A", "east", 2, 30, 20)]
+
+    def test_挿入更新削除を差分反映(self, storage):
+        """元テーブルの変更がトリガーで該当グループに反映されることを確認"""
+        row = {"id": 3, "product": "B", "region": "west", "amount": 5}
+        storage.insert("sales", row, auto_timestamp=False)
+        storage.update("sales", {"amount": 50}, {"id": 1}, auto_timestamp=False)
+        storage.update("sales", {"region": "west"}, {"id": 2}, auto_timestamp=False)
+
+        assert self.summary(storage) == [
+            ("A", "east", 1, 50, 50),
+            ("A", "west", 1, 20, 20),
+            ("B", "west", 1, 5, 5),
+        ]
+
+        storage.delete("sales", {"id": 3}, soft_delete=False)
+        storage.delete("sales", {"id": 1})
+
+        assert self.summary(storage) == [("A", "west", 1, 20, 20)]
+
+    def test_再集計(self, storage):
+        """トリガーを経由しない変更もrefresh_summary_tableで復旧できることを確認"""
+        storage.query("DROP TRIGGER IF EXISTS sales_summary_ai")
+        storage.conn.execute(
+            "INSERT INTO sales (id, product, region, amount) "
+            "VALUES (9, 'C', 'north', 1)"
+        )
+        storage.conn.commit()
+
+        storage.refresh_summary_table("sales_summary")
+
+        assert ("C", "north", 1, 1, 1) in self.summary(storage)
+
+    def test_未対応の集計式はエラー(self, storage):
+        """差分更新できない集計式を拒否することを確認"""
+        with pytest.raises(ValueError):
+            storage.create_summary_table(
+                "bad_summary", "sales", ["product"], {"x": "GROUP_CONCAT(region)"}
+            )
+
+
+class TestAsyncSQLiteStorage:
+    """AsyncSQLiteStorageのテストクラス"""
+
+    def test_同期版と同じ位置引数を受け付ける(self, make_storage):
+        """ラッパーが同期版のシグネチャどおりに位置引数を渡すことを確認"""
+        storage = make_storage()
+
+        async def run():
+            async with AsyncSQLiteStorage(storage=storage) as db:
+                await db.create_table("items", ITEM_SCHEMA, ["name"])
+                await db.insert_batched(
+                    "items", [{"id": i, "name": str(i)} for i in range(5)], 2
+                )
+                updated = await db.bulk_update("items", [({"name": "x"}, {"id": 1})])
+                deleted = await db.bulk_delete("items", [2], "id", False)
+                rows = await db.select("items", ["id", "name"], None, "id", 2)
+                chunks = [
+                    len(chunk)
+                    async for chunk in db.iter_dataframes("items", None, None, None, 2)
+                ]
+                return updated, deleted, rows, chunks
+
+        updated, deleted, rows, chunks = asyncio.run(run())
+
+        assert (updated, deleted) == (1, 1)
+        assert rows == [{"id": 0, "name": "0"}, {"id": 1, "name": "x"}]
+        assert chunks == [2, 2]
+
+    def test_書き込みは送信順(self, make_storage):
+        """並行して送信した書き込みが送信順に実行されることを確認"""
+        storage = make_storage()
+        storage.create_table("items", ITEM_SCHEMA)
+
+        async def run():
+            async with AsyncSQLiteStorage(storage=storage) as db:
+                await asyncio.gather(*[
+                    db.upsert("items", {"id": 1, "value": value}, ["id"])
+                    for value in range(20)
+                ])
+                return await db.select("items")
+
+        assert asyncio.run(run())[0]["value"] == 19
+
+    def test_非同期イテレータ(self, make_storage):
+        """async forで全行を取得し、途中で抜けても読み取りスレッドが終了することを確認"""
+        storage = make_storage()
+        storage.create_table("items", ITEM_SCHEMA)
+        storage.insert("items", [{"id": i} for i in range(50)])
+
+        async def run():
+            async with AsyncSQLiteStorage(storage=storage, read_workers=1) as db:
+                ids = [row["id"] async for row in db.iter_query(
+                    "SELECT id FROM items ORDER BY id", fetch_size=7
+                )]
+                async for _ in db.iter_select("items", page_size=5):
+                    break
+                # 読み取りスレッドが解放されていれば次の読み取りが完了する
+                count = await db.query("SELECT COUNT(*) AS n FROM items")
+                return ids, count
+
+        ids, count = asyncio.run(asyncio.wait_for(run(), timeout=10))
+        assert ids == list(range(50))
+        assert count == [{"n": 50}]
+
+    def test_イベントループを止めない(self, make_storage):
+        """重いクエリの実行中も他のコルーチンが進むことを確認"""
+        storage = make_storage()
+        slow = (
+            "WITH RECURSIVE c(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM c "
+            "WHERE i < 300000) SELECT COUNT(*) AS n FROM c"
+        )
+
+        async def run():
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    ticks += 1
+                    await asyncio.sleep(0.001)
+
+            async with AsyncSQLiteStorage(storage=storage) as db:
+                task = asyncio.create_task(ticker())
+                await db.query(slow)
+                task.cancel()
+            return ticks
+
+        assert asyncio.run(run()) > 1
+
+
+class TestRowFormats:
+    """row_formatのテストクラス"""
+
+    @pytest.fixture
+    def storage(self, make_storage):
+        storage = make_storage()
+        storage.create_table("items", ITEM_SCHEMA)
+        storage.insert("items", [{"id": 1, "name": "a"}, {"id": 2, "name": "b"}])
+        return storage
+
+    def test_tuple(self, storage):
+        """row_format="tuple"で値のタプルを返すことを確認"""
+        rows = storage.select("items", columns=["id", "name"], row_format="tuple")
+
+        assert [tuple(row) for row in rows] == [(1, "a"), (2, "b")]
+
+    def test_record(self, storage):
+        """row_format="record"で属性アクセスできる__slots__クラスを返すことを確認"""
+        rows = storage.query(
+            "SELECT id, name FROM items ORDER BY id", row_format="record"
+        )
+
+        assert (rows[0].id, rows[1].name) == (1, "b")
+        assert not hasattr(rows[0], "__dict__")
+
+    def test_columnar(self, storage):
+        """row_format="columnar"でカラムごとのリストを返すことを確認"""
+        columns = storage.select("items", columns=["id", "name"], row_format="columnar")
+
+        assert columns == {"id": [1, 2], "name": ["a", "b"]}
+
+    def test_設定の既定値と不正な形式(self, make_storage):
+        """設定のrow_formatが既定になり、未対応の形式は拒否することを確認"""
+        storage = make_storage(sqlite_config={"row_format": "tuple"})
+
+        assert [tuple(row) for row in storage.query("SELECT 1, 2")] == [(1, 2)]
+        with pytest.raises(ValueError):
+            storage.query("SELECT 1", row_format="xml")
+
+
+class TestParallel:
+    """run_parallelのテストクラス"""
+
+    SLOW = (
+        "WITH RECURSIVE c(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM c "
+        "WHERE i < 500000) SELECT COUNT(*) FROM c"
+    )
+
+    def test_指定順に結果を返す(self, make_storage):
+        """パラメータ付きを含む各クエリの結果をqueriesの順に返すことを確認"""
+        storage = make_storage()
+        storage.create_table("items", ITEM_SCHEMA)
+        storage.insert("items", [{"id": i, "value": i} for i in range(10)])
+
+        results = storage.run_parallel([
+            "SELECT COUNT(*) AS n FROM items",
+            ("SELECT id FROM items WHERE value >= ? ORDER BY id", (8,)),
+            "SELECT MAX(value) AS m FROM items",
+        ])
+
+        assert results == [[{"n": 10}], [{"id": 8}, {"id": 9}], [{"m": 9}]]
+
+    def test_読み取り専用(self, make_storage):
+        """書き込み文はエラーになることを確認"""
+        storage = make_storage()
+        storage.create_table("items", ITEM_SCHEMA)
+
+        with pytest.raises(sqlite3.OperationalError):
+            storage.run_parallel(["SELECT 1", "INSERT INTO items (id) VALUES (1)"])
+
+    def test_インメモリは順次実行(self, make_storage):
+        """:memory:では共有接続で順に実行して結果を返すことを確認"""
+        storage = make_storage(":memory:")
+
+        assert storage.run_parallel(["SELECT 1 AS a", "SELECT 2 AS a"]) == [
+            [{"a": 1}], [{"a": 2}]
+        ]
+
+    def test_実行中のclose(self, make_storage):
+        """並列クエリの実行中にclose()してもデッドロックしないことを確認"""
+        storage = make_storage()
+        storage.create_table("items", ITEM_SCHEMA)
+
+        thread = threading.Thread(target=storage.run_parallel, args=([self.SLOW] * 4,))
+        thread.start()
+        time.sleep(0.05)
+        storage.close()
+        thread.join(timeout=10)
+
+        assert not thread.is_alive()
+
+
+class TestShardedSQLiteStorage:
+    """ShardedSQLiteStorageのテストクラス"""
+
+    SCHEMA = {
+        "id": "INTEGER PRIMARY KEY",
+        "tenant": "TEXT NOT NULL",
+        "value": "INTEGER",
+        "created_at": "TEXT",
+        "updated_at": "TEXT",
+        "deleted_at": "TEXT",
+    }
+
+    @pytest.fixture
+    def sharded(self, write_config, tmp_path):
+        paths = [str(tmp_path / f"shard{i}.db") for i in range(3)]
+        sharded = ShardedSQLiteStorage(paths, "tenant", write_config())
+        sharded.create_table("events", self.SCHEMA)
+        yield sharded
+        sharded.close()
+
+    def test_シャードキーで振り分け(self, sharded):
+        """各行がshard_for()のシャードにのみ書き込まれることを確認"""
+        rows = [{"id": i, "tenant": f"t{i}", "value": i} for i in range(12)]
+
+        assert sharded.insert("events", rows) == 12
+
+        for index, shard in enumerate(sharded.shards):
+            ids = [row["id"] for row in shard.select("events")]
+            assert ids == [
+                row["id"] for row in rows if sharded.shard_for(row["tenant"]) == index
+            ]
+
+    def test_統合ビューと横断取得(self, sharded):
+        """全シャードを横断して取得・集計できることを確認"""
+        rows = [{"id": i, "tenant": f"t{i}", "value": i} for i in range(12)]
+        sharded.insert("events", rows)
+
+        assert len(sharded.select("events")) == 12
+        assert sharded.select("events", condition={"tenant": "t3"})[0]["id"] == 3
+        total = sharded.query("SELECT SUM(value) AS total FROM events")
+        assert total == [{"total": sum(range(12))}]
+        assert sum(len(rows) for rows in sharded.fan_out("SELECT id FROM events")) == 12
+
+    def test_更新削除(self, sharded):
+        """シャードキー指定・未指定の更新と削除が対象行に反映されることを確認"""
+        rows = [{"id": i, "tenant": f"t{i}", "value": 0} for i in range(6)]
+        sharded.insert("events", rows)
+
+        assert sharded.update("events", {"value": 1}, {"tenant": "t1"}) == 1
+        assert sharded.update("events", {"value": 2}, {"id": 2}) == 1
+        assert sharded.delete("events", {"id": 3}, soft_delete=False) == 1
+
+        values = {row["id"]: row["value"] for row in sharded.select("events")}
+        assert values == {0: 0, 1: 1, 2: 2, 4: 0, 5: 0}
+
+    def test_シャードキーのない行はエラー(self, sharded):
+        """振り分けできない行を拒否することを確認"""
+        with pytest.raises(ValueError):
+            sharded.insert("events", {"id": 1})
+
+
+class TestMemoryMode:
+    """メモリモード（共有接続）のテストクラス"""
+
+    CONFIG = {
+        "auto_commit": False,
+        "memory_mode": {"enabled": True, "persist_interval": 0},
+    }
+
+    @pytest.fixture
+    def storage(self, make_storage):
+        storage = make_storage("memory.db", self.CONFIG)
+        storage.create_table("items", ITEM_SCHEMA)
+        return storage
+
+    def test_checkpointでファイルへ保存し起動時に読み込む(self, storage, make_storage, tmp_path):
+        """checkpoint()の内容がdb_pathに保存され、次回起動時にメモリへ読み込まれることを確認"""
+        storage.insert("items", {"id": 1}, auto_timestamp=False)
+        storage.commit()
+
+        result = storage.checkpoint()
+
+        assert result["path"] == str(tmp_path / "memory.db")
+        reopened = make_storage("memory.db", self.CONFIG)
+        assert reopened.conn.execute("PRAGMA database_list").fetchone()[2] == ""
+        assert [row["id"] for row in reopened.select("items")] == [1]
+
+    def test_定期保存(self, make_storage, tmp_path):
+        """persist_intervalごとにファイルへ保存することを確認"""
+        storage = make_storage(
+            "memory.db", {"memory_mode": {"enabled": True, "persist_interval": 0.1}}
+        )
+        storage.create_table("items", ITEM_SCHEMA)
+        storage.insert("items", {"id": 1})
+
+        deadline = time.time() + 5
+        while time.time() < deadline:
+            if (tmp_path / "memory.db").exists():
+                with sqlite3.connect(tmp_path / "memory.db") as conn:
+                    tables = conn.execute("SELECT name FROM sqlite_master").fetchall()
+                if ("items",) in tables:
+                    break
+            time.sleep(0.05)
+
+        with sqlite3.connect(tmp_path / "memory.db") as conn:
+            assert conn.execute("SELECT COUNT(*) FROM items").fetchone()[0] == 1
+
+    def test_他スレッドのトランザクションに参加しない(self, storage):
+        """別スレッドの書き込みがロールバックに巻き込まれないことを確認"""
+        storage.begin_transaction()
+        storage.insert("items", {"id": 1, "name": "a"}, auto_timestamp=False)
+
+        def other() -> None:
+            storage.insert("items", {"id": 2, "name": "b"}, auto_timestamp=False)
+            storage.commit()
+
+        thread = threading.Thread(target=other)
+        thread.start()
+        thread.join(timeout=0.3)
+        # 先行トランザクションの完了まで待機している
+        assert thread.is_alive()
+
+        storage.rollback()
+        thread.join(timeout=5)
+
+        assert not thread.is_alive()
+        assert [row["id"] for row in storage.select("items")] == [2]
+
+    def test_未コミットの内容を読まない(self, storage):
+        """別スレッドの読み取りがコミット後の内容のみを返すことを確認"""
+        storage.begin_transaction()
+        storage.insert("items", {"id": 1}, auto_timestamp=False)
+
+        result = {}
+        thread = threading.Thread(
+            target=lambda: result.update(rows=storage.select("items"))
+        )
+        thread.start()
+        thread.join(timeout=0.3)
+        assert thread.is_alive()
+
+        storage.commit()
+        thread.join(timeout=5)
+        assert [row["id"] for row in result["rows"]] == [1]
+
+    def test_close時に未コミットの変更を破棄して保存(self, storage, make_storage):
+        """close()でコミット済みの内容のみがファイルに保存されることを確認"""
+        storage.insert("items", {"id": 1}, auto_timestamp=False)
+        storage.commit()
+        storage.begin_transaction()
+        storage.insert("items", {"id": 2}, auto_timestamp=False)
+        storage.close()
+
+        reopened = make_storage("memory.db")
+        assert [row["id"] for row in reopened.select("items")] == [1]